@@ -37,4 +37,7 @@ def create_app(config_object=None):
     # Import and register blueprint
     from app.routes import main_bp
     app.register_blueprint(main_bp)
+    # --- ASGI entry point: event streams on an asyncio loop, everything else via Flask ---
+    from app.asgi import create_asgi_app
+    app.asgi_app = create_asgi_app(app)
     return app
\ No newline at end of file
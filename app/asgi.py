@@ -0,0 +1,173 @@
+import asyncio
+from urllib.parse import parse_qs
+from flask_login import current_user
+from werkzeug.test import EnvironBuilder
+from app.utils.scrape_broker import get_scrape_broker, get_notification_broker, notification_channel
+from app.utils.scrape_broker import format_event, parse_last_event_id
+
+try:  # in requirements.txt; only the ASGI entry point needs it, so the WSGI app runs without it
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+"""
+ASGI entry point that serves live event streams from an asyncio event loop.
+
+Under WSGI every open server-sent event stream holds a worker thread for as long as the client watches, so a
+few concurrent watchers can exhaust a threaded server. This app serves the streaming endpoints as coroutines
+instead: an idle stream costs one suspended coroutine, and one event loop can hold thousands of them. The
+streams are fed from the same brokers the (threaded) scrapers and routes publish to.
+
+    /api/scraping-stream?scrape_id=...   progress of a scrape (same events as the Flask route)
+    /api/notifications-stream            the signed-in user's new notifications and unread count
+
+Every other request is passed on to the Flask app (through asgiref's WsgiToAsgi adapter).
+create_app attaches the ASGI app to the Flask app as 'asgi_app', e.g.:
+
+Usage:
+    uvicorn run:asgi_app
+
+Run a single worker process: streams are subscribed to in the process that started them (see scrape_broker).
+"""
+
+PING_INTERVAL = 30  # Seconds between keep-alive pings on idle streams
+
+
+class StreamingASGIApp:
+    """
+    ASGI application serving event streams asynchronously and everything else through Flask.
+
+    Attributes:
+        flask_app (Flask): The Flask application (used for its config, sessions and brokers).
+        wsgi (callable | None): ASGI adapter for the Flask app, or None if asgiref is not installed.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app) if WsgiToAsgi is not None else None
+        self.routes = {
+            "/api/scraping-stream": self._open_scrape_stream,
+            "/api/notifications-stream": self._open_notification_stream,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        opener = self.routes.get(scope.get("path")) if scope["type"] == "http" else None
+        if opener is not None and scope.get("method", "GET") == "GET":
+            await self._stream(opener, scope, receive, send)
+        elif self.wsgi is not None:
+            await self.wsgi(scope, receive, send)
+        elif scope["type"] == "http":
+            await _send_text(send, 501, "Install asgiref to serve the Flask app over ASGI")
+
+    async def _lifespan(self, receive, send):
+        """Refuse to start the server without asgiref, rather than answering every page with an error."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.wsgi is None:
+                    await send({"type": "lifespan.startup.failed",
+                                "message": "asgiref is required to serve the Flask app over ASGI "
+                                           "(pip install -r requirements.txt)"})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _stream(self, opener, scope, receive, send):
+        """Authorize and subscribe (in a worker thread, as it queries the database), then stream events."""
+        loop = asyncio.get_running_loop()
+        status, subscription = await loop.run_in_executor(None, self._subscribe, opener, scope)
+        if subscription is None:
+            await _send_text(send, status, "Unknown or expired stream")
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),  # stop reverse proxies from buffering the stream
+        ]})
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            while not disconnected.done():
+                getter = asyncio.ensure_future(subscription.aget(timeout=PING_INTERVAL))
+                await asyncio.wait({getter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                item = getter.result()
+                if item is None:
+                    message = 'data: {"type":"ping"}\n\n'
+                else:
+                    message = format_event(*item)
+                await send({"type": "http.response.body", "body": message.encode(), "more_body": True})
+                if item is not None and item[1].get("status") == "complete":
+                    break
+            if not disconnected.done():
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            disconnected.cancel()
+            subscription.close()
+
+    def _subscribe(self, opener, scope):
+        """
+        Run a stream's opener inside a Flask request context built from the ASGI scope, so the session
+        cookie identifies the user exactly as it would for a Flask route.
+
+        Returns:
+            tuple: (HTTP status, Subscription or None).
+        """
+        headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope.get("headers", [])]
+        environ = EnvironBuilder(path=scope.get("path", "/"), headers=headers,
+                                 query_string=scope.get("query_string", b"").decode("latin-1")).get_environ()
+        with self.flask_app.request_context(environ) as context:
+            query = {key: values[-1] for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()}
+            last_event_id = parse_last_event_id(context.request.headers.get("Last-Event-ID")
+                                                or query.get("last_event_id"))
+            return opener(query, last_event_id)
+
+    def _open_scrape_stream(self, query, last_event_id):
+        """Subscribe to a scrape, if it exists and the current user may watch it (see api_scraping_stream)."""
+        broker = get_scrape_broker()
+        channel = broker.get_channel(query.get("scrape_id", ""))
+        if channel is None or not channel.allows(current_user.id if current_user.is_authenticated else None):
+            return 404, None
+        return 200, broker.subscribe(channel.scrape_id, last_event_id)
+
+    def _open_notification_stream(self, query, last_event_id):
+        """Subscribe to the signed-in user's notifications (new events only, unless resuming)."""
+        if not current_user.is_authenticated:
+            return 401, None
+        broker = get_notification_broker()
+        channel_id = notification_channel(current_user.id)
+        if not last_event_id:
+            last_event_id = broker.get_channel(channel_id).last_id
+        return 200, broker.subscribe(channel_id, last_event_id)
+
+
+async def _wait_for_disconnect(receive):
+    """Consume request messages until the client disconnects."""
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _send_text(send, status, text):
+    """Send a complete plain-text response."""
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+    await send({"type": "http.response.body", "body": text.encode()})
+
+
+def create_asgi_app(flask_app):
+    """
+    Wrap a Flask app in the streaming ASGI app.
+
+    Args:
+        flask_app (Flask): The application created by create_app.
+
+    Returns:
+        StreamingASGIApp: The ASGI application.
+    """
+    return StreamingASGIApp(flask_app)
@@ -10,6 +10,36 @@ class Config:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///careerlink.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     HEADLESS_TOGGLE = True  # Default to True for safety
+    SCRAPER_WORKERS = 4  # Browsers scraping job detail pages in parallel (shared across scrapes)
+    SCRAPER_BACKEND = 'http'  # Job detail pages: 'http' (plain fetch, Selenium fallback) or 'selenium'
+    SCRAPER_INCREMENTAL = True  # Skip detail pages of jobs whose listing is unchanged since the last scrape
+    SCRAPER_COMMIT_BATCH = 50  # Scraped jobs written per database transaction
+    SCRAPE_QUEUE_WORKERS = 2  # Queued scrapes run at once (each uses up to SCRAPER_WORKERS browsers)
+    SCRAPE_TASK_LEASE = 300  # Seconds without a heartbeat after which a running scrape is queued again
+    SCRAPE_FRESHNESS = 600  # Seconds a finished scrape's results are served to identical requests
+    FUZZY_SEARCH_CONFIDENCE = 0.6  # Similarity threshold (0 to 1) for typo-tolerant job search
+    SEARCH_CACHE_SIZE = 256  # Number of job search queries whose results are cached
+    SEARCH_CACHE_TTL = 300  # Seconds a cached job search result stays valid
+    SEARCH_CACHE_PAGES = 8  # Pages of each cached job search whose job ids are kept with its total
+    RESUME_CACHE_SIZE = 128  # Resume analyses (text and keywords) kept in memory by file content hash
+    RESUME_ANALYSIS_WORKERS = 2  # Uploaded resumes analysed at once in the background (0 analyses in the request)
+    RESUME_MAX_BYTES = 25 * 1024 * 1024  # Largest resume upload accepted
+    RESUME_MAX_PAGES = 30  # PDF pages read per resume (later pages are ignored)
+    PDF_EXTRACT_PROCESSES = 2  # Processes extracting pages of long PDFs in parallel (0 extracts in the worker thread)
+    PDF_PARALLEL_MIN_PAGES = 8  # PDFs with fewer pages are extracted without the process pool
+    PDF_EXTRACT_TIMEOUT = 60  # Seconds of PDF extraction per resume before it stops with the pages done so far
+    KEYWORD_BACKEND = 'openai'  # Resume keyword extraction: 'openai', or 'fake' (offline stand-in for benchmarks)
+    KEYWORD_MODEL = 'gpt-3.5-turbo'  # Model suggesting job titles for resumes
+    KEYWORD_TIMEOUT = 30  # Seconds per model request (and to wait for a free request slot)
+    KEYWORD_MAX_RETRIES = 2  # Retries of failed or rate-limited model requests
+    KEYWORD_CONCURRENCY = 4  # Model requests in flight at once
+    KEYWORD_CACHE_SIZE = 512  # Model responses kept in memory (all are also stored in the database)
+    KEYWORD_FAKE_LATENCY = 0.0  # Seconds the fake backend takes per request
+    SCRAPE_STREAM_BUFFER = 256  # Events buffered per scrape stream client before the oldest are dropped
+    SCRAPE_STREAM_RETENTION = 300  # Seconds a finished scrape's stream can still be subscribed to
+    SCRAPE_STREAM_HISTORY = 500  # Recent events per scrape replayed to clients that reconnect
+    SERVER_LOCK_FILE = 'server.lock'  # Locked in the instance folder so only one server process runs the app
+    NOTIFICATION_STREAM_HISTORY = 20  # Recent notification events per user replayed to clients that reconnect
     
 # Development configuration with debug and fallback secret key.
 class DevelopmentConfig(Config):
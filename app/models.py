@@ -27,6 +27,12 @@ friendships = db.Table('friendships',
     db.Column('friend_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
 )
 
+# Association table for users who joined a scrape requested by someone else with the same filters
+scrape_task_followers = db.Table('scrape_task_followers',
+    db.Column('scrape_task_id', db.Integer, db.ForeignKey('scrape_task.id'), primary_key=True),
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
+)
+
 class User(UserMixin, db.Model):
     """
     User account model.
@@ -38,14 +44,18 @@ class User(UserMixin, db.Model):
         password (str): Hashed password.
         job_applications (list[JobApplication]): Applications submitted by the user.
         job_searches (list[JobSearch]): Saved job searches.
-        scraped_jobs (list[ScrapedJob]): Jobs scraped by the user.
+        scraped_jobs (list[ScrapedJob]): Catalog jobs first scraped by the user.
+        job_sightings (list[UserScrapedJob]): Catalog jobs the user's scrapes have found.
         shared_applications (list[JobApplication]): Applications shared with other users.
         friends (list[User]): Friends of the user (self-referential many-to-many).
+        application_stats_ready (bool): Whether the user's ApplicationStat rows have been built from their
+            applications (they are then kept up to date as applications change).
     """
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(100), nullable=False)
+    application_stats_ready = db.Column(db.Boolean, default=False)  # NULL for users from before the stats
     # Relationships
     job_applications = db.relationship('JobApplication', backref='user', lazy=True)
     job_searches = db.relationship('JobSearch', backref='user', lazy=True)
@@ -99,6 +109,36 @@ class JobApplication(db.Model):
     def __repr__(self):
         return f'<JobApplication {self.title} at {self.company}>'
 
+class ApplicationStat(db.Model):
+    """
+    Materialized count of a user's job applications made on one day with one status and job type, kept up to
+    date by app.utils.application_stats so the dashboard and analytics never load the applications themselves.
+
+    Attributes:
+        id (int): Primary key.
+        user_id (int): Foreign key to User.
+        day (date): Day the applications were made, in Perth time.
+        status (str): Status of the applications.
+        job_type (str): Job type of the applications ('' if they have none).
+        count (int): Number of applications.
+        dated (int): Number of those applications with a closing date.
+        response_days (int): Total days from application to closing date of the dated applications.
+    """
+    __tablename__ = 'application_stat'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    job_type = db.Column(db.String(100), nullable=False, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+    dated = db.Column(db.Integer, nullable=False, default=0)
+    response_days = db.Column(db.Integer, nullable=False, default=0)
+
+    # Counts are adjusted in place with upserts on this key
+    __table_args__ = (
+        db.Index('uq_application_stat_key', 'user_id', 'day', 'status', 'job_type', unique=True),
+    )
+
 class JobSearch(db.Model):
     """
     Saved job search performed by a user.
@@ -118,9 +158,12 @@ class ScrapedJob(db.Model):
     """
     Job listing scraped from external sources (e.g., GradConnection).
 
+    Jobs form a shared catalog with one row per canonical link (see job_catalog.canonical_link); which users'
+    scrapes found a job is recorded in UserScrapedJob.
+
     Attributes:
         id (int): Primary key.
-        user_id (int): Foreign key to User.
+        user_id (int): Foreign key to the User who first scraped the job.
         title (str): Job title.
         posted_date (str): Date the job was posted.
         closing_in (str): Time until closing (e.g., '3 days').
@@ -131,7 +174,13 @@ class ScrapedJob(db.Model):
         full_text (str): Full job description text.
         link (str): URL to the job posting.
         source (str): Source of the job (e.g., 'GradConnection').
-        tag_location, tag_jobtype, tag_category (str): Tagging fields for filtering/search.
+        tag_location, tag_jobtype, tag_category (str): Lowercase tag slugs (e.g. 'perth') of the scrape that
+            first listed the job, for display; filters go through the sightings, as a job can be listed
+            under several.
+        company (str): Company name, extracted from 'about_company' at insert time.
+        search_text (str): Precomputed, lowercased search document (one normalized field per line).
+        fingerprint (str): SHA-256 of the job's listing card; unchanged jobs are not re-scraped.
+        last_seen (datetime): When the job was last seen in a scrape.
     """
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -152,6 +201,108 @@ class ScrapedJob(db.Model):
     tag_location = db.Column(db.String(120))
     tag_jobtype = db.Column(db.String(120))
     tag_category = db.Column(db.String(120))
+    company = db.Column(db.String(255))
+    search_text = db.Column(db.Text)  # Built by fuzzy_search.build_search_document
+    fingerprint = db.Column(db.String(64))  # Hash of the listing card, see listing_fingerprint
+    last_seen = db.Column(db.DateTime)  # When the job was last seen in a scrape
+
+    __table_args__ = (
+        db.Index('ix_scraped_job_closing_date', 'closing_date'),
+        db.Index('uq_scraped_job_link', 'link', unique=True),
+    )
+
+class UserScrapedJob(db.Model):
+    """
+    Record of a user's scrape with one set of filters finding a catalog job ("who scraped/saw this, where").
+
+    A job listed under several filters (e.g. two locations) has a sighting for each, so tag filters find it
+    under all of them.
+
+    Attributes:
+        id (int): Primary key.
+        user_id (int): Foreign key to User.
+        job_id (int): Foreign key to ScrapedJob.
+        tag_location, tag_jobtype, tag_category (str): Filters of the scrape that found the job.
+        filter_key (str): The three tags joined by '|' (see job_catalog.sighting_key), never NULL, so it can
+            be part of the unique key.
+        first_seen (datetime): When a scrape by the user with these filters first found the job.
+        last_seen (datetime): When a scrape by the user with these filters last found the job.
+    """
+    __tablename__ = 'user_scraped_job'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('scraped_job.id'), nullable=False)
+    tag_location = db.Column(db.String(120))
+    tag_jobtype = db.Column(db.String(120))
+    tag_category = db.Column(db.String(120))
+    filter_key = db.Column(db.String(400), nullable=False, default='')
+    first_seen = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    last_seen = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    user = db.relationship('User', backref=db.backref('job_sightings', lazy=True))
+    job = db.relationship('ScrapedJob', backref=db.backref('sightings', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        # Also serves per-scrape lookups of a user's sightings under one set of filters
+        db.Index('uq_user_scraped_job_filters', 'user_id', 'filter_key', 'job_id', unique=True),
+        # Tag filters of job searches select the jobs sighted under the tags
+        db.Index('ix_user_scraped_job_tag_jobs', 'tag_jobtype', 'tag_location', 'tag_category', 'job_id'),
+    )
+
+class ScrapeTask(db.Model):
+    """
+    A requested scrape, queued until a scrape worker runs it.
+
+    Tasks are kept after they finish as a record of the scrape's outcome and duration. Users requesting the
+    same filters while a task is unfinished (or recently finished) follow it instead of scraping again.
+
+    Attributes:
+        id (int): Primary key.
+        scrape_id (str): Id of the scrape's event stream (see app.utils.scrape_broker).
+        user_id (int): Foreign key to the User the jobs are scraped for.
+        jobtype (str): Job type filter.
+        discipline (str): Discipline filter.
+        location (str): Location filter.
+        keyword (str): Keyword filter.
+        filter_key (str): Normalized filters, identifying identical requests (see scrape_queue.filter_key).
+        status (str): 'pending', 'running', 'done' or 'failed'.
+        progress (int): Number of jobs scraped so far.
+        error (str): Error message of a failed scrape.
+        created_at (datetime): When the scrape was requested.
+        started_at (datetime): When a worker started the scrape.
+        heartbeat_at (datetime): When the worker running the scrape last reported that it is still running.
+        finished_at (datetime): When the scrape finished.
+        duration (float): Seconds the scrape ran for.
+        user (User): Relationship to the user.
+        followers (list[User]): Other users who joined the scrape.
+    """
+    __tablename__ = 'scrape_task'
+    id = db.Column(db.Integer, primary_key=True)
+    scrape_id = db.Column(db.String(32), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    jobtype = db.Column(db.String(50), nullable=False)
+    discipline = db.Column(db.String(100))
+    location = db.Column(db.String(100))
+    keyword = db.Column(db.String(200))
+    filter_key = db.Column(db.String(500))
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # Running tasks without a recent heartbeat were abandoned
+    finished_at = db.Column(db.DateTime)
+    duration = db.Column(db.Float)
+
+    user = db.relationship('User', backref=db.backref('scrape_tasks', lazy='dynamic'))
+    followers = db.relationship('User', secondary=scrape_task_followers,
+                                backref=db.backref('followed_scrape_tasks', lazy='dynamic'))
+
+    # Workers claim the oldest pending task; requests look for an identical unfinished or fresh one
+    __table_args__ = (
+        db.Index('ix_scrape_task_status_created', 'status', 'created_at'),
+        db.Index('ix_scrape_task_filter_key', 'filter_key', 'status', 'finished_at'),
+    )
 
 class ResumeAnalysis(db.Model):
     """
@@ -166,6 +317,9 @@ class ResumeAnalysis(db.Model):
         raw_text (str): Extracted text from the resume.
         keywords (str): JSON stringified list of extracted keywords.
         suggested_jobs (str): JSON stringified list of suggested job IDs.
+        content_hash (str): SHA-256 hex digest of the file's bytes, identifying re-uploads of the same file.
+        status (str): 'pending', 'processing', 'done' or 'failed' (analyses run in the background).
+        error (str): Why the analysis failed, if it did.
     """
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -175,6 +329,38 @@ class ResumeAnalysis(db.Model):
     raw_text = db.Column(db.Text)
     keywords = db.Column(db.Text)  # JSON stringified list of extracted keywords
     suggested_jobs = db.Column(db.Text)  # JSON stringified list of job IDs
+    content_hash = db.Column(db.String(64))
+    status = db.Column(db.String(20), default='done')  # Rows from before background analysis are NULL: done
+    error = db.Column(db.Text)
+
+    # Finds an earlier analysis of the same file content
+    __table_args__ = (
+        db.Index('ix_resume_analysis_content_hash', 'content_hash'),
+    )
+
+class KeywordExtraction(db.Model):
+    """
+    Cached model response: the job titles suggested for a resume text (see app.utils.keyword_service).
+
+    Attributes:
+        id (int): Primary key.
+        model (str): The language model that answered.
+        prompt_version (int): Version of the prompt the answer was given to.
+        text_hash (str): SHA-256 hex digest of the resume text.
+        keywords (str): JSON stringified list of the suggested job titles.
+        created_at (datetime): When the response was cached.
+    """
+    __tablename__ = 'keyword_extraction'
+    id = db.Column(db.Integer, primary_key=True)
+    model = db.Column(db.String(100), nullable=False)
+    prompt_version = db.Column(db.Integer, nullable=False)
+    text_hash = db.Column(db.String(64), nullable=False)
+    keywords = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('uq_keyword_extraction_key', 'model', 'prompt_version', 'text_hash', unique=True),
+    )
 
 class FriendRequest(db.Model):
     """
@@ -226,6 +412,11 @@ class Notification(db.Model):
     # Relationship to the user
     user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic'))
 
+    # Supports the newest-first keyset pagination of a user's notifications
+    __table_args__ = (
+        db.Index('ix_notification_user_created', 'user_id', 'created_at', 'id'),
+    )
+
 # --- Flask-Login user loader ---
 # This function must be registered with the LoginManager instance in your app factory (see __init__.py)
 # It tells Flask-Login how to load a user from a user ID stored in the session.
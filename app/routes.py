@@ -5,18 +5,17 @@ All routes are registered under the 'main_bp' Blueprint.
 
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 from app.models import db, User, JobApplication, FriendRequest, Notification
-from app.models import ScrapedJob, application_shares
-from collections import Counter
+from app.models import ScrapedJob, ScrapeTask, ResumeAnalysis, application_shares
 import json
 from app.utils.scraper_GC_jobs_detailed import get_jobs_full, save_jobs_to_db
-from sqlalchemy import or_, asc
+from sqlalchemy import or_, asc, select
 from sqlalchemy import text
-import threading
-import queue
-import time
-from app.utils.fuzzy_search import job_matches
-from app.utils import resume_processor
-import string
+from app.utils import application_stats, resume_processor
+from app.utils import search_index
+from app.utils.scrape_broker import get_scrape_broker, format_event, parse_last_event_id
+from app.utils.scrape_broker import get_notification_broker, notification_channel
+from app.utils.scrape_queue import submit_scrape
+from app.utils.pagination import encode_cursor, decode_cursor
 from datetime import datetime, timedelta, timezone
 import pytz
 import re
@@ -75,14 +74,86 @@ def create_notification(user_id, content, link=None, notification_type="general"
     )
     db.session.add(notification)
     db.session.commit()
+    publish_unread_count(user_id, notification)
     return notification
 
+def publish_unread_count(user_id, notification=None):
+    """Push a user's unread notification count (and a new notification) to their live notification streams.
+    Args:
+        user_id (int): The user's ID.
+        notification (Notification, optional): A notification that was just created.
+    """
+    event = {
+        "type": "notification",
+        "unread_count": Notification.query.filter_by(user_id=user_id, is_read=False).count(),
+    }
+    if notification is not None:
+        event["notification"] = {
+            "id": notification.id,
+            "content": notification.content,
+            "link": notification.link,
+            "type": notification.type,
+            "created_at": notification.created_at.isoformat() + 'Z',
+        }
+    get_notification_broker().publish(notification_channel(user_id), event)
+
 # =============================================================================
 # Global Variables for Scraping (for testing/demo purposes)
 # =============================================================================
-live_job_queue = queue.Queue()  # Queue for streaming scraped jobs to clients
 SCRAPE_SIZE = 1    # Number of pages to scrape per request
 
+def parse_closing_in(closing_in, now):
+    """Parse a listing's 'Closing in ...' text into normalized text and an absolute closing date.
+    Args:
+        closing_in (str): Text like 'Closing in 3 days', 'Closing in a month' or 'Closing in an hour'.
+        now (datetime): The current time (Perth time).
+    Returns:
+        tuple: (closing_in, closing_date) with the normalized text and the closing date, or
+        the original text and None if it could not be parsed.
+    """
+    closing_in = closing_in or ""
+    closing_date = None
+    if closing_in:
+        txt = closing_in.lower()
+        d_m = re.search(r"(\d+)\s*days?",  txt)
+        m_m = re.search(r"(\d+)\s*months?", txt)
+        h_m = re.search(r"(\d+)\s*hours?",  txt)
+        if "an hour" in txt or h_m:
+            closing_date = now            # today
+            hours = int(h_m.group(1)) if h_m else 1
+            closing_in  = f"Closing in {hours} hour{'s' if hours>1 else ''}"
+        elif "a day" in txt or d_m:
+            days = 1 if "a day" in txt else int(d_m.group(1))
+            closing_date = now + timedelta(days=days)
+            closing_in  = f"Closing in {days} day{'s' if days>1 else ''}"
+        elif "a month" in txt or m_m:
+            months = 1 if "a month" in txt else int(m_m.group(1))
+            closing_date = now + timedelta(days=30*months)
+            closing_in  = f"Closing in {months} month{'s' if months>1 else ''}"
+        # else: leave closing_date = None
+    return closing_in, closing_date
+
+def closing_in_from_date(closing_date, now):
+    """Rebuild the 'Closing in ...' text of a stored job from its closing date.
+    Args:
+        closing_date (datetime): The stored closing date (Perth time, naive or aware).
+        now (datetime): The current time (Perth time).
+    Returns:
+        str | None: Text in the format produced by parse_closing_in, or None if the job has closed.
+    """
+    if closing_date.tzinfo is None:
+        now = now.replace(tzinfo=None)
+    remaining = closing_date - now
+    if remaining.total_seconds() <= 0:
+        return None
+    if remaining.days >= 30:
+        months = remaining.days // 30
+        return f"Closing in {months} month{'s' if months>1 else ''}"
+    if remaining.days >= 1:
+        return f"Closing in {remaining.days} day{'s' if remaining.days>1 else ''}"
+    hours = max(1, remaining.seconds // 3600)
+    return f"Closing in {hours} hour{'s' if hours>1 else ''}"
+
 # =============================================================================
 # Background Scraper Thread
 # =============================================================================
@@ -93,8 +164,9 @@ def background_scraper(
     discipline: str | None = None,
     location: str | None = None,
     keyword: str | None = None,
+    scrape_id: str | None = None,
 ) -> None:
-    """Run GradConnection scraping in a detached thread and stream results.
+    """Run GradConnection scraping (in a scrape worker thread) and stream results to the scrape's channel.
     All DB and Flask-config access happens inside an app-context so current_app, db, etc. are safe to use.
     Args:
         app: Flask app instance.
@@ -103,6 +175,10 @@ def background_scraper(
         discipline (str, optional): Discipline filter.
         location (str, optional): Location filter.
         keyword (str, optional): Keyword filter.
+        scrape_id (str, optional): Scrape broker channel that jobs are published to; its ScrapeTask's
+            progress is updated as jobs are saved.
+    Raises:
+        Exception: Any error that stopped the scrape (after rolling back and closing the stream).
     """
     # IMPORTANT: do **not** touch current_app before we open the context
     with app.app_context():
@@ -110,9 +186,76 @@ def background_scraper(
         if debug:
             print(f"[SCRAPER] starting: user={user_id} jobtype={jobtype} "
                   f"discipline={discipline} location={location} keyword={keyword}")
-        from app.utils.scraper_GC_jobs_detailed import get_jobs_full
-        from app.models import ScrapedJob   # local import – ctx is active
+        from app.utils.scraper_GC_jobs_detailed import get_jobs_full, job_columns
+        from app.utils.job_catalog import save_catalog_batch, remove_stale_sightings, sighting_key
+        from app.models import ScrapedJob, ScrapeTask, UserScrapedJob   # local import – ctx is active
+        broker = get_scrape_broker()
         try:
+            tags = {"tag_jobtype": jobtype, "tag_location": location, "tag_category": discipline}
+            # Catalog jobs listed under these filters (by anyone's scrape)
+            listed = select(UserScrapedJob.job_id).where(UserScrapedJob.filter_key == sighting_key(tags))
+            existing = {row.link: row for row in ScrapedJob.query.filter(ScrapedJob.id.in_(listed))}
+            # Incremental mode: jobs whose listing is unchanged are not visited again
+            known = None
+            if current_app.config.get('SCRAPER_INCREMENTAL', True):
+                known = {link: row.fingerprint for link, row in existing.items() if row.fingerprint}
+
+            perth_tz   = pytz.timezone("Australia/Perth")
+            batch_size = current_app.config.get('SCRAPER_COMMIT_BATCH', 50)
+            pending    = []     # catalog column values awaiting the next commit
+            seen_links = set()
+
+            def flush():
+                """Write pending jobs to the job catalog in one transaction (bulk inserting new jobs)."""
+                save_catalog_batch(pending, user_id, datetime.now(timezone.utc),
+                                   source="GradConnection", tags=tags)
+                if scrape_id:
+                    ScrapeTask.query.filter_by(scrape_id=scrape_id).update({"progress": len(seen_links)})
+                db.session.commit()
+                search_index.mark_jobs_changed()
+                if debug:
+                    print(f"[SCRAPER] committed {len(pending)} jobs")
+                pending.clear()
+
+            def on_job(job):
+                """Stream a scraped job to SSE clients right away and queue it for the next batch."""
+                link = job.get("link")
+                row  = existing.get(link)
+                now  = datetime.now(perth_tz)
+                if job.get("unchanged"):
+                    if row is None:
+                        return
+                    # --- Only the countdown moves on for an unchanged job ---
+                    closing_in = closing_in_from_date(row.closing_date, now) if row.closing_date else None
+                    values = {"closing_in": closing_in or row.closing_in, "unchanged": True}
+                    shown  = {column: getattr(row, column) for column in
+                              ("title", "company", "posted_date", "ai_summary", "closing_date")}
+                    shown.update(values, link=link)
+                else:
+                    # --- Parse and normalize closing date information ---
+                    closing_in, closing_date = parse_closing_in(job.get("closing_in"), now)
+                    values = dict(job_columns(job), closing_in=closing_in, closing_date=closing_date)
+                    shown  = values
+                values.update(link=link, last_seen=datetime.now(timezone.utc))
+                seen_links.add(link)
+                broker.publish(scrape_id, {
+                    "title"       : shown["title"],
+                    "company"     : shown["company"],
+                    "posted_date" : shown["posted_date"],
+                    "closing_in"  : shown["closing_in"],
+                    "closing_date": shown["closing_date"].strftime("%d %b %Y") if shown["closing_date"] else None,
+                    "ai_summary"  : shown["ai_summary"],
+                    "link"        : link,
+                    "tag_location": location,
+                    "tag_jobtype" : jobtype,
+                    "tag_category": discipline,
+                })
+                if debug:
+                    print(f"[SCRAPER] ({len(seen_links)}) queued: {shown['title']}")
+                pending.append(values)
+                if len(pending) >= batch_size:
+                    flush()
+
             jobs = get_jobs_full(
                 jobtype=jobtype,
                 discipline=discipline,
@@ -120,138 +263,30 @@ def background_scraper(
                 keyword=keyword,
                 max_pages=SCRAPE_SIZE,
                 headless=current_app.config.get('HEADLESS_TOGGLE', False),
+                workers=current_app.config.get('SCRAPER_WORKERS', 4),
+                backend=current_app.config.get('SCRAPER_BACKEND', 'selenium'),
+                known=known,
+                on_job=on_job,
             )
             if debug:
-                print(f"[SCRAPER] {len(jobs)} jobs scraped")
-            # Remove previous search results for this (user, filter) combo
-            ScrapedJob.query.filter_by(
-                user_id=user_id,
-                tag_jobtype=jobtype,
-                tag_location=location,
-                tag_category=discipline,
-            ).delete()
+                unchanged = sum(1 for job in jobs if job.get("unchanged"))
+                print(f"[SCRAPER] {len(jobs)} jobs scraped ({unchanged} unchanged)")
+            flush()
+            # Forget this user's previous results that are no longer listed
+            remove_stale_sightings(user_id, seen_links, tags=tags)
             db.session.commit()
-            perth_tz = pytz.timezone("Australia/Perth")
-            for idx, job in enumerate(jobs, 1):
-                # --- Parse and normalize closing date information ---
-                closing_in  = job.get("closing_in", "") or ""
-                closing_date = None
-                if closing_in:
-                    now = datetime.now(perth_tz)
-                    txt = closing_in.lower()
-                    d_m = re.search(r"(\d+)\s*days?",  txt)
-                    m_m = re.search(r"(\d+)\s*months?", txt)
-                    h_m = re.search(r"(\d+)\s*hours?",  txt)
-                    if "an hour" in txt or h_m:
-                        closing_date = now            # today
-                        hours = int(h_m.group(1)) if h_m else 1
-                        closing_in  = f"Closing in {hours} hour{'s' if hours>1 else ''}"
-                    elif "a day" in txt or d_m:
-                        days = 1 if "a day" in txt else int(d_m.group(1))
-                        closing_date = now + timedelta(days=days)
-                        closing_in  = f"Closing in {days} day{'s' if days>1 else ''}"
-                    elif "a month" in txt or m_m:
-                        months = 1 if "a month" in txt else int(m_m.group(1))
-                        closing_date = now + timedelta(days=30*months)
-                        closing_in  = f"Closing in {months} month{'s' if months>1 else ''}"
-                    # else: leave closing_date = None
-                # --- Insert scraped job into DB ---
-                scraped = ScrapedJob(
-                    user_id        = user_id,
-                    title          = job.get("title"),
-                    posted_date    = job.get("posted_date"),
-                    closing_in     = closing_in,
-                    closing_date   = closing_date,
-                    ai_summary     = job.get("ai_summary"),
-                    overview       = json.dumps(job.get("overview", [])),
-                    responsibilities= json.dumps(job.get("responsibilities", [])),
-                    requirements   = json.dumps(job.get("requirements", [])),
-                    skills_and_qualities = json.dumps(job.get("skills_and_qualities", [])),
-                    salary_info    = json.dumps(job.get("salary_info", [])),
-                    about_company  = json.dumps(job.get("about_company", [])),
-                    full_text      = job.get("full_text"),
-                    link           = job.get("link"),
-                    source         = "GradConnection",
-                    tag_location   = location,
-                    tag_jobtype    = jobtype,
-                    tag_category   = discipline,
-                )
-                db.session.add(scraped)
-                db.session.commit()
-                # --- Push job to SSE queue for live streaming ---
-                about = job.get("about_company", [])
-                live_job_queue.put({
-                    "title"       : scraped.title,
-                    "company"     : about[0] if about else "",
-                    "posted_date" : scraped.posted_date,
-                    "closing_in"  : scraped.closing_in,
-                    "closing_date": closing_date.strftime("%d %b %Y") if closing_date else None,
-                    "ai_summary"  : scraped.ai_summary,
-                    "link"        : scraped.link,
-                    "tag_location": location,
-                    "tag_jobtype" : jobtype,
-                    "tag_category": discipline,
-                })
-                if debug:
-                    print(f"[SCRAPER] ({idx}/{len(jobs)}) queued: {scraped.title}")
-                time.sleep(0.1)   # Polite pause for the stream
         except Exception as exc:
             db.session.rollback()
             if debug:
                 print("[SCRAPER] ERROR:", exc)
-            import traceback; traceback.print_exc()
+            raise   # recorded on the task by the scrape worker
         finally:
+            # Also covers a rollback part-way through the scrape
+            search_index.mark_jobs_changed()
             # Signal completion to SSE clients
-            live_job_queue.put({"status": "complete"})
+            broker.close(scrape_id)
             if debug:
-                print("[SCRAPER] finished – sentinel queued")
-# =============================================================================
-# Job Matching Utility
-# =============================================================================
-def job_matches(job, search, location, job_type, category, confidence=0.35):
-    """Check if a job matches the search criteria using basic and tag-based filtering.
-    Args:
-        job (ScrapedJob): The job object to check.
-        search (str): Search term for title/full text.
-        location (str): Location filter.
-        job_type (str): Job type filter.
-        category (str): Category filter.
-        confidence (float): (Unused) Confidence threshold for fuzzy matching.
-    Returns:
-        bool: True if job matches all filters, False otherwise.
-    """
-    if not job:
-        return False
-    # If no filters are applied, return all jobs
-    if not any([search, location, job_type, category]):
-        return True
-    # Convert all search terms to lowercase for case-insensitive matching
-    search = search.lower()
-    location = location.lower()
-    job_type = job_type.lower()
-    category = category.lower()
-    # Basic text search in title and full text
-    basic_match = (
-        (not search or 
-         search in job.title.lower() or 
-         (job.full_text and search in job.full_text.lower())
-        )
-    )
-    # Tag-based filtering
-    location_match = (
-        not location or 
-        (job.tag_location and location in job.tag_location.lower())
-    )
-    job_type_match = (
-        not job_type or 
-        (job.tag_jobtype and job_type in job.tag_jobtype.lower())
-    )
-    category_match = (
-        not category or 
-        (job.tag_category and category in job.tag_category.lower())
-    )
-    return basic_match and location_match and job_type_match and category_match
-
+                print(f"[SCRAPER] finished – scrape {scrape_id} closed")
 # =============================================================================
 # Blueprint Registration
 # =============================================================================
@@ -286,8 +321,6 @@ def signup():
         db.session.add(new_user)
         db.session.commit()
         login_user(new_user)
-        session['email'] = new_user.email
-        session['name'] = new_user.name
         return redirect(url_for("main.dashboard"))
     return render_template("index.html", error="All fields are required.")
 
@@ -308,8 +341,6 @@ def signin():
         # Check the password hash
         if user and check_password_hash(user.password, password):
             login_user(user)
-            session['email'] = user.email
-            session['name'] = user.name
             return redirect(url_for("main.dashboard"))
         else:
             return render_template("index.html", error="Invalid Email or Password.")
@@ -323,16 +354,11 @@ def signin():
 def dashboard():
     """Render the user dashboard with application stats, achievements, and job suggestions."""
     user = current_user
-    applications = JobApplication.query.filter_by(user=user).all()
+    # Precomputed counts (see application_stats), rather than every application
+    stats = application_stats.summary(user.id)
     all_statuses = ["Saved", "Applied", "Screen", "Interviewing", "Offer", "Accepted", "Archived", "Discontinued"]
-    status_counts_dict = {status: 0 for status in all_statuses}
-    last_applied_raw = None
-    for app in applications:
-        if app.status in status_counts_dict:
-            status_counts_dict[app.status] += 1
-        if app.date_applied and (not last_applied_raw or app.date_applied > last_applied_raw):
-            last_applied_raw = app.date_applied
-    last_applied = last_applied_raw.strftime("%Y-%m-%d") if last_applied_raw else "N/A"
+    status_counts_dict = {status: stats["status_counts"].get(status, 0) for status in all_statuses}
+    last_applied = stats["last_applied"].strftime("%Y-%m-%d") if stats["last_applied"] else "N/A"
     status_labels = [status for status, count in status_counts_dict.items() if count > 0]
     status_counts = [count for status, count in status_counts_dict.items() if count > 0]
     status_summary = list(zip(status_labels, status_counts))
@@ -341,8 +367,8 @@ def dashboard():
     interviewing = status_counts_dict["Interviewing"]
     offers = status_counts_dict["Offer"]
     in_progress = sum(status_counts_dict[s] for s in all_statuses if s not in ["Accepted", "Archived", "Discontinued"])
-    active_applications = [app for app in applications if app.status not in {"Accepted", "Archived", "Discontinued"}]
-    active_count = len(active_applications)
+    active_count = sum(count for status, count in stats["status_counts"].items()
+                       if status not in {"Accepted", "Archived", "Discontinued"})
     # --- Achievements logic ---
     achievements = []
     if applied >= 1:
@@ -372,29 +398,27 @@ def dashboard():
     badges_earned = len(achievements)
     # --- Sneak Peek Data: random jobs and soonest closing jobs ---
     random_jobs = ScrapedJob.query.order_by(db.func.random()).limit(3).all()
-    total_apps = len(applications)
+    total_apps = stats["total"]
     success_rate = round((offers / total_apps) * 100, 1) if total_apps else 0
     friends = user.friends.all()
     all_users = [user] + friends
+    apps_counts = application_stats.application_totals([u.id for u in all_users])
     leaderboard = sorted(
-        [{'name': u.name, 'apps_count': len(u.job_applications)} for u in all_users],
+        [{'name': u.name, 'apps_count': apps_counts[u.id]} for u in all_users],
         key=lambda x: x['apps_count'],
         reverse=True
     )[:3]
-    # Retrieve suggested_jobs from session for the sneak peek
-    suggested_jobs = session.get('suggested_jobs', [])
+    # The best few jobs suggested for the user's resume, for the sneak peek
+    analysis = current_resume_analysis()
+    suggested_jobs = resume_processor.resume_suggestions(resume_suggested_ids(analysis)[:5]) if analysis else []
     if not suggested_jobs:
         # Query the 5 soonest closing jobs (with a closing_date)
         soonest_jobs = ScrapedJob.query.filter(ScrapedJob.closing_date != None).order_by(asc(ScrapedJob.closing_date)).limit(5).all()
         suggested_jobs = []
         for job in soonest_jobs:
-            try:
-                about = json.loads(job.about_company) if job.about_company else []
-            except Exception:
-                about = []
             suggested_jobs.append({
                 'title': job.title,
-                'company': about[0] if about else '',
+                'company': job.company or '',
                 'closing_in': job.closing_in,
                 'closing_date': job.closing_date.strftime('%Y-%m-%d') if job.closing_date else '',
                 'link': job.link,
@@ -436,71 +460,55 @@ def logout():
 @login_required  # Require login for job search
 def job_search():
     user = current_user
-    scraped_jobs = ScrapedJob.query.all()
-    for job in scraped_jobs:
-        try:
-            job.about_company_parsed = json.loads(job.about_company) if job.about_company else None
-        except Exception:
-            job.about_company_parsed = None
-        job.company = job.about_company_parsed[0] if job.about_company_parsed and len(job.about_company_parsed) > 0 else ""
-    resume_keywords = session.pop('resume_keywords', [])
-    suggested_jobs = session.pop('suggested_jobs', [])
-    return render_template("jobSearch.html", active_page="job-search", scraped_jobs=scraped_jobs, resume_keywords=resume_keywords, suggested_jobs=suggested_jobs)
+    # Scraped jobs are loaded by the page via /api/scraped-jobs
+    # The latest resume analysis; the page polls /api/resume-analysis/<id> while it is still running and
+    # loads its suggested jobs from /api/resume-analysis/<id>/suggestions
+    analysis = current_resume_analysis()
+    resume = resume_analysis_json(analysis) if analysis else None
+    return render_template("jobSearch.html", active_page="job-search", resume_analysis=resume,
+                           resume_keywords=resume["keywords"] if resume else [])
+
+# Date ranges (in days) the analytics trends can cover, with the bucket size and label format of each
+ANALYTICS_RANGES = {
+    7: ("day", "%a"),
+    30: ("day", "%d %b"),
+    90: ("week", "%d %b"),
+    365: ("month", "%b %Y"),
+}
 
 @main_bp.route("/analytics")
 @login_required  # Require login for analytics
 def analytics():
     user = current_user
-    # --- grab all of this user's applications ----------------------------
-    applications = JobApplication.query.filter_by(user=user).all()
-    total_apps   = len(applications)
+    # --- this user's precomputed application counts (see application_stats)
+    stats        = application_stats.summary(user.id)
+    status_counts = stats["status_counts"]
+    type_counts  = stats["type_counts"]
+    total_apps   = stats["total"]
     # quick counters -------------------------------------------------------
-    interviews  = sum(a.status == "Interviewing" for a in applications)
-    offers      = sum(a.status == "Offer"         for a in applications)
-    rejections  = sum(a.status in ("Archived", "Discontinued") for a in applications)
+    interviews  = status_counts.get("Interviewing", 0)
+    offers      = status_counts.get("Offer", 0)
+    rejections  = status_counts.get("Archived", 0) + status_counts.get("Discontinued", 0)
     # avg response time (days) -------------------------------------------
-    responded = [
-        a for a in applications
-        if a.status in ("Offer", "Accepted", "Archived", "Discontinued")
-        and a.date_applied and a.closing_date
-    ]
-    avg_resp_days = (
-        round(sum((a.closing_date - a.date_applied).days for a in responded) /
-              len(responded), 1)
-        if responded else None
-    )
+    avg_resp_days = stats["avg_response"]
     success_rate = round((offers / total_apps) * 100, 1) if total_apps else 0
-    # status / type distributions ----------------------------------------
-    status_counts, type_counts = {}, {}
-    for a in applications:
-        status_counts[a.status] = status_counts.get(a.status, 0) + 1
-        t = a.job_type or "Unknown"
-        type_counts[t] = type_counts.get(t, 0) + 1
-    # weekly snapshot (last 7 days) --------------------------------------
+    # weekly snapshot (last 7 days) and trends over the chosen range -----
+    # (summed per day, week or month by the database, in Perth days)
+    range_days = request.args.get("range", 7, type=int)
+    if range_days not in ANALYTICS_RANGES:
+        range_days = 7
+    bucket, label_format = ANALYTICS_RANGES[range_days]
     today = datetime.now(pytz.timezone("Australia/Perth")).date()
-    weekly_labels, weekly_apps, weekly_int, weekly_off = [], [], [], []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        weekly_labels.append(day.strftime("%a"))
-        weekly_apps.append(sum(a.date_applied
-                               and a.date_applied.date() == day
-                               for a in applications))
-        weekly_int.append(sum(a.status == "Interviewing"
-                              and a.date_applied
-                              and a.date_applied.date() == day
-                              for a in applications))
-        weekly_off.append(sum(a.status == "Offer"
-                              and a.date_applied
-                              and a.date_applied.date() == day
-                              for a in applications))
-    # cumulative applications over calendar time -------------------------
-    by_day = Counter(a.date_applied.date()
-                     for a in applications if a.date_applied)
-    cum_labels, cum_counts, running = [], [], 0
-    for d in sorted(by_day):
-        running += by_day[d]
-        cum_labels.append(d.strftime("%d %b"))
-        cum_counts.append(running)
+    weekly = application_stats.activity_series(user.id, today - timedelta(days=6), today)
+    weekly_labels = [point["start"].strftime("%a") for point in weekly]
+    weekly_apps   = [point["applications"] for point in weekly]
+    weekly_int    = [point["interviews"] for point in weekly]
+    weekly_off    = [point["offers"] for point in weekly]
+    trend = weekly if range_days == 7 else application_stats.activity_series(
+        user.id, today - timedelta(days=range_days - 1), today, bucket)
+    # cumulative applications over the range ------------------------------
+    cum_labels = [point["start"].strftime(label_format) for point in trend]
+    cum_counts = [point["cumulative"] for point in trend]
     # --------------------------------------------------------------------
     return render_template(
         "analytics.html",
@@ -516,6 +524,13 @@ def analytics():
         weekly_apps   = weekly_apps,
         weekly_int    = weekly_int,
         weekly_off    = weekly_off,
+        # trends over the chosen range
+        range_days    = range_days,
+        range_options = list(ANALYTICS_RANGES),
+        trend_labels  = [point["start"].strftime(label_format) for point in trend],
+        trend_apps    = [point["applications"] for point in trend],
+        trend_int     = [point["interviews"] for point in trend],
+        trend_off     = [point["offers"] for point in trend],
         # outcomes / breakdowns
         outcome_labels = ["Offers", "Rejections"],
         outcome_counts = [offers, rejections],
@@ -584,54 +599,115 @@ def comms():
         app_statuses=app_statuses
     )
 @main_bp.route("/upload", methods=["POST"])
+@login_required
 def upload():
     f = request.files.get("resume")
     if f and f.filename:
         if current_app.config.get('DEBUG', False):
-            print("[DEBUG] Processing uploaded resume with AI")
-        filename = f.filename
+            print("[DEBUG] Queueing uploaded resume for AI analysis")
         content_type = f.content_type or f.mimetype or ''
-        file_bytes = f.read()
-        text = resume_processor.extract_text(file_bytes, content_type)
-        # Get AI-suggested job titles (keywords)
-        job_titles = resume_processor.extract_keywords_openai(text)
-        job_titles = [kw.strip().strip(string.punctuation) for kw in job_titles if kw.strip()]
-        if current_app.config.get('DEBUG', False):
-            print("[DEBUG] Extracted keywords:", job_titles)
-        # Find up to 5 jobs that fuzzy match any keyword
-        from app.models import ScrapedJob
-        import json
-        all_jobs = ScrapedJob.query.all()
-        if current_app.config.get('DEBUG', False):
-            print("[DEBUG] Number of jobs in DB:", len(all_jobs))
-        suggestions = []
-        for job in all_jobs:
-            for keyword in job_titles:
-                if job_matches(job, search=keyword, location='', job_type='', category='', confidence=0.35):
-                    print("[DEBUG] Found job that matches keyword:", job.title)
-                    try:
-                        about = json.loads(job.about_company) if job.about_company else []
-                    except Exception:
-                        about = []
-                    suggestions.append({
-                        'title': job.title,
-                        'company': about[0] if about else '',
-                        'posted_date': job.posted_date,
-                        'closing_in': job.closing_in,
-                        'link': job.link,
-                    })
-                    break  # Only add each job once
-            if len(suggestions) >= 20:
-                break
-        session['resume_keywords'] = job_titles
-        session['suggested_jobs'] = suggestions
+        # Copied to a temporary file in chunks rather than read into memory; the analysis deletes it
+        try:
+            path, digest = resume_processor.spool_upload(f.stream, current_app.config.get('RESUME_MAX_BYTES'))
+        except resume_processor.ResumeTooLarge:
+            flash('That resume is too large to analyse. Please upload a smaller file.', 'error')
+            return redirect(url_for('main.job_search'))
+        # Parsing, the model call and job matching run in the background; the job search page polls the result
+        analysis = ResumeAnalysis(
+            user_id=current_user.id,
+            filename=f.filename,
+            content_type=content_type,
+            content_hash=digest,
+            status="pending",
+        )
+        db.session.add(analysis)
+        db.session.commit()
+        session['resume_analysis_id'] = analysis.id
+        resume_processor.submit_resume_analysis(analysis.id, path, content_type)
         return redirect(url_for('main.job_search'))
     # If no file, clear session and redirect
-    session['resume_keywords'] = []
-    session['suggested_jobs'] = []
+    session.pop('resume_analysis_id', None)
     return redirect(url_for('main.job_search'))
 
 
+def current_resume_analysis():
+    """
+    The resume analysis to show the signed-in user: the one uploaded this session (the session only holds
+    its id), or else their latest upload, so results survive signing out and in again.
+    """
+    analysis_id = session.get('resume_analysis_id')
+    analysis = db.session.get(ResumeAnalysis, analysis_id) if analysis_id else None
+    if analysis is None or analysis.user_id != current_user.id:
+        analysis = ResumeAnalysis.query.filter_by(user_id=current_user.id)\
+            .order_by(ResumeAnalysis.id.desc()).first()
+    return analysis
+
+
+def resume_suggested_ids(analysis):
+    """The ids of an analysis' suggested jobs, best first (none until the analysis is done)."""
+    if (analysis.status or "done") != "done" or not analysis.suggested_jobs:
+        return []
+    return json.loads(analysis.suggested_jobs)
+
+
+def resume_analysis_json(analysis):
+    """Serialize a resume analysis with its keywords and the number of suggested jobs (once it is done)."""
+    status = analysis.status or "done"
+    return {
+        "id": analysis.id,
+        "filename": analysis.filename,
+        "status": status,
+        "error": analysis.error,
+        "keywords": json.loads(analysis.keywords) if status == "done" and analysis.keywords else [],
+        "suggestion_count": len(resume_suggested_ids(analysis)),
+    }
+
+
+def owned_resume_analysis(analysis_id):
+    """Load one of the signed-in user's resume analyses, or None if it is not theirs."""
+    analysis = db.session.get(ResumeAnalysis, analysis_id)
+    if analysis is None or analysis.user_id != current_user.id:
+        return None
+    return analysis
+
+
+# ------------------------------------------------------------------ #
+#  RESUME ANALYSIS STATUS  ➜  /api/resume-analysis/<id>
+# ------------------------------------------------------------------ #
+@main_bp.route("/api/resume-analysis/<int:analysis_id>")
+@login_required
+def api_resume_analysis(analysis_id):
+    """Report the status of an uploaded resume's analysis, with its keywords once done."""
+    analysis = owned_resume_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": "Resume analysis not found"}), 404
+    return jsonify(resume_analysis_json(analysis))
+
+
+# ------------------------------------------------------------------ #
+#  RESUME SUGGESTIONS  ➜  /api/resume-analysis/<id>/suggestions
+# ------------------------------------------------------------------ #
+@main_bp.route("/api/resume-analysis/<int:analysis_id>/suggestions")
+@login_required
+def api_resume_suggestions(analysis_id):
+    """Serve a page of the jobs suggested for an uploaded resume, best first."""
+    analysis = owned_resume_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": "Resume analysis not found"}), 404
+    try:
+        offset = max(0, int(request.args.get("offset", 0)))
+        limit = min(50, max(1, int(request.args.get("limit", 10))))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    job_ids = resume_suggested_ids(analysis)
+    page = job_ids[offset:offset + limit]
+    return jsonify({
+        "suggested_jobs": resume_processor.resume_suggestions(page),
+        "total": len(job_ids),
+        "next_offset": offset + limit if offset + limit < len(job_ids) else None,
+    })
+
+
 # ------------------------------------------------------------------ #
 #  SCRAPED-JOBS JSON  ➜  /api/scraped-jobs
 # ------------------------------------------------------------------ #
@@ -647,34 +723,26 @@ def api_scraped_jobs():
         category  = request.args.get("category",  "").strip().lower()
         offset    = int(request.args.get("offset", 0))
         limit     = int(request.args.get("limit", 10))
+        cursor    = request.args.get("cursor") or None
 
         if current_app.config.get('DEBUG', False):
             print(f"[ARGS] search='{search}' location='{location}' "
-                  f"type='{job_type}' category='{category}' offset={offset} limit={limit}")
-
-        # ── DB query & Python filtering  ───────────────────────────────
-        jobs = ScrapedJob.query.all()
-        if current_app.config.get('DEBUG', False):
-            print(f"[DB] fetched {len(jobs)} rows from scraped_job")
+                  f"type='{job_type}' category='{category}' offset={offset} limit={limit} "
+                  f"cursor={cursor}")
 
-        filtered  = [j for j in jobs if job_matches(j, search, location,
-                                                    job_type, category)]
-        total     = len(filtered)
-        paginated = filtered[offset: offset + limit]
+        # ── ranked full-text search, filtering & paging in the DB  ────
+        try:
+            paginated, total, next_cursor = search_index.search_jobs(
+                search, location, job_type, category, offset, limit, cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
 
         if current_app.config.get('DEBUG', False):
-            print(f"[FILTER] {total} match filters, returning {len(paginated)} rows")
+            print(f"[FILTER] total={total}, returning {len(paginated)} rows")
 
         # ── serialise results  ─────────────────────────────────────────
         result = []
-        for idx, job in enumerate(paginated, 1):
-            try:
-                about = json.loads(job.about_company) if job.about_company else []
-            except Exception as ex:
-                if current_app.config.get('DEBUG', False):
-                    print(f"[WARN] json.loads failed for job.id={job.id}: {ex}")
-                about = []
-
+        for idx, (job, score) in enumerate(paginated, 1):
             closing_date_str = (
                 job.closing_date.strftime("%d %b %Y")
                 if job.closing_date else None
@@ -682,12 +750,13 @@ def api_scraped_jobs():
 
             result.append({
                 "title":        job.title,
-                "company":      about[0] if about else "",
+                "company":      job.company or "",
                 "posted_date":  job.posted_date,
                 "closing_in":   job.closing_in,
                 "closing_date": closing_date_str,
                 "ai_summary":   job.ai_summary,
                 "link":         job.link,
+                "score":        score,
                 "tags": {
                     "location": job.tag_location or None,
                     "jobtype":  job.tag_jobtype or None,
@@ -698,7 +767,8 @@ def api_scraped_jobs():
                 print(f"[SERIALISE] #{idx}  job.id={job.id} title='{job.title}'")
 
         payload = {"jobs": result,
-                   "has_more": offset + limit < total,
+                   "has_more": next_cursor is not None,
+                   "next_cursor": next_cursor,
                    "total": total}
         if current_app.config.get('DEBUG', False):
             print("[RETURN] sending JSON payload")
@@ -712,6 +782,16 @@ def api_scraped_jobs():
         return jsonify({"error": str(e)}), 500
 
 
+# ------------------------------------------------------------------ #
+#  SEARCH CACHE STATS  ➜  /api/search-cache-stats
+# ------------------------------------------------------------------ #
+@main_bp.route("/api/search-cache-stats")
+@login_required
+def api_search_cache_stats():
+    """Report hit/miss counters of the job search result cache for monitoring."""
+    return jsonify(search_index.get_search_cache().stats())
+
+
 
 # ------------------------------------------------------------------ #
 #  START BACKGROUND SCRAPE  ➜  /api/start-scraping   (POST)
@@ -731,9 +811,10 @@ def api_start_scraping():
         if current_app.config.get('DEBUG', False):
             print(f"[JSON] {data}")
 
-        jobtype    = data.get("jobtype",    "internships")
-        discipline = data.get("discipline") or None
-        location   = data.get("location")   or None
+        # Tags are stored (and filtered on) as lowercase slugs
+        jobtype    = (data.get("jobtype") or "internships").lower()
+        discipline = (data.get("discipline") or "").lower() or None
+        location   = (data.get("location")   or "").lower() or None
         keyword    = data.get("keyword")    or None
         if current_app.config.get('DEBUG', False):
             print(f"[PARAMS] jobtype={jobtype} discipline={discipline} "
@@ -744,18 +825,14 @@ def api_start_scraping():
                 print("[RATE] hit limit – rejecting")
             return jsonify({"error": "Rate limit exceeded"}), 429
 
+        # Queued for the scrape worker pool, or shared with an identical unfinished/fresh scrape;
+        # only users who requested a scrape may watch it (anonymous scrapes are open to the id's holder)
+        task, outcome = submit_scrape(getattr(user, "id", 1), jobtype, discipline, location, keyword,
+                                      owner_id=user.id if user.is_authenticated else None)
         if current_app.config.get('DEBUG', False):
-            print("[THREAD] kicking off background_scraper() …")
-        app = current_app._get_current_object()
-        threading.Thread(
-            target=background_scraper,
-            args=(app, getattr(user, "id", 1), jobtype, discipline, location, keyword),
-            daemon=True
-        ).start()
-        if current_app.config.get('DEBUG', False):
-            print("[THREAD] started OK")
+            print(f"[QUEUE] {outcome} task {task.id} – scrape {task.scrape_id}")
             print("============================================================\n")
-        return "", 202
+        return jsonify({"scrape_id": task.scrape_id, "status": task.status, "shared": outcome}), 202
 
     except Exception as e:
         if current_app.config.get('DEBUG', False):
@@ -765,6 +842,34 @@ def api_start_scraping():
 
 
 
+# ------------------------------------------------------------------ #
+#  SCRAPE TASK STATUS  ➜  /api/scrape-tasks/<scrape_id>
+# ------------------------------------------------------------------ #
+@main_bp.route("/api/scrape-tasks/<scrape_id>")
+@login_required
+def api_scrape_task(scrape_id):
+    """Report the status, progress and duration of a scrape the user requested (or joined)."""
+    task = ScrapeTask.query.filter_by(scrape_id=scrape_id).first()
+    if task is None or (task.user_id != current_user.id and current_user not in task.followers):
+        return jsonify({"error": "Scrape not found"}), 404
+    # Position in the queue, for pending tasks
+    ahead = None
+    if task.status == "pending":
+        ahead = ScrapeTask.query.filter(ScrapeTask.status == "pending",
+                                        ScrapeTask.created_at < task.created_at).count()
+    return jsonify({
+        "scrape_id": task.scrape_id,
+        "status": task.status,
+        "progress": task.progress,
+        "error": task.error,
+        "queued_ahead": ahead,
+        "created_at": task.created_at.isoformat() + 'Z',
+        "started_at": task.started_at.isoformat() + 'Z' if task.started_at else None,
+        "finished_at": task.finished_at.isoformat() + 'Z' if task.finished_at else None,
+        "duration": task.duration,
+    })
+
+
 # ------------------------------------------------------------------ #
 #  SERVER-SENT EVENTS STREAM  ➜  /api/scraping-stream
 # ------------------------------------------------------------------ #
@@ -773,45 +878,53 @@ def api_scraping_stream():
     if current_app.config.get('DEBUG', False):
         print("\n=== [/api/scraping-stream] client connected ================")
 
+    # Subscribe to the scrape started by /api/start-scraping
+    scrape_id = request.args.get("scrape_id", "")
+    broker    = get_scrape_broker()
+    channel   = broker.get_channel(scrape_id)
+    if channel is None:
+        return jsonify({"error": "Unknown or expired scrape"}), 404
+    if not channel.allows(current_user.id if current_user.is_authenticated else None):
+        return jsonify({"error": "Unknown or expired scrape"}), 404
+    # Reconnecting clients resume after the last event they received
+    last_event_id = parse_last_event_id(request.headers.get("Last-Event-ID")
+                                        or request.args.get("last_event_id"))
+    subscription = broker.subscribe(scrape_id, last_event_id)
+
     def event_stream():
         if current_app.config.get('DEBUG', False):
-            print("[SSE] generator entered")
-        while True:
-            try:
-                job = live_job_queue.get(timeout=30)
+            print(f"[SSE] generator entered – scrape {scrape_id} after event {last_event_id}")
+        try:
+            while True:
+                item = subscription.get(timeout=30)
+                if item is None:
+                    if current_app.config.get('DEBUG', False):
+                        print("[SSE] no events – sending keep-alive ping")
+                    yield 'data: {"type":"ping"}\n\n'
+                    continue
+                event_id, job = item
                 if current_app.config.get('DEBUG', False):
-                    print(f"[SSE] dequeued → {job}")
-
-                if 'status' not in job:          # normal job payload
-                    job["tags"] = {
-                        "location": job.get("tag_location"),
-                        "jobtype":  job.get("tag_jobtype"),
-                        "category": job.get("tag_category"),
-                    }
+                    print(f"[SSE] received #{event_id} → {job}")
 
-                yield f"data: {json.dumps(job)}\n\n"
+                yield format_event(event_id, job)
 
                 if job.get("status") == "complete":
                     if current_app.config.get('DEBUG', False):
                         print("[SSE] scrape complete – closing stream")
                     break
 
-            except queue.Empty:
-                if current_app.config.get('DEBUG', False):
-                    print("[SSE] queue empty – sending keep-alive ping")
-                yield 'data: {"type":"ping"}\n\n'
+        except GeneratorExit:
+            # client disconnected
+            if current_app.config.get('DEBUG', False):
+                print("[SSE] client disconnected")
 
-            except GeneratorExit:
-                # client disconnected
-                if current_app.config.get('DEBUG', False):
-                    print("[SSE] client disconnected")
-                break
+        except Exception as ex:
+            if current_app.config.get('DEBUG', False):
+                print("[SSE] unexpected error:", ex)
+            import traceback; traceback.print_exc()
 
-            except Exception as ex:
-                if current_app.config.get('DEBUG', False):
-                    print("[SSE] unexpected error:", ex)
-                import traceback; traceback.print_exc()
-                break
+        finally:
+            subscription.close()
 
         if current_app.config.get('DEBUG', False):
             print("[SSE] generator exiting")
@@ -823,6 +936,16 @@ def api_scraping_stream():
     return response
 
 
+# ------------------------------------------------------------------ #
+#  SCRAPE STREAM STATS  ➜  /api/scraping-stream-stats
+# ------------------------------------------------------------------ #
+@main_bp.route("/api/scraping-stream-stats")
+@login_required
+def api_scraping_stream_stats():
+    """Report active scrape streams and published/dropped event counts for monitoring."""
+    return jsonify(get_scrape_broker().stats())
+
+
 
 @main_bp.route('/send-friend-request', methods=['POST'])
 @login_required
@@ -966,6 +1089,8 @@ def add_application():
                 user=current_user
             )
         db.session.add(application)
+        db.session.flush()
+        application_stats.record_added(application)
         db.session.commit()
         if debug:
             print("[DEBUG] Application saved successfully:", application)
@@ -1065,7 +1190,9 @@ def update_job_status():
     job = db.session.get(JobApplication, job_id)
     if not job:
         return jsonify({"error": "Job not found"}), 404
+    before = application_stats.snapshot(job)
     job.status = new_status
+    application_stats.record_changed(before, job)
     db.session.commit()
     return jsonify({"message": "Status updated"})
 
@@ -1097,14 +1224,34 @@ def notifications():
             unread_count = Notification.query.filter_by(user_id=user.id, is_read=False).count()
             return jsonify({'unread_count': unread_count})
         
-        # Get notifications with pagination
-        page = int(request.args.get('page', 1))
+        # Get notifications newest first, paged with a (created_at, id) keyset cursor
         per_page = int(request.args.get('per_page', 10))
-        
-        notifications = Notification.query\
-            .filter_by(user_id=user.id)\
-            .order_by(Notification.created_at.desc())\
-            .paginate(page=page, per_page=per_page)
+        cursor = request.args.get('cursor')
+        query = Notification.query.filter_by(user_id=user.id)
+        total = None
+        if cursor:
+            try:
+                last_created, last_id = decode_cursor(cursor, 2)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(or_(
+                Notification.created_at < last_created,
+                (Notification.created_at == last_created) & (Notification.id < last_id)
+            ))
+        else:
+            # Only the first page pays for a COUNT
+            total = query.count()
+        # Fetch one extra row to find out whether there is a next page
+        notifications = query\
+            .order_by(Notification.created_at.desc(), Notification.id.desc())\
+            .limit(per_page + 1)\
+            .all()
+        has_next = len(notifications) > per_page
+        notifications = notifications[:per_page]
+        next_cursor = None
+        if has_next:
+            last = notifications[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
         
         result = {
             'notifications': [{
@@ -1114,9 +1261,10 @@ def notifications():
                 'type': n.type,
                 'is_read': n.is_read,
                 'created_at': n.created_at.isoformat() + 'Z'  # Return ISO format with UTC timezone
-            } for n in notifications.items],
-            'has_next': notifications.has_next,
-            'total': notifications.total
+            } for n in notifications],
+            'has_next': has_next,
+            'next_cursor': next_cursor,
+            'total': total
         }
         
         return jsonify(result)
@@ -1139,6 +1287,7 @@ def notifications():
                 .update({Notification.is_read: True}, synchronize_session=False)
         
         db.session.commit()
+        publish_unread_count(user.id)
         return jsonify({'success': True})
 
 @main_bp.route("/delete-application/<int:job_id>", methods=["DELETE"])
@@ -1153,6 +1302,7 @@ def delete_application(job_id):
     if application.user_id != current_user.id:
         return jsonify({"error": "Not authorized"}), 403
     try:
+        application_stats.record_removed(application)
         db.session.delete(application)
         db.session.commit()
         return jsonify({"success": True})
@@ -1189,6 +1339,8 @@ def save_shared_application(app_id):
         )
         
         db.session.add(new_app)
+        db.session.flush()
+        application_stats.record_added(new_app)
         
         # Update the status in application_shares to 'archived'
         from sqlalchemy import text
@@ -1222,6 +1374,7 @@ def update_application(job_id):
     if application.user_id != user.id:
         return jsonify({"error": "Not authorized"}), 403
     try:
+        before = application_stats.snapshot(application)
         # Update fields
         application.title = request.form.get('title')
         application.company = request.form.get('company')
@@ -1234,6 +1387,7 @@ def update_application(job_id):
             application.closing_date = None
         new_status = request.form.get('status')
         application.status = new_status
+        application_stats.record_changed(before, application)
         db.session.commit()
         return jsonify({"success": True})
     except Exception as e:
@@ -1251,7 +1405,6 @@ def update_name():
     user.name = new_name
     try:
         db.session.commit()
-        session['name'] = new_name
         notification = Notification(
             user_id=user.id,
             content=f"Your name has been updated from {old_name} to {new_name}",
@@ -8,8 +8,10 @@
 
 // Global constants and state variables
 const PAGE_SIZE = 10;                    // Number of jobs to fetch per page
-let currentPage = 1;                     // Current page of job results
+let nextCursor = null;                   // Cursor for the next page of job results
 let hasMore = true;                      // Whether more results are available
+let isLoadingMore = false;               // Whether a next-page request is in flight
+let latestRequest = 0;                   // Id of the most recent job request (older responses are ignored)
 let jobs = [];                           // Cached job results
 let isScrapingActive = false;            // Flag for active scraping operation
 
@@ -377,8 +379,10 @@ document.addEventListener('DOMContentLoaded', function() {
    * @param {boolean} reset - Whether to reset cached jobs and pagination
    */
   function fetchJobs(reset = true) {
+    const requestId = ++latestRequest;
+    if (!reset) isLoadingMore = true;
     if (reset) {
-      currentPage = 1;
+      nextCursor = null;
       jobs = [];
       hasMore = true;
       jobsList.innerHTML = '<li class="text-gray-400">Loading...</li>';
@@ -390,9 +394,10 @@ document.addEventListener('DOMContentLoaded', function() {
       location: getFilterValue(locationSelect, 'Location'),
       type: getFilterValue(typeSelect, 'Opportunity Type'),
       category: getFilterValue(categorySelect, 'Category'),
-      offset: (currentPage - 1) * PAGE_SIZE,
       limit: PAGE_SIZE
     });
+    // Later pages continue from the cursor returned with the previous page
+    if (!reset && nextCursor) params.set('cursor', nextCursor);
     
     console.log('Fetching jobs with params:', params.toString());
     
@@ -403,38 +408,29 @@ document.addEventListener('DOMContentLoaded', function() {
         return res.json();
       })
       .then(data => {
+        // A newer search has started since this request was sent
+        if (requestId !== latestRequest) return;
         console.log('Received jobs data:', data);
         hasMore = data.has_more;
+        nextCursor = data.next_cursor;
         
+        // Jobs arrive already ordered by the server (relevance when searching,
+        // otherwise soonest closing date first), so pages are simply appended
         if (reset) {
           jobs = data.jobs.slice();
-          // Sort by closing date (soonest first)
-          jobs.sort((a, b) => {
-            const aDate = a.closing_date ? new Date(a.closing_date) : null;
-            const bDate = b.closing_date ? new Date(b.closing_date) : null;
-            if (aDate && bDate) return aDate - bDate;
-            if (aDate && !bDate) return -1;
-            if (!aDate && bDate) return 1;
-            return 0;
-          });
           renderJobs(jobs);
         } else {
           jobs = jobs.concat(data.jobs);
-          // Sort by closing date (soonest first)
-          jobs.sort((a, b) => {
-            const aDate = a.closing_date ? new Date(a.closing_date) : null;
-            const bDate = b.closing_date ? new Date(b.closing_date) : null;
-            if (aDate && bDate) return aDate - bDate;
-            if (aDate && !bDate) return -1;
-            if (!aDate && bDate) return 1;
-            return 0;
-          });
-          renderJobs(jobs);
+          renderJobs(data.jobs, true);
         }
       })
       .catch(error => {
+        if (requestId !== latestRequest) return;
         console.error('Error fetching jobs:', error);
         jobsList.innerHTML = '<li class="text-red-400">Failed to load jobs. Please try again.</li>';
+      })
+      .finally(() => {
+        if (!reset) isLoadingMore = false;
       });
   }
   
@@ -467,7 +463,19 @@ document.addEventListener('DOMContentLoaded', function() {
     })
       .then(res => {
         if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
-        console.log('Scraping started successfully');
+        return res.json();
+      })
+      .then(data => {
+        if (data.status === 'done') {
+          // Someone scraped these filters moments ago: show their results
+          console.log('Serving recent scrape results:', data.scrape_id);
+          scrapingLoader.classList.add('hidden');
+          isScrapingActive = false;
+          fetchJobs();
+          return;
+        }
+        console.log('Scraping started successfully:', data.scrape_id, data.shared);
+        openScrapeStream(data.scrape_id);
       })
       .catch(err => {
         console.error('Error sending POST /api/start-scraping:', err);
@@ -497,17 +505,20 @@ document.addEventListener('DOMContentLoaded', function() {
   jobsWindow.addEventListener('scroll', function() {
     if (jobsWindow.scrollTop + jobsWindow.clientHeight >= jobsWindow.scrollHeight - 50) {
       // Near bottom of scroll area
-      if (hasMore && !isScrapingActive) {
-        currentPage++;
+      if (hasMore && nextCursor && !isLoadingMore && !isScrapingActive) {
         fetchJobs(false);
       }
     }
   });
   
-  // Server-Sent Events (SSE) setup for live job updates
-  if (!!window.EventSource) {
-    console.log('Opening SSE connection to /api/scraping-stream');
-    const sse = new EventSource('/api/scraping-stream');
+  // Server-Sent Events (SSE) stream of live job updates for one scrape
+  let scrapeStream = null;
+  function openScrapeStream(scrapeId) {
+    if (scrapeStream) scrapeStream.close();
+    if (!window.EventSource) return;
+    console.log('Opening SSE connection for scrape', scrapeId);
+    const sse = new EventSource('/api/scraping-stream?scrape_id=' + encodeURIComponent(scrapeId));
+    scrapeStream = sse;
     
     // Handle incoming SSE messages
     sse.onmessage = function(event) {
@@ -521,8 +532,16 @@ document.addEventListener('DOMContentLoaded', function() {
           return;
         }
         
+        if (data.type === 'dropped') {
+          // Fell behind; the missed jobs are loaded when the scrape completes
+          console.log(`Missed ${data.count} live jobs`);
+          return;
+        }
+        
         if (data.status === 'complete') {
           console.log('Scraping complete, hiding loader');
+          sse.close();
+          scrapeStream = null;
           scrapingLoader.classList.add('hidden');
           isScrapingActive = false;
           fetchJobs();
@@ -536,9 +555,12 @@ document.addEventListener('DOMContentLoaded', function() {
       }
     };
     
-    // Handle SSE errors
+    // Handle SSE errors; the browser reconnects by itself (resuming after the last event received)
+    // unless the stream is gone for good
     sse.onerror = function(error) {
       console.error('SSE connection error:', error);
+      if (sse.readyState !== EventSource.CLOSED) return;
+      scrapeStream = null;
       scrapingLoader.classList.add('hidden');
       isScrapingActive = false;
     };
@@ -591,7 +613,132 @@ document.addEventListener('DOMContentLoaded', function() {
       }
     });
   }
-  
+
+  // Resume analysis runs in the background after upload: poll its status, then load its suggested jobs
+  // page by page (they are served by the API rather than embedded in the page or the session)
+  const analysisSection = document.getElementById('resume-analysis');
+  const ANALYSIS_POLL_INTERVAL = 1500;   // Milliseconds between status checks
+  const SUGGESTIONS_PAGE_SIZE = 10;      // Suggested jobs loaded per request
+  const moreSuggestionsBtn = document.getElementById('resume-suggestions-more');
+  let suggestionsOffset = null;          // Offset of the next page of suggestions (null when all are loaded)
+
+  /**
+   * Renders the keywords of a finished resume analysis
+   *
+   * @param {Object} analysis - The analysis from /api/resume-analysis/<id>
+   */
+  function renderResumeKeywords(analysis) {
+    const keywordsBox = document.getElementById('resume-keywords');
+    keywordsBox.innerHTML = '';
+    if (analysis.keywords.length === 0) {
+      keywordsBox.innerHTML = '<span class="text-gray-400">No keywords found.</span>';
+    }
+    analysis.keywords.forEach(keyword => {
+      const chip = document.createElement('span');
+      chip.className = 'bg-indigo-100 text-indigo-700 px-3 py-1 rounded-full';
+      chip.textContent = keyword;
+      keywordsBox.appendChild(chip);
+    });
+  }
+
+  /**
+   * Appends suggested jobs to the suggestions list
+   *
+   * @param {Array} suggestedJobs - Jobs from /api/resume-analysis/<id>/suggestions
+   */
+  function renderSuggestions(suggestedJobs) {
+    const suggestionsList = document.getElementById('resume-suggestions');
+    suggestedJobs.forEach(job => {
+      const li = document.createElement('li');
+      li.className = 'flex items-center gap-2 bg-indigo-50 p-3 rounded-md';
+      li.innerHTML = `
+        <i data-lucide="briefcase" class="w-5 h-5 text-indigo-600"></i>
+        <span class="suggestion-title"></span>
+        <button class="save-job-btn inline-flex items-center px-2.5 py-1.5 border border-indigo-500 text-xs font-medium rounded text-indigo-600 bg-white hover:bg-indigo-50 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500" style="margin-left:auto; margin-right:0.5rem;">
+          <svg class="w-4 h-4 mr-1" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 5a2 2 0 012-2h10a2 2 0 012 2v16l-7-3.5L5 21V5z"/>
+          </svg>
+          Save
+        </button>
+        <a target="_blank" class="text-indigo-600 hover:underline text-xs">View</a>`;
+      li.querySelector('.suggestion-title').textContent = job.company ? `${job.title} @ ${job.company}` : job.title;
+      li.querySelector('.save-job-btn').addEventListener('click', () => saveJob(job));
+      li.querySelector('a').href = job.link;
+      suggestionsList.appendChild(li);
+    });
+    if (window.lucide) lucide.createIcons();
+  }
+
+  /**
+   * Loads the next page of an analysis' suggested jobs
+   *
+   * @param {string} analysisId - The ResumeAnalysis id
+   */
+  function loadSuggestions(analysisId) {
+    const suggestionsList = document.getElementById('resume-suggestions');
+    const offset = suggestionsOffset || 0;
+    moreSuggestionsBtn.disabled = true;
+    fetch(`/api/resume-analysis/${analysisId}/suggestions?offset=${offset}&limit=${SUGGESTIONS_PAGE_SIZE}`)
+      .then(response => {
+        if (!response.ok) throw new Error(`Status ${response.status}`);
+        return response.json();
+      })
+      .then(data => {
+        if (offset === 0) suggestionsList.innerHTML = '';
+        if (data.total === 0) {
+          suggestionsList.innerHTML = '<li class="text-gray-400">No suggested jobs found.</li>';
+        }
+        renderSuggestions(data.suggested_jobs);
+        suggestionsOffset = data.next_offset;
+        moreSuggestionsBtn.classList.toggle('hidden', suggestionsOffset === null);
+      })
+      .catch(error => console.error('Error loading suggested jobs:', error))
+      .finally(() => { moreSuggestionsBtn.disabled = false; });
+  }
+
+  /**
+   * Polls a resume analysis until it is done or failed
+   *
+   * @param {string} analysisId - The ResumeAnalysis id
+   */
+  function pollResumeAnalysis(analysisId) {
+    const statusLine = document.getElementById('resume-analysis-status');
+    fetch(`/api/resume-analysis/${analysisId}`)
+      .then(response => {
+        if (!response.ok) throw new Error(`Status ${response.status}`);
+        return response.json();
+      })
+      .then(analysis => {
+        if (analysis.status === 'pending' || analysis.status === 'processing') {
+          setTimeout(() => pollResumeAnalysis(analysisId), ANALYSIS_POLL_INTERVAL);
+          return;
+        }
+        if (analysis.status === 'failed') {
+          statusLine.textContent = `Could not analyse ${analysis.filename}. Please try again.`;
+          statusLine.classList.replace('text-indigo-700', 'text-red-600');
+          return;
+        }
+        statusLine.textContent = '';
+        renderResumeKeywords(analysis);
+        loadSuggestions(analysisId);
+      })
+      .catch(error => {
+        console.error('Error polling resume analysis:', error);
+        statusLine.textContent = '';
+      });
+  }
+
+  if (analysisSection && analysisSection.dataset.analysisId) {
+    const analysisId = analysisSection.dataset.analysisId;
+    const status = analysisSection.dataset.analysisStatus;
+    if (status === 'pending' || status === 'processing') {
+      pollResumeAnalysis(analysisId);
+    } else if (status === 'done') {
+      loadSuggestions(analysisId);
+    }
+    moreSuggestionsBtn.addEventListener('click', () => loadSuggestions(analysisId));
+  }
+
   // Reset filters button
   const resetFiltersBtn = document.getElementById('reset-filters');
   
@@ -39,7 +39,7 @@ document.addEventListener('DOMContentLoaded', function() {
   const markAllReadBtn = document.getElementById('markAllRead');
   const loadMoreBtn = document.getElementById('loadMoreNotifications');
   
-  let currentPage = 1;
+  let nextCursor = null;
   let hasMoreNotifications = false;
   
   /**
@@ -49,7 +49,7 @@ document.addEventListener('DOMContentLoaded', function() {
   notificationButton.addEventListener('click', function() {
     notificationDropdown.classList.toggle('hidden');
     if (!notificationDropdown.classList.contains('hidden')) {
-      loadNotifications(1, true); // Reset to first page when opening
+      loadNotifications(true); // Reset to first page when opening
     }
   });
   
@@ -76,7 +76,7 @@ document.addEventListener('DOMContentLoaded', function() {
     .then(response => response.json())
     .then(data => {
       if (data.success) {
-        loadNotifications(1, true);
+        loadNotifications(true);
         updateNotificationCount();
       }
     });
@@ -84,27 +84,28 @@ document.addEventListener('DOMContentLoaded', function() {
   
   /**
    * Load more notifications when clicking the "Load more" button
-   * Increments the page and appends new notifications
+   * Continues from the cursor of the last loaded page and appends new notifications
    */
   loadMoreBtn.addEventListener('click', function(e) {
     e.preventDefault();
     if (hasMoreNotifications) {
-      loadNotifications(currentPage + 1, false);
+      loadNotifications(false);
     }
   });
   
   /**
    * Load notifications from the API
-   * @param {number} page - The page number to load
-   * @param {boolean} reset - Whether to reset the notification list or append
+   * @param {boolean} reset - Whether to load the first page and reset the list, or append the next page
    */
-  function loadNotifications(page, reset) {
-    currentPage = page;
+  function loadNotifications(reset) {
+    const params = new URLSearchParams({ per_page: 5 });
+    if (!reset && nextCursor) params.set('cursor', nextCursor);
     
-    fetch(`/api/notifications?page=${page}&per_page=5`)
+    fetch(`/api/notifications?${params.toString()}`)
       .then(response => response.json())
       .then(data => {
         hasMoreNotifications = data.has_next;
+        nextCursor = data.next_cursor;
         loadMoreBtn.style.display = hasMoreNotifications ? 'inline' : 'none';
         
         // Update the UI
@@ -180,7 +181,7 @@ document.addEventListener('DOMContentLoaded', function() {
     .then(response => response.json())
     .then(data => {
       if (data.success) {
-        loadNotifications(currentPage, true);
+        loadNotifications(true);
         updateNotificationCount();
       }
     })
@@ -194,14 +195,38 @@ document.addEventListener('DOMContentLoaded', function() {
   function updateNotificationCount() {
     fetch('/api/notifications?count_only=true')
       .then(response => response.json())
-      .then(data => {
-        if (data.unread_count > 0) {
-          notificationBadge.textContent = data.unread_count > 99 ? '99+' : data.unread_count;
-          notificationBadge.classList.remove('hidden');
-        } else {
-          notificationBadge.classList.add('hidden');
-        }
-      });
+      .then(data => showNotificationCount(data.unread_count));
+  }
+
+  /**
+   * Show the unread count on the notification badge (hidden when there is nothing unread)
+   * @param {number} unreadCount - Number of unread notifications
+   */
+  function showNotificationCount(unreadCount) {
+    if (unreadCount > 0) {
+      notificationBadge.textContent = unreadCount > 99 ? '99+' : unreadCount;
+      notificationBadge.classList.remove('hidden');
+    } else {
+      notificationBadge.classList.add('hidden');
+    }
+  }
+
+  /**
+   * Receive notifications live when the app is served over ASGI (see app/asgi.py)
+   * @returns {EventSource|null} The open stream, or null if streams are not supported
+   */
+  function openNotificationStream() {
+    if (!window.EventSource) return null;
+    const stream = new EventSource('/api/notifications-stream');
+    stream.onmessage = function(event) {
+      const data = JSON.parse(event.data);
+      if (data.type === 'notification') showNotificationCount(data.unread_count);
+    };
+    // Not available (e.g. the Flask development server): keep polling instead
+    stream.onerror = function() {
+      if (stream.readyState === EventSource.CLOSED) notificationStream = null;
+    };
+    return stream;
   }
   
   /**
@@ -269,5 +294,8 @@ document.addEventListener('DOMContentLoaded', function() {
   
   // Initialize notification count on page load and set interval to update
   updateNotificationCount();
-  setInterval(updateNotificationCount, 60000); // Update every minute
+  let notificationStream = openNotificationStream();
+  setInterval(() => {
+    if (!notificationStream) updateNotificationCount();
+  }, 60000); // Update every minute unless notifications are streamed
 });
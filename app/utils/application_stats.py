@@ -0,0 +1,293 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import case, delete, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db, ApplicationStat, JobApplication, User
+from app.utils.job_catalog import IN_CHUNK_SIZE
+
+"""
+Materialized per-user job application statistics.
+
+The dashboard and analytics pages used to load every one of a user's applications and recount them on each
+view. Instead, each user's applications are counted once into ApplicationStat rows, one per (day applied,
+status, job type), and every route that adds, edits, moves or deletes an application adjusts those counts
+in the same transaction (record_added, record_removed, record_changed). The pages then read a handful of
+aggregate rows, however many applications the user has. Time series (activity_series) are summed into
+day, week or month buckets by grouped queries on those rows, for any range of days.
+
+A user's rows are (re)built from their applications the first time they are read (see ensure_stats), which
+covers users from before the table existed.
+"""
+
+# Australia/Perth has no daylight saving time
+PERTH_OFFSET = timedelta(hours=8)
+
+# SQLite expressions mapping a day (stored as 'YYYY-MM-DD') to the first day of its bucket
+BUCKET_EXPRESSIONS = {
+    "day": lambda day: func.date(day),
+    "week": lambda day: func.date(day, "weekday 0", "-6 days"),  # the Monday of its Monday-to-Sunday week
+    "month": lambda day: func.strftime("%Y-%m-01", day),
+}
+
+# Statuses counted as a response from the employer (for the average response time)
+RESPONSE_STATUSES = ("Offer", "Accepted", "Archived", "Discontinued")
+
+
+def perth_day(moment):
+    """
+    The Perth calendar day of a stored datetime.
+
+    Args:
+        moment (datetime): The datetime (naive datetimes are UTC, as the app stores them).
+
+    Returns:
+        date: The day in Perth.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment + PERTH_OFFSET).date()
+
+
+def snapshot(application):
+    """
+    What an application contributes to its user's stats.
+
+    Args:
+        application (JobApplication | Row): The application, or a row with its user_id, date_applied, status,
+            job_type and closing_date (its user_id and date_applied are set once it has been flushed).
+
+    Returns:
+        tuple: ((user_id, day, status, job_type), (count, dated, response_days)).
+    """
+    applied = application.date_applied or datetime.now(timezone.utc)
+    dated, response_days = 0, 0
+    if application.closing_date:
+        closing = application.closing_date
+        if (closing.tzinfo is None) != (applied.tzinfo is None):
+            closing, applied = closing.replace(tzinfo=None), applied.replace(tzinfo=None)
+        dated, response_days = 1, (closing - applied).days
+    key = (application.user_id, perth_day(applied), application.status or "", application.job_type or "")
+    return key, (1, dated, response_days)
+
+
+def _apply(contribution, sign):
+    """Add (sign 1) or subtract (sign -1) a contribution to its stats row, deleting rows that reach zero."""
+    (user_id, day, status, job_type), (count, dated, response_days) = contribution
+    statement = sqlite_insert(ApplicationStat).values(
+        user_id=user_id, day=day, status=status, job_type=job_type,
+        count=sign * count, dated=sign * dated, response_days=sign * response_days)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "day", "status", "job_type"],
+        set_={"count": ApplicationStat.count + statement.excluded.count,
+              "dated": ApplicationStat.dated + statement.excluded.dated,
+              "response_days": ApplicationStat.response_days + statement.excluded.response_days},
+    ))
+    if sign < 0:
+        db.session.execute(delete(ApplicationStat).where(
+            ApplicationStat.user_id == user_id, ApplicationStat.day == day, ApplicationStat.status == status,
+            ApplicationStat.job_type == job_type, ApplicationStat.count <= 0))
+
+
+def record_added(application):
+    """
+    Count a new application in its user's stats. Does not commit.
+
+    Args:
+        application (JobApplication): The application, added to the session and flushed.
+    """
+    _apply(snapshot(application), 1)
+
+
+def record_removed(application):
+    """
+    Stop counting an application that is being deleted. Does not commit.
+
+    Args:
+        application (JobApplication): The application.
+    """
+    _apply(snapshot(application), -1)
+
+
+def record_changed(before, application):
+    """
+    Move an edited application's count to where its new values belong. Does not commit.
+
+    Args:
+        before (tuple): snapshot() of the application taken before the edit.
+        application (JobApplication): The edited application.
+    """
+    after = snapshot(application)
+    if after != before:
+        _apply(before, -1)
+        _apply(after, 1)
+
+
+def rebuild_stats(user_id):
+    """
+    Recount a user's stats from their applications. Does not commit.
+
+    Args:
+        user_id (int): The user.
+
+    Returns:
+        int: The number of applications counted.
+    """
+    rows = defaultdict(lambda: [0, 0, 0])
+    for application in db.session.query(JobApplication.user_id, JobApplication.date_applied, JobApplication.status,
+                                        JobApplication.job_type, JobApplication.closing_date)\
+            .filter(JobApplication.user_id == user_id):
+        key, values = snapshot(application)
+        rows[key] = [total + value for total, value in zip(rows[key], values)]
+    db.session.execute(delete(ApplicationStat).where(ApplicationStat.user_id == user_id))
+    if rows:
+        db.session.execute(sqlite_insert(ApplicationStat), [
+            {"user_id": user_id, "day": day, "status": status, "job_type": job_type,
+             "count": count, "dated": dated, "response_days": response_days}
+            for (_, day, status, job_type), (count, dated, response_days) in rows.items()
+        ])
+    db.session.execute(update(User).where(User.id == user_id).values(application_stats_ready=True))
+    return sum(count for count, _, _ in rows.values())
+
+
+def ensure_stats(user_ids):
+    """
+    Build the stats of those of the users whose stats were never built, committing if any were.
+
+    Args:
+        user_ids (list[int]): The users.
+    """
+    stale = []
+    for start in range(0, len(user_ids), IN_CHUNK_SIZE):
+        stale.extend(user_id for user_id, in db.session.query(User.id).filter(
+            User.id.in_(user_ids[start:start + IN_CHUNK_SIZE]),
+            func.coalesce(User.application_stats_ready, False).is_(False)))
+    for user_id in stale:
+        rebuild_stats(user_id)
+    if stale:
+        db.session.commit()
+
+
+def summary(user_id):
+    """
+    A user's application totals, per status and per job type.
+
+    Args:
+        user_id (int): The user.
+
+    Returns:
+        dict: 'total', 'status_counts' and 'type_counts' (dicts of counts, most common first),
+        'last_applied' (date | None) and 'avg_response' (average days from applying to the closing date of
+        applications with a response and a closing date, or None).
+    """
+    ensure_stats([user_id])
+    status_counts, type_counts = defaultdict(int), defaultdict(int)
+    dated = response_days = 0
+    for status, job_type, count, status_dated, status_days in db.session.query(
+            ApplicationStat.status, ApplicationStat.job_type, func.sum(ApplicationStat.count),
+            func.sum(ApplicationStat.dated), func.sum(ApplicationStat.response_days)
+    ).filter(ApplicationStat.user_id == user_id).group_by(ApplicationStat.status, ApplicationStat.job_type):
+        status_counts[status] += count
+        type_counts[job_type or "Unknown"] += count
+        if status in RESPONSE_STATUSES:
+            dated += status_dated
+            response_days += status_days
+    last_applied = db.session.query(func.max(ApplicationStat.day))\
+        .filter(ApplicationStat.user_id == user_id).scalar()
+    return {
+        "total": sum(status_counts.values()),
+        "status_counts": dict(sorted(status_counts.items(), key=lambda item: -item[1])),
+        "type_counts": dict(sorted(type_counts.items(), key=lambda item: -item[1])),
+        "last_applied": last_applied,
+        "avg_response": round(response_days / dated, 1) if dated else None,
+    }
+
+
+def bucket_start(day, bucket):
+    """
+    The first day of the bucket a day falls in.
+
+    Args:
+        day (date): The day.
+        bucket (str): 'day', 'week' (Monday to Sunday) or 'month'.
+
+    Returns:
+        date: The first day of the bucket.
+    """
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start, bucket):
+    """The first day of the bucket after the one starting on start."""
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start + timedelta(days=31)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def activity_series(user_id, start, end, bucket="day"):
+    """
+    A user's applications per day, week or month over a range of (Perth) days.
+
+    The counts are summed by the database, grouped by bucket, so only one row per bucket with applications
+    is read whatever the length of the range; buckets without applications are filled in with zeros.
+
+    Args:
+        user_id (int): The user.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        bucket (str): Size of each point of the series: 'day', 'week' (Monday to Sunday) or 'month'.
+
+    Returns:
+        list[dict]: One dict per bucket from the one containing start to the one containing end, oldest
+        first, with the bucket's first day ('start'), the applications made in it ('applications') and how
+        many of those are now interviewing ('interviews') or have an offer ('offers'), and the user's
+        applications made up to its end ('cumulative').
+    """
+    ensure_stats([user_id])
+    if bucket not in BUCKET_EXPRESSIONS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+    in_range = (ApplicationStat.user_id == user_id, ApplicationStat.day >= start, ApplicationStat.day <= end)
+    key = BUCKET_EXPRESSIONS[bucket](ApplicationStat.day)
+    rows = {
+        date.fromisoformat(bucket_day): (applications, interviews, offers)
+        for bucket_day, applications, interviews, offers in db.session.query(
+            key, func.sum(ApplicationStat.count),
+            func.sum(case((ApplicationStat.status == "Interviewing", ApplicationStat.count), else_=0)),
+            func.sum(case((ApplicationStat.status == "Offer", ApplicationStat.count), else_=0)),
+        ).filter(*in_range).group_by(key)
+    }
+    running = db.session.query(func.coalesce(func.sum(ApplicationStat.count), 0))\
+        .filter(ApplicationStat.user_id == user_id, ApplicationStat.day < start).scalar()
+    series = []
+    day = bucket_start(start, bucket)
+    while day <= end:
+        applications, interviews, offers = rows.get(day, (0, 0, 0))
+        running += applications
+        series.append({"start": day, "applications": applications, "interviews": interviews,
+                       "offers": offers, "cumulative": running})
+        day = _next_bucket(day, bucket)
+    return series
+
+
+def application_totals(user_ids):
+    """
+    Number of applications of each of the users (e.g. for the leaderboard).
+
+    Args:
+        user_ids (list[int]): The users.
+
+    Returns:
+        dict: {user_id: count}, 0 for users without applications.
+    """
+    ensure_stats(user_ids)
+    totals = dict.fromkeys(user_ids, 0)
+    for start in range(0, len(user_ids), IN_CHUNK_SIZE):
+        totals.update(db.session.query(ApplicationStat.user_id, func.sum(ApplicationStat.count))
+                      .filter(ApplicationStat.user_id.in_(user_ids[start:start + IN_CHUNK_SIZE]))
+                      .group_by(ApplicationStat.user_id))
+    return totals
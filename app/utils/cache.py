@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+"""
+Small in-process caching utilities.
+
+This module provides a thread-safe LRU cache with a time-to-live and a version counter. Bumping the version
+(invalidate) makes every existing entry stale at once, which lets writers invalidate cached results cheaply
+without knowing which keys they affect. Hit/miss counters are kept for monitoring.
+"""
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with per-entry expiry and versioned invalidation.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept; the least recently used entry is evicted first.
+        ttl (float | None): Seconds an entry stays valid after being stored (None for no expiry).
+        version (int): Current data version; entries stored under an older version are treated as misses.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()  # key -> (version, expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """
+        Look up a key, refreshing its recency on a hit.
+
+        Args:
+            key: A hashable cache key.
+            default: Value returned on a miss.
+
+        Returns:
+            The cached value, or default if missing, expired or from an older version.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, expires_at, value = entry
+                if version == self.version and (expires_at is None or expires_at > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, version=None):
+        """
+        Store a value, evicting the least recently used entries beyond max_entries.
+
+        Args:
+            key: A hashable cache key.
+            value: The value to cache.
+            version (int, optional): The version the value was computed under (read before computing it).
+                If the cache has been invalidated since, the value is discarded instead of stored.
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (self.version, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Mark every cached entry as stale by bumping the version, and free the memory they hold."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """
+        Get counters for monitoring.
+
+        Returns:
+            dict: Entry count, limits, version, and hit/miss/eviction/invalidation counters with the hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
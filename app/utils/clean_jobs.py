@@ -11,7 +11,7 @@ without affecting other database records. It is safe to run multiple times and p
 """
 
 from app import create_app, db
-from app.models import ScrapedJob
+from app.models import ScrapedJob, UserScrapedJob
 from datetime import datetime
 
 app = create_app()
@@ -51,6 +51,7 @@ def clean_jobs(debug=False):
             # Proceed to delete all ScrapedJob entries
             if debug:
                 print("[INFO] Starting deletion...")
+            UserScrapedJob.query.delete()  # users' sightings of the deleted jobs
             ScrapedJob.query.delete()
             
             # Commit the transaction to persist changes
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to bring an existing database schema up to date with the models.
+
+db.create_all() only creates missing tables; it never alters existing ones. This utility adds any model
+columns and indexes that are missing from existing tables (e.g. a careerlink.db created by an older version
+of the app), so a database can be upgraded in place instead of being deleted. Before creating indexes it
+collapses duplicate scraped jobs into the shared job catalog and keys job sightings by their filters (see
+job_catalog). It is safe to run multiple times.
+
+Usage:
+    python -m app.utils.db_upgrade
+"""
+
+from sqlalchemy import inspect
+from app.models import db
+from app.utils.job_catalog import collapse_duplicate_jobs, key_sightings_by_filters
+
+
+def upgrade_schema(debug=False):
+    """
+    Add missing columns and indexes to existing tables. Must be called inside an application context.
+
+    Args:
+        debug (bool): If True, prints each change as it is applied.
+
+    Returns:
+        int: The number of columns and indexes added, plus duplicate scraped jobs removed.
+    """
+    changes = 0
+    with db.engine.begin() as connection:
+        inspector = inspect(connection)
+        tables = [table for table in db.metadata.sorted_tables if inspector.has_table(table.name)]
+        # (db.create_all() creates whole tables)
+        for table in tables:
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                # SQLite can only add nullable columns without constraints in place
+                col_type = column.type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}')
+                changes += 1
+                if debug:
+                    print(f"[UPGRADE] added column {table.name}.{column.name}")
+        # Data migrations that new (e.g. unique) indexes depend on
+        changes += collapse_duplicate_jobs(connection, debug=debug)
+        changes += key_sightings_by_filters(connection, debug=debug)
+        inspector = inspect(connection)
+        for table in tables:
+            existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection, checkfirst=True)
+                    changes += 1
+                    if debug:
+                        print(f"[UPGRADE] added index {index.name}")
+    return changes
+
+
+if __name__ == "__main__":
+    from app import create_app
+    with create_app().app_context():
+        print(f"[SUMMARY] Applied {upgrade_schema(debug=True)} schema changes")
@@ -0,0 +1,135 @@
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+
+"""
+Bounded pool of reusable browser (WebDriver) instances.
+
+Starting Chrome takes seconds, so scrapes borrow already-running browsers from a pool instead of launching
+one per scrape. A pool never runs more than 'size' browsers at once, which bounds the memory and CPU used by
+concurrent scrapes; callers wait for a free browser when all are busy. Browsers that fail mid-use are quit
+and replaced, and each browser is recycled after a number of uses to keep long-running sessions healthy.
+"""
+
+
+class DriverPool:
+    """
+    Thread-safe pool of WebDriver instances created on demand by a factory.
+
+    Attributes:
+        size (int): Maximum number of browsers running (and in use) at once.
+        max_uses (int | None): Number of times a browser is lent out before it is quit and replaced.
+    """
+
+    def __init__(self, factory, size=4, max_uses=100):
+        """
+        Args:
+            factory (callable): Called with no arguments to start a new browser.
+            size (int): Maximum number of browsers.
+            max_uses (int, optional): Uses before a browser is recycled (None to keep browsers forever).
+        """
+        self.size = max(1, int(size))
+        self.max_uses = max_uses
+        self._factory = factory
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = queue.LifoQueue()  # most recently used first, so warm browsers are preferred
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a browser for the duration of a with-block, waiting if all browsers are busy.
+
+        If the block raises, the browser is assumed to be broken: it is quit instead of being returned to
+        the pool, and the exception is re-raised.
+
+        Yields:
+            selenium.webdriver.Remote: A browser for exclusive use by the caller.
+        """
+        self._slots.acquire()
+        try:
+            driver = self._checkout()
+            try:
+                yield driver
+            except BaseException:
+                self._discard(driver)
+                raise
+            self._checkin(driver)
+        finally:
+            self._slots.release()
+
+    def _checkout(self):
+        """Take an idle browser, or start a new one if none is idle."""
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            driver = self._factory()
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        return driver
+
+    def _checkin(self, driver):
+        """Return a browser to the pool, recycling it if it is worn out or the pool was closed."""
+        with self._lock:
+            worn_out = self.max_uses is not None and self._uses.get(id(driver), 0) >= self.max_uses
+            closed = self._closed
+        if worn_out or closed:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def _discard(self, driver):
+        """Quit a browser and forget it, ignoring errors from browsers that already died."""
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit all idle browsers. Browsers currently in use are quit when they are returned."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory, size=4, max_uses=100):
+    """
+    Get the shared pool for a key, creating it on first use, so browsers are reused across scrapes.
+
+    Args:
+        key: Identifies the kind of browser (e.g. headless or not).
+        factory (callable): Starts a new browser (used if the pool has to be created).
+        size (int): Pool size (used if the pool has to be created).
+        max_uses (int, optional): Uses before a browser is recycled.
+
+    Returns:
+        DriverPool: The shared pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = DriverPool(factory, size=size, max_uses=max_uses)
+        return pool
+
+
+@atexit.register
+def close_pools():
+    """Quit the browsers of every shared pool (run automatically at interpreter exit)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
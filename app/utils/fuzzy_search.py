@@ -1,5 +1,6 @@
 import json
 import difflib
+import re
 
 """
 Utilities for fuzzy searching and matching job listings.
@@ -30,6 +31,101 @@ def is_fuzzy_match(needle, haystack, threshold=0.6):
     )
 
 
+# Order of the fields stored in a job's precomputed search document (one normalized field per line)
+SEARCH_FIELDS = (
+    "title",
+    "company",
+    "ai_summary",
+    "overview",
+    "responsibilities",
+    "requirements",
+    "skills_and_qualities",
+    "salary_info",
+    "about_company",
+    "full_text",
+)
+
+# Job fields stored as JSON stringified lists on ScrapedJob
+JSON_LIST_FIELDS = ("overview", "responsibilities", "requirements", "skills_and_qualities", "salary_info", "about_company")
+
+
+def normalize_text(value):
+    """
+    Lowercase a string and collapse all runs of whitespace (including newlines) to single spaces.
+
+    Args:
+        value (str | list[str] | None): The text, or a list of text fragments to join.
+
+    Returns:
+        str: The normalized text ('' for None).
+    """
+    if isinstance(value, (list, tuple)):
+        value = " ".join(str(v) for v in value if v)
+    return " ".join((value or "").split()).lower()
+
+
+def build_search_document(job):
+    """
+    Build the precomputed search fields for a scraped job at insert time.
+
+    Args:
+        job (dict): A scraped job as returned by get_jobs_full (section fields are lists of strings).
+
+    Returns:
+        dict: 'company' (the first 'about_company' entry, original case) and 'search_text', the normalized
+        fields in SEARCH_FIELDS order joined by newlines.
+    """
+    about = job.get("about_company") or []
+    company = about[0] if about else ""
+    values = dict(job, company=company)
+    search_text = "\n".join(normalize_text(values.get(field)) for field in SEARCH_FIELDS)
+    return {"company": company, "search_text": search_text}
+
+
+def decode_job_fields(job):
+    """
+    Decode a stored job row back into the dict shape produced by the scraper.
+
+    Args:
+        job: A ScrapedJob (or any object with the same attributes).
+
+    Returns:
+        dict: 'title', 'ai_summary' and 'full_text' as strings and the JSON list columns as lists.
+    """
+    values = {
+        "title": getattr(job, "title", None),
+        "ai_summary": getattr(job, "ai_summary", None),
+        "full_text": getattr(job, "full_text", None),
+    }
+    for field in JSON_LIST_FIELDS:
+        raw = getattr(job, field, None)
+        try:
+            values[field] = json.loads(raw) if raw else []
+        except Exception:
+            # If any field fails to parse, leave it empty
+            values[field] = []
+    return values
+
+
+def search_fields(job):
+    """
+    Get the normalized search fields of a job, in SEARCH_FIELDS order.
+
+    Jobs with a precomputed 'search_text' are split without any JSON decoding; older rows without one
+    fall back to decoding the JSON list columns.
+
+    Args:
+        job: A ScrapedJob (or any object with the same attributes).
+
+    Returns:
+        list[str]: One lowercased, whitespace-normalized string per field.
+    """
+    search_text = getattr(job, "search_text", None)
+    if search_text is None:
+        search_text = build_search_document(decode_job_fields(job))["search_text"]
+    return search_text.split("\n")
+
+
 def job_matches(job, search='', location='', job_type='', category='', confidence=0.6):
     """
     Determines if a job listing matches the provided search criteria using fuzzy matching.
@@ -48,35 +144,9 @@ def job_matches(job, search='', location='', job_type='', category='', confidenc
     This function aggregates multiple fields from the job object, applies fuzzy matching to each,
     and returns True only if all filters (location, job_type, category, and search) are satisfied.
     """
-    # Normalize and extract relevant job fields for matching
-    title = (job.title or '').lower()
-    company = ''
-    ai_summary = (job.ai_summary or '').lower()
-    overview = ''
-    responsibilities = ''
-    requirements = ''
-    skills_and_qualities = ''
-    salary_info = ''
-    about_company = ''
-    
-    try:
-        # Many fields are stored as JSON arrays; join them into single strings for searching
-        overview = ' '.join(json.loads(job.overview) if job.overview else []).lower()
-        responsibilities = ' '.join(json.loads(job.responsibilities) if job.responsibilities else []).lower()
-        requirements = ' '.join(json.loads(job.requirements) if job.requirements else []).lower()
-        skills_and_qualities = ' '.join(json.loads(job.skills_and_qualities) if job.skills_and_qualities else []).lower()
-        salary_info = ' '.join(json.loads(job.salary_info) if job.salary_info else []).lower()
-        about = json.loads(job.about_company) if job.about_company else []
-        about_company = ' '.join(about).lower() if about else ''
-        # Heuristic: use the first element of 'about_company' as the company name if available
-        if about and len(about) > 0:
-            company = about[0].lower()
-    except Exception:
-        # If any field fails to parse, leave it as an empty string
-        pass
-
-    # Fallback: use the full_text field for broad matching
-    full_text = (job.full_text or '').lower()
+    # Use the job's precomputed, normalized search fields (see build_search_document)
+    fields = search_fields(job)
+    full_text = fields[-1]
 
     # Fuzzy match for dropdown filters; if filter is empty, treat as a match (no filter applied)
     loc_match = is_fuzzy_match(location, full_text, threshold=confidence) if location else True
@@ -88,22 +158,149 @@ def job_matches(job, search='', location='', job_type='', category='', confidenc
     if search:
         search = search.lower()
         search_match = (
+            # Direct substring matches first, as they are cheap
+            any(search in field for field in fields) or
             # Fuzzy match against each field
-            difflib.SequenceMatcher(None, search, title).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, company).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, ai_summary).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, overview).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, responsibilities).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, requirements).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, skills_and_qualities).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, salary_info).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, about_company).ratio() > confidence or
-            difflib.SequenceMatcher(None, search, full_text).ratio() > confidence or
-            # Also allow for direct substring matches for efficiency
-            search in title or search in company or search in ai_summary or search in overview or
-            search in responsibilities or search in requirements or search in skills_and_qualities or
-            search in salary_info or search in about_company or search in full_text
+            any(difflib.SequenceMatcher(None, search, field).ratio() > confidence for field in fields)
         )
 
     # Only return True if all filters are satisfied
     return loc_match and type_match and cat_match and search_match
+
+
+def trigrams(word):
+    """
+    Split a word into its character trigrams, padded so that short words and word boundaries are represented.
+
+    Args:
+        word (str): A single lowercased word.
+
+    Returns:
+        set[str]: The word's trigrams (e.g. 'cat' -> {'  c', ' ca', 'cat', 'at '}).
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index for typo-tolerant search over job listings.
+
+    Every distinct word in the indexed documents is split into trigrams. A query word is looked up by trigram
+    overlap to get a short list of candidate vocabulary words, and only those candidates are scored exactly with
+    is_fuzzy_match. Matching words map straight to the jobs containing them, so the cost of a search grows with
+    the vocabulary touched by the query rather than with the number or length of job listings.
+
+    Attributes:
+        max_candidates (int): Number of best-overlapping vocabulary words scored exactly per query word.
+        min_overlap (float): Minimum fraction of the query word's trigrams a candidate must share.
+    """
+
+    def __init__(self, max_candidates=25, min_overlap=0.3):
+        self.max_candidates = max_candidates
+        self.min_overlap = min_overlap
+        self._gram_words = {}   # trigram -> set of vocabulary words
+        self._word_docs = {}    # word -> set of document ids
+        self._doc_words = {}    # document id -> set of words
+
+    def __len__(self):
+        return len(self._doc_words)
+
+    def add(self, doc_id, text):
+        """
+        Index (or re-index) a document.
+
+        Args:
+            doc_id: Identifier of the document (e.g. ScrapedJob.id).
+            text (str): The document text, e.g. a job's precomputed search document.
+        """
+        self.remove(doc_id)
+        words = set(re.findall(r"\w+", (text or "").lower()))
+        self._doc_words[doc_id] = words
+        for word in words:
+            docs = self._word_docs.get(word)
+            if docs is None:
+                docs = self._word_docs[word] = set()
+                for gram in trigrams(word):
+                    self._gram_words.setdefault(gram, set()).add(word)
+            docs.add(doc_id)
+
+    def remove(self, doc_id):
+        """
+        Remove a document from the index; unknown ids are ignored.
+
+        Args:
+            doc_id: Identifier of the document.
+        """
+        for word in self._doc_words.pop(doc_id, ()):
+            docs = self._word_docs[word]
+            docs.discard(doc_id)
+            if not docs:
+                del self._word_docs[word]
+                for gram in trigrams(word):
+                    words = self._gram_words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._gram_words[gram]
+
+    def similar_words(self, word, confidence=0.6):
+        """
+        Find indexed words similar to the given word.
+
+        Args:
+            word (str): A single query word.
+            confidence (float): Similarity threshold passed to is_fuzzy_match (0 to 1).
+
+        Returns:
+            dict[str, float]: Matching vocabulary words mapped to their similarity ratio.
+        """
+        word = word.lower()
+        grams = trigrams(word)
+        overlap = {}
+        for gram in grams:
+            for candidate in self._gram_words.get(gram, ()):
+                overlap[candidate] = overlap.get(candidate, 0) + 1
+        min_shared = self.min_overlap * len(grams)
+        candidates = sorted((c for c, n in overlap.items() if n >= min_shared),
+                            key=lambda c: overlap[c], reverse=True)[:self.max_candidates]
+        matches = {}
+        for candidate in candidates:
+            # Exact scoring only for the best trigram candidates
+            ratio = difflib.SequenceMatcher(None, word, candidate).ratio()
+            if word in candidate or ratio > confidence:
+                matches[candidate] = ratio
+        return matches
+
+    def search(self, query, confidence=0.6, limit=None):
+        """
+        Find documents containing a fuzzy match for every word of the query.
+
+        Args:
+            query (str): Free-text search query.
+            confidence (float): Similarity threshold for each query word (0 to 1), as in job_matches.
+            limit (int, optional): Maximum number of results to return.
+
+        Returns:
+            list[tuple]: (doc_id, score) pairs, best first (then by id); the score is the mean similarity
+            of the query words.
+        """
+        words = re.findall(r"\w+", (query or "").lower())
+        if not words:
+            return []
+        scores = None
+        for word in words:
+            word_scores = {}
+            for match, ratio in self.similar_words(word, confidence).items():
+                for doc_id in self._word_docs[match]:
+                    if ratio > word_scores.get(doc_id, 0):
+                        word_scores[doc_id] = ratio
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc_id: scores[doc_id] + ratio for doc_id, ratio in word_scores.items() if doc_id in scores}
+            if not scores:
+                return []
+        # Best first; ties broken by id so the order is stable between calls
+        ranked = sorted(((doc_id, total / len(words)) for doc_id, total in scores.items()),
+                        key=lambda pair: (-pair[1], pair[0]))
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,213 @@
+import threading
+from html.parser import HTMLParser
+import httpx
+
+"""
+Lightweight page fetching and HTML parsing for scrapers.
+
+Pages that are rendered on the server do not need a browser: this module fetches them with a shared, pooled
+HTTP client (keep-alive connections are reused across requests and threads) and parses them into a small
+element tree that supports the simple CSS selectors the scrapers use ('tag.class', descendant selectors and
+comma-separated groups). Element text follows what a browser would show, so hidden elements have no text.
+"""
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BLOCK_TAGS = {"address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+              "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+              "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "ul"}
+# Tags whose content is never rendered as text
+SKIP_TAGS = {"head", "noscript", "script", "style", "template", "title"}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Get the shared HTTP client, creating it on first use.
+
+    Returns:
+        httpx.Client: A thread-safe client with a connection pool and timeouts.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                headers={"User-Agent": USER_AGENT, "Accept-Language": "en-AU,en;q=0.9"},
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+                follow_redirects=True,
+            )
+        return _client
+
+
+def fetch_html(url, client=None):
+    """
+    Fetch a page's HTML.
+
+    Args:
+        url (str): The page URL.
+        client (httpx.Client, optional): Client to use (defaults to the shared client).
+
+    Returns:
+        str | None: The HTML, or None if the request failed or did not return an HTML page.
+    """
+    client = client or get_http_client()
+    try:
+        response = client.get(url)
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200 or "html" not in response.headers.get("content-type", "html"):
+        return None
+    return response.text
+
+
+class Element:
+    """
+    A node of a parsed HTML document.
+
+    Attributes:
+        tag (str): Lowercase tag name ('#document' for the root).
+        attrs (dict): Attribute values.
+        classes (set): CSS classes.
+        children (list): Child Elements and text strings, in document order.
+        parent (Element | None): Parent element.
+    """
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs or {})
+        self.classes = set((self.attrs.get("class") or "").split())
+        self.children = []
+        self.parent = parent
+
+    @property
+    def hidden(self):
+        """bool: Whether a browser would hide this element (and all of its text)."""
+        style = (self.attrs.get("style") or "").replace(" ", "").lower()
+        return (self.tag in SKIP_TAGS or "hidden" in self.attrs or "hidden" in self.classes
+                or "display:none" in style)
+
+    @property
+    def text(self):
+        """str: The visible text, one line per block element, with whitespace collapsed."""
+        parts = []
+        self._collect_text(parts)
+        lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    def _collect_text(self, parts):
+        if self.hidden:
+            return
+        block = self.tag in BLOCK_TAGS
+        if block:
+            parts.append("\n")
+        for child in self.children:
+            if isinstance(child, Element):
+                child._collect_text(parts)
+            else:
+                parts.append(child)
+        if block:
+            parts.append("\n")
+
+    def iter(self):
+        """Yield all descendant elements in document order."""
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child.iter()
+
+    def select(self, selector):
+        """
+        Find descendant elements matching a CSS selector.
+
+        Supports type and class selectors ('div.a.b', '.a'), descendant combinators ('div p') and
+        comma-separated groups.
+
+        Args:
+            selector (str): The CSS selector.
+
+        Returns:
+            list[Element]: Matching elements in document order, without duplicates.
+        """
+        groups = [[_parse_simple(part) for part in group.split()] for group in selector.split(",") if group.strip()]
+        return [element for element in self.iter()
+                if any(_matches_chain(element, chain, self) for chain in groups)]
+
+    def select_one(self, selector):
+        """Return the first element matching a CSS selector, or None."""
+        matches = self.select(selector)
+        return matches[0] if matches else None
+
+
+def _parse_simple(selector):
+    """Split a simple selector like 'div.a.b' into ('div', {'a', 'b'}); the tag is None for '.a'."""
+    tag, *classes = selector.split(".")
+    return (tag.lower() or None, set(classes))
+
+
+def _matches_simple(element, simple):
+    tag, classes = simple
+    return (tag is None or element.tag == tag) and classes <= element.classes
+
+
+def _matches_chain(element, chain, root):
+    """Check a descendant selector chain against an element, looking at ancestors below root only."""
+    if not _matches_simple(element, chain[-1]):
+        return False
+    remaining = len(chain) - 2
+    node = element.parent
+    while remaining >= 0 and node is not None and node is not root:
+        if _matches_simple(node, chain[remaining]):
+            remaining -= 1
+        node = node.parent
+    return remaining < 0
+
+
+class _TreeBuilder(HTMLParser):
+    """Build an Element tree, closing unclosed paragraphs and list items the way browsers do."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document")
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        if (self.current.tag == "p" and tag in BLOCK_TAGS) or (self.current.tag == "li" and tag == "li"):
+            self.current = self.current.parent
+        element = Element(tag, attrs, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_TAGS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Element(tag, attrs, self.current))
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:  # ignore stray end tags
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def parse_html(html):
+    """
+    Parse an HTML document.
+
+    Args:
+        html (str): The document source.
+
+    Returns:
+        Element: The document root.
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
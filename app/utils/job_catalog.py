@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import delete, func, insert, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db, JobApplication, ScrapedJob, UserScrapedJob
+
+"""
+Shared catalog of scraped jobs.
+
+Every job listing is stored once, keyed by its canonical link, no matter how many users' scrapes find it.
+Which users found which jobs (and under which filters) is recorded as lightweight UserScrapedJob sightings,
+so storage and search cost grow with the number of unique jobs rather than users x jobs.
+
+This module also provides the migration that collapses duplicate per-user copies in an existing database
+into catalog rows; it runs automatically from db_upgrade.upgrade_schema, and can be run by hand:
+
+Usage:
+    python -m app.utils.job_catalog
+"""
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "referrer", "source"}
+
+# Keep IN (...) lists well below SQLite's bound parameter limit
+IN_CHUNK_SIZE = 500
+
+# Tag columns of a scrape's filters, in the order of their sighting_key
+TAG_COLUMNS = ("tag_jobtype", "tag_location", "tag_category")
+
+# Unique key of a sighting: one per user, set of filters and job
+SIGHTING_KEY_COLUMNS = ["user_id", "filter_key", "job_id"]
+
+
+def canonical_link(link):
+    """
+    Normalize a job link so the same listing always maps to the same catalog row.
+
+    The scheme and host are lowercased, fragments and tracking parameters (utm_* and TRACKING_PARAMS) are
+    dropped, and paths get a trailing slash, as GradConnection job URLs have.
+
+    Args:
+        link (str): The link as scraped.
+
+    Returns:
+        str: The canonical link (unchanged if empty).
+    """
+    if not link:
+        return link
+    parts = urlsplit(link.strip())
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS])
+    path = parts.path if parts.path.endswith("/") else parts.path + "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def sighting_key(tags):
+    """
+    Key identifying a set of scrape filters among a user's sightings.
+
+    Args:
+        tags (dict | None): tag_jobtype, tag_location and tag_category of the filters (missing tags are empty).
+
+    Returns:
+        str: The tags joined by '|'.
+    """
+    return "|".join((tags or {}).get(column) or "" for column in TAG_COLUMNS)
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        yield values[start:start + IN_CHUNK_SIZE]
+
+
+def _ids_by_link(links):
+    """Map catalog links to job ids."""
+    ids = {}
+    for chunk in _chunks(links):
+        ids.update(db.session.query(ScrapedJob.link, ScrapedJob.id).filter(ScrapedJob.link.in_(chunk)))
+    return ids
+
+
+def save_catalog_batch(entries, user_id, seen_at, source="GradConnection", tags=None):
+    """
+    Upsert a batch of scraped jobs into the catalog and record that the user's scrape found them.
+
+    Jobs already in the catalog (by link) are updated in place; new jobs are bulk inserted with the user as
+    their first scraper (and the scrape's tags). The inserts are upserts, so scrapes running at the same time
+    can save the same new job. The filters a job is listed under are recorded on the user's sighting only,
+    so a job keeps matching every filter any scrape found it under. Does not commit.
+
+    Args:
+        entries (list[dict]): Column values per job (see scraper_GC_jobs_detailed.job_columns), each with a
+            'link'. Entries marked 'unchanged' only carry the columns to refresh, and are skipped if the job
+            is not in the catalog.
+        user_id (int): The user whose scrape found the jobs.
+        seen_at (datetime): When the jobs were seen.
+        source (str): Source label for new jobs.
+        tags (dict, optional): tag_jobtype, tag_location and tag_category of the scrape's filters.
+
+    Returns:
+        dict: Link to catalog job id for every job saved.
+    """
+    tags = tags or {}
+    key = sighting_key(tags)
+    latest = {entry["link"]: dict(entry) for entry in entries if entry.get("link")}
+    rows = {}
+    for chunk in _chunks(latest):
+        rows.update((row.link, row) for row in ScrapedJob.query.filter(ScrapedJob.link.in_(chunk)))
+
+    new_rows = []
+    for link, values in latest.items():
+        unchanged = values.pop("unchanged", False)
+        row = rows.get(link)
+        if row is None:
+            if not unchanged:
+                new_rows.append(dict(values, **tags, user_id=user_id, source=source))
+            continue
+        for column, value in values.items():
+            setattr(row, column, value)
+    if new_rows:
+        keep = ("user_id", "source") + tuple(tags)  # a job saved by another scrape meanwhile keeps its own
+        db.session.execute(_upsert(ScrapedJob, ["link"], new_rows[0], keep=keep), new_rows)
+
+    ids = _ids_by_link(latest)
+    sightings = {}
+    for chunk in _chunks(ids.values()):
+        sightings.update((sighting.job_id, sighting) for sighting in UserScrapedJob.query.filter(
+            UserScrapedJob.user_id == user_id, UserScrapedJob.filter_key == key, UserScrapedJob.job_id.in_(chunk)))
+    new_sightings = []
+    for job_id in ids.values():
+        sighting = sightings.get(job_id)
+        if sighting is None:
+            new_sightings.append(dict(tags, user_id=user_id, job_id=job_id, filter_key=key,
+                                      first_seen=seen_at, last_seen=seen_at))
+        else:
+            sighting.last_seen = seen_at
+    if new_sightings:
+        db.session.execute(_upsert(UserScrapedJob, SIGHTING_KEY_COLUMNS, new_sightings[0], keep=("first_seen",)),
+                           new_sightings)
+    return ids
+
+
+def copy_sightings(source_user_id, user_ids, seen_since, tags=None):
+    """
+    Record for other users the jobs a user's scrape found, e.g. for users who joined that scrape instead of
+    scraping the same filters themselves. Does not commit.
+
+    Args:
+        source_user_id (int): The user whose scrape found the jobs.
+        user_ids (list[int]): The users to record the sightings for.
+        seen_since (datetime): Only copy jobs seen since this time (when the scrape started).
+        tags (dict, optional): tag_jobtype, tag_location and tag_category of the scrape's filters (only its
+            sightings under these filters are copied; all of them if None).
+
+    Returns:
+        int: The number of sightings copied per user.
+    """
+    query = db.session.query(UserScrapedJob).filter(
+        UserScrapedJob.user_id == source_user_id, UserScrapedJob.last_seen >= seen_since)
+    if tags is not None:
+        query = query.filter(UserScrapedJob.filter_key == sighting_key(tags))
+    seen = query.all()
+    rows = [{"user_id": user_id, "job_id": sighting.job_id, "filter_key": sighting.filter_key,
+             **{column: getattr(sighting, column) for column in TAG_COLUMNS},
+             "first_seen": sighting.last_seen, "last_seen": sighting.last_seen}
+            for user_id in user_ids if user_id != source_user_id for sighting in seen]
+    if rows:
+        db.session.execute(_upsert(UserScrapedJob, SIGHTING_KEY_COLUMNS, rows[0], keep=("first_seen",)), rows)
+    return len(seen)
+
+
+def _upsert(model, conflict_columns, row, keep=()):
+    """
+    Build a bulk INSERT that updates the existing row instead when it conflicts on a unique index.
+
+    Args:
+        model: The model to insert into.
+        conflict_columns (list[str]): Columns of the unique index.
+        row (dict): A row of the batch (all rows must have the same keys).
+        keep (tuple[str]): Columns the existing row keeps (e.g. who first scraped a job).
+
+    Returns:
+        sqlalchemy.sql.Insert: The statement, to execute with the batch of rows.
+    """
+    statement = sqlite_insert(model)
+    return statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={column: statement.excluded[column] for column in row
+              if column not in conflict_columns and column not in keep},
+    )
+
+
+def remove_stale_sightings(user_id, seen_links, source=None, tags=None):
+    """
+    Forget the jobs a user's previous scrape found that the latest scrape (with the same filters) did not.
+
+    Catalog jobs that are then no longer seen by anyone, and that no job application refers to, are deleted.
+    Does not commit.
+
+    Args:
+        user_id (int): The user who scraped.
+        seen_links (set[str]): Links found by the latest scrape.
+        source (str, optional): Only consider jobs from this source.
+        tags (dict, optional): Only consider sightings made with these filters.
+
+    Returns:
+        int: The number of sightings removed.
+    """
+    query = UserScrapedJob.query.join(ScrapedJob).filter(UserScrapedJob.user_id == user_id)
+    if tags is not None:
+        query = query.filter(UserScrapedJob.filter_key == sighting_key(tags))
+    if source is not None:
+        query = query.filter(ScrapedJob.source == source)
+    stale = [sighting for sighting in query if sighting.job.link not in seen_links]
+    job_ids = {sighting.job_id for sighting in stale}
+    for sighting in stale:
+        db.session.delete(sighting)
+    db.session.flush()
+    for chunk in _chunks(job_ids):
+        for job in ScrapedJob.query.filter(ScrapedJob.id.in_(chunk),
+                                           ~ScrapedJob.sightings.any(), ~ScrapedJob.applications.any()):
+            db.session.delete(job)
+    return len(stale)
+
+
+def collapse_duplicate_jobs(connection, debug=False):
+    """
+    Collapse per-user copies of the same job into one catalog row per canonical link.
+
+    For each link the most recently scraped copy is kept (its details are the freshest). Every copy's user
+    gets a sighting of the kept row, job applications are re-pointed to it, and the other copies are deleted.
+    Safe to run multiple times.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): Connection inside the caller's transaction.
+        debug (bool): If True, prints a summary.
+
+    Returns:
+        int: The number of duplicate rows removed.
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table(ScrapedJob.__tablename__):
+        return 0
+    jobs, sightings, applications = ScrapedJob.__table__, UserScrapedJob.__table__, JobApplication.__table__
+    sightings.create(connection, checkfirst=True)
+
+    groups = defaultdict(list)
+    for row in connection.execute(select(jobs.c.id, jobs.c.link, jobs.c.user_id, jobs.c.tag_jobtype,
+                                         jobs.c.tag_location, jobs.c.tag_category, jobs.c.last_seen)
+                                  .order_by(jobs.c.id)):
+        groups[canonical_link(row.link) if row.link else ("no-link", row.id)].append(row)
+
+    existing = {(row.user_id, row.job_id) for row in connection.execute(select(sightings.c.user_id, sightings.c.job_id))}
+    new_sightings = {}
+    removed = 0
+    for link, group in groups.items():
+        keep = group[-1]
+        for row in group:  # later copies overwrite earlier ones, so each user keeps their latest filters
+            key = (row.user_id, keep.id)
+            if key in existing:
+                continue
+            first_seen = new_sightings[key]["first_seen"] if key in new_sightings else row.last_seen
+            tags = {column: getattr(row, column) for column in TAG_COLUMNS}
+            new_sightings[key] = dict(tags, user_id=row.user_id, job_id=keep.id, filter_key=sighting_key(tags),
+                                      first_seen=first_seen, last_seen=row.last_seen)
+        duplicates = [row.id for row in group[:-1]]
+        for chunk in _chunks(duplicates):
+            connection.execute(update(applications).where(applications.c.scraped_job_id.in_(chunk))
+                               .values(scraped_job_id=keep.id))
+            connection.execute(delete(jobs).where(jobs.c.id.in_(chunk)))
+        removed += len(duplicates)
+        if isinstance(link, str) and keep.link != link:
+            connection.execute(update(jobs).where(jobs.c.id == keep.id).values(link=link))
+    if new_sightings:
+        connection.execute(insert(sightings), list(new_sightings.values()))
+    # Superseded by the unique uq_scraped_job_link index
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_scraped_job_link")
+    if debug and (removed or new_sightings):
+        print(f"[CATALOG] collapsed {removed} duplicate jobs, recorded {len(new_sightings)} sightings")
+    return removed
+
+
+def key_sightings_by_filters(connection, debug=False):
+    """
+    Move sightings from one per user and job to one per user, job and set of filters.
+
+    Fills in the filter_key of sightings recorded before it existed, and drops the indexes the new unique
+    key replaces (including the one on the scraped jobs' own tags, which are no longer filtered on). Safe to
+    run multiple times.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): Connection inside the caller's transaction.
+        debug (bool): If True, prints a summary.
+
+    Returns:
+        int: The number of sightings updated.
+    """
+    if not inspect(connection).has_table(UserScrapedJob.__tablename__):
+        return 0
+    sightings = UserScrapedJob.__table__
+    parts = [func.coalesce(sightings.c[column], "") for column in TAG_COLUMNS]
+    key = parts[0] + "|" + parts[1] + "|" + parts[2]  # as sighting_key
+    updated = connection.execute(update(sightings).where(sightings.c.filter_key.is_(None))
+                                 .values(filter_key=key)).rowcount
+    # Superseded by uq_user_scraped_job_filters and ix_user_scraped_job_tag_jobs
+    for index in ("uq_user_scraped_job", "ix_user_scraped_job_tags", "ix_scraped_job_tags"):
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+    if debug and updated:
+        print(f"[CATALOG] keyed {updated} sightings by their filters")
+    return updated
+
+
+if __name__ == "__main__":
+    from app import create_app
+    from app.utils.db_upgrade import upgrade_schema
+    with create_app().app_context():
+        db.create_all()
+        # Collapses duplicates before creating the unique link index
+        print(f"[SUMMARY] Applied {upgrade_schema(debug=True)} schema changes")
@@ -0,0 +1,187 @@
+import heapq
+import math
+import re
+import threading
+from flask import current_app
+from sqlalchemy import func
+from app.models import db, ScrapedJob
+from app.utils.job_catalog import IN_CHUNK_SIZE
+
+"""
+Resume-to-job matching engine.
+
+Jobs are indexed once as sparse TF-IDF vectors (an inverted index: term -> {job id: weight}), and a resume is
+scored against every job in a single pass over the posting lists of the resume's terms, i.e. one sparse
+matrix-vector product, after which the true top-k are selected with a heap. The cost of a match grows with
+the postings of the resume's terms, not with the size of the catalog times the number of keywords, and
+results do not depend on the order of the table.
+
+Weighting follows the SMART lnc.ltc scheme: job vectors use log term frequencies, cosine normalized, without
+IDF, so a job's vector never changes when other jobs are added; the IDF is applied to the (short) resume
+vector at query time instead. That lets the index be refreshed incrementally: each match first indexes jobs
+scraped or re-scraped since the last refresh and drops deleted ones.
+"""
+
+# Words too common in resumes and job ads to say anything about the fit
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our the their this to was we were will with
+you your who which that they all also any can more other per such than these those into over out
+""".split())
+
+TITLE_WEIGHT = 3    # A job's title counts as this many mentions of its words
+KEYWORD_WEIGHT = 3  # The AI-suggested job titles count as this many mentions in the resume
+
+
+def tokenize(text):
+    """
+    Split text into lowercase terms, dropping stop words and single characters.
+
+    Args:
+        text (str | None): The text.
+
+    Returns:
+        list[str]: The terms, in order.
+    """
+    return [word for word in re.findall(r"[a-z0-9+#]+", (text or "").lower())
+            if len(word) > 1 and word not in STOP_WORDS]
+
+
+def _counts(weighted_texts):
+    """Count terms over (text, weight) pairs."""
+    counts = {}
+    for text, weight in weighted_texts:
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + weight
+    return counts
+
+
+def _log_weights(counts):
+    """Log term frequencies (1 + ln tf) of a term count dict."""
+    return {term: 1.0 + math.log(count) for term, count in counts.items()}
+
+
+class MatchIndex:
+    """
+    Incrementally maintained TF-IDF index of scraped jobs.
+
+    Attributes:
+        synced_at (datetime | None): Latest 'last_seen' of the indexed jobs; jobs seen after it are re-indexed.
+    """
+
+    def __init__(self):
+        self.synced_at = None
+        self._postings = {}   # term -> {job id: normalized log tf}
+        self._doc_terms = {}  # job id -> terms of the job
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, job_id, title, text):
+        """
+        Index (or re-index) a job.
+
+        Args:
+            job_id (int): The job's id.
+            title (str): The job title (weighted TITLE_WEIGHT times).
+            text (str): The rest of the job's text, e.g. its precomputed search document.
+        """
+        self.remove(job_id)
+        weights = _log_weights(_counts(((title, TITLE_WEIGHT), (text, 1))))
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        if not norm:
+            return
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[job_id] = weight / norm
+        self._doc_terms[job_id] = tuple(weights)
+
+    def remove(self, job_id):
+        """
+        Remove a job from the index; unknown ids are ignored.
+
+        Args:
+            job_id (int): The job's id.
+        """
+        for term in self._doc_terms.pop(job_id, ()):
+            postings = self._postings[term]
+            del postings[job_id]
+            if not postings:
+                del self._postings[term]
+
+    def refresh(self):
+        """
+        Bring the index up to date with the scraped_job table: index jobs that are new or were seen by a
+        scrape since the last refresh, and drop deleted jobs. Must be called inside an application context.
+
+        Returns:
+            int: The number of jobs (re-)indexed or removed.
+        """
+        with self._lock:
+            ids = {job_id for job_id, in db.session.query(ScrapedJob.id)}
+            gone = [job_id for job_id in self._doc_terms if job_id not in ids]
+            for job_id in gone:
+                self.remove(job_id)
+            changed = ids.difference(self._doc_terms)
+            if self.synced_at is not None:
+                # '>=': jobs committed later with the same timestamp are not missed (a few are re-indexed)
+                changed.update(job_id for job_id, in db.session.query(ScrapedJob.id)
+                               .filter(ScrapedJob.last_seen >= self.synced_at))
+            changed = sorted(changed)
+            for start in range(0, len(changed), IN_CHUNK_SIZE):
+                for job_id, title, company, search_text in db.session.query(
+                        ScrapedJob.id, ScrapedJob.title, ScrapedJob.company, ScrapedJob.search_text
+                ).filter(ScrapedJob.id.in_(changed[start:start + IN_CHUNK_SIZE])):
+                    self.add(job_id, title, search_text or company)
+            latest = db.session.query(func.max(ScrapedJob.last_seen)).scalar()
+            if latest is not None:
+                self.synced_at = latest
+            return len(gone) + len(changed)
+
+    def top_k(self, keywords=(), text="", k=20):
+        """
+        Score every indexed job against a resume and return the best k.
+
+        Args:
+            keywords (list[str]): Job titles suggested for the resume (weighted KEYWORD_WEIGHT times).
+            text (str): The resume's text.
+            k (int): Number of jobs to return.
+
+        Returns:
+            list[tuple[int, float]]: (job id, cosine similarity) of the k best matching jobs, best first
+            (ties broken by lower id); jobs sharing no term with the resume are never returned.
+        """
+        counts = _counts([(keyword, KEYWORD_WEIGHT) for keyword in keywords] + [(text, 1)])
+        with self._lock:
+            total = len(self._doc_terms)
+            query = {}
+            for term, weight in _log_weights(counts).items():
+                postings = self._postings.get(term)
+                if postings:  # terms no job has cannot change the ranking
+                    query[term] = weight * math.log(1 + total / len(postings))
+            norm = math.sqrt(sum(weight * weight for weight in query.values()))
+            # Sparse matrix-vector product, one posting list per resume term
+            scores = {}
+            for term, weight in query.items():
+                for job_id, job_weight in self._postings[term].items():
+                    scores[job_id] = scores.get(job_id, 0.0) + weight * job_weight
+        if not scores:
+            return []
+        best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(job_id, score / norm) for job_id, score in best]
+
+
+def get_match_index():
+    """
+    Get the application's job match index (stored in app.extensions so each app instance has its own),
+    refreshed with the jobs scraped since it was last used.
+
+    Returns:
+        MatchIndex: The up-to-date index.
+    """
+    index = current_app.extensions.get("job_match_index")
+    if index is None:
+        index = current_app.extensions.setdefault("job_match_index", MatchIndex())
+    changed = index.refresh()
+    if changed and current_app.config.get('DEBUG', False):
+        print(f"[MATCH] indexed {changed} changed jobs ({len(index)} in total)")
+    return index
@@ -0,0 +1,365 @@
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import openai
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db, KeywordExtraction
+from app.utils.cache import LRUCache
+
+"""
+Keyword extraction service: suggests job titles for resume text using a language model.
+
+One service per application holds a single OpenAI client (whose HTTP connection pool is reused by every
+request), bounds how many model requests are in flight at once, and gives each request a timeout and a few
+retries. Responses are cached by (model, prompt version, text hash), in memory and in the KeywordExtraction
+table, so the same resume text is never sent to the model twice, even across restarts. Bump PROMPT_VERSION
+whenever the prompt changes, so answers to the old prompt are not reused.
+
+The backend is pluggable: KEYWORD_BACKEND = 'fake' swaps the model for a local stand-in with configurable
+latency, so throughput and latency of the pipeline can be measured offline:
+
+Usage:
+    python -m app.utils.keyword_service --requests 200 --threads 16 --latency 0.2
+"""
+
+PROMPT_VERSION = 1
+
+
+class KeywordServiceBusy(TimeoutError):
+    """Raised when no model request slot frees up within the timeout."""
+
+
+def build_messages(text):
+    """
+    Build the chat prompt asking for job titles that fit a resume.
+
+    Args:
+        text (str): The resume text.
+
+    Returns:
+        list[dict]: The chat messages.
+    """
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a helpful career advisor AI. "
+                "When given a resume, you suggest job titles that fit the candidate's university studies. "
+                "Only output job titles as instructed."
+            )
+        },
+        {
+            "role": "user",
+            "content": (
+                "Based on the following resume text, suggest exactly 6 real-world job titles that would be a good fit for this candidate. The last one should one word and very general such as 'engineering', 'software' or 'consulting'. "
+                "Each job title should be a real job title (max 3 words each), and ONLY contain letters and spaces, no numbers or special characters. "
+                "Output only a comma-separated list of job titles, with no explanation or extra text.\n\n"
+                f"{text}"
+            )
+        }
+    ]
+
+
+def parse_keywords(content):
+    """
+    Parse the model's answer into a list of job titles.
+
+    Args:
+        content (str): The answer, normally a comma-separated list.
+
+    Returns:
+        list[str]: The job titles.
+    """
+    keywords_str = (content or "").strip()
+    # Try to split by comma first for standard output
+    keywords = [kw.strip() for kw in keywords_str.split(",") if kw.strip()]
+    # If only one keyword and it looks like a numbered list, split by regex as a fallback
+    if len(keywords) == 1 and re.search(r"\d+\. ", keywords[0]):
+        keywords = re.split(r"\d+\. ?", keywords[0])
+        keywords = [kw.strip() for kw in keywords if kw.strip()]
+    return keywords
+
+
+class OpenAIBackend:
+    """
+    Asks an OpenAI chat model, through one client shared by all requests.
+
+    Attributes:
+        api_key (str | None): The OpenAI API key (None reads OPENAI_API_KEY from the environment).
+        timeout (float): Seconds per request.
+        max_retries (int): Retries of failed requests (with the client's backoff).
+    """
+
+    def __init__(self, api_key=None, timeout=30, max_retries=2):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """The shared client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = openai.OpenAI(api_key=self.api_key, timeout=self.timeout,
+                                                 max_retries=self.max_retries)
+        return self._client
+
+    def extract(self, text, model):
+        """
+        Ask the model for job titles fitting a resume.
+
+        Args:
+            text (str): The resume text.
+            model (str): The model to use.
+
+        Returns:
+            list[str]: The suggested job titles.
+        """
+        # The prompt asks for a short, strictly formatted answer, so it is cheap to parse
+        response = self.client.chat.completions.create(model=model, messages=build_messages(text), max_tokens=50)
+        return parse_keywords(response.choices[0].message.content)
+
+
+class FakeBackend:
+    """
+    Offline stand-in for the model: answers after a fixed delay with titles made from the text's most
+    frequent words. Deterministic, so cached and uncached answers agree.
+
+    Attributes:
+        latency (float): Seconds each request takes.
+        calls (int): Number of requests answered.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def extract(self, text, model):
+        """Answer like the model would, without calling it (see OpenAIBackend.extract)."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+        words = [word for word in re.findall(r"[a-z]+", (text or "").lower()) if len(word) > 3]
+        common = [word for word, _ in Counter(words).most_common(6)]
+        return [f"{word.title()} Analyst" for word in common[:5]] + [word.title() for word in common[5:]]
+
+
+class KeywordService:
+    """
+    Cached, concurrency-limited access to a keyword extraction backend.
+
+    Attributes:
+        backend: OpenAIBackend, FakeBackend or any object with an extract(text, model) method.
+        model (str): The default model.
+        timeout (float): Seconds to wait for a free request slot before giving up.
+        persist (bool): Whether responses are also cached in the KeywordExtraction table (needs an
+            application context).
+    """
+
+    def __init__(self, backend, model="gpt-3.5-turbo", concurrency=4, timeout=30, cache_size=512, persist=True):
+        self.backend = backend
+        self.model = model
+        self.timeout = timeout
+        self.persist = persist
+        self.cache = LRUCache(max_entries=cache_size, ttl=None)
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Event set when the backend has answered
+        self.requests = 0
+        self.stored_hits = 0
+        self.backend_calls = 0
+        self.backend_seconds = 0.0
+
+    def extract(self, text, model=None):
+        """
+        Get the job titles suggested for a resume text, asking the backend only if no cached answer exists.
+
+        Answers are stored in the caller's database session (committed with it). Empty answers are not
+        cached, so the next request asks again. Identical requests made at the same time share one backend
+        request.
+
+        Args:
+            text (str): The resume text.
+            model (str, optional): The model to use (defaults to the service's model).
+
+        Returns:
+            list[str]: The suggested job titles.
+
+        Raises:
+            KeywordServiceBusy: If all request slots (or an identical request's answer) take longer than the
+                timeout.
+        """
+        model = model or self.model
+        text_hash = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+        key = (model, PROMPT_VERSION, text_hash)
+        with self._lock:
+            self.requests += 1
+        while True:
+            cached = self._lookup(key)
+            if cached is not None:
+                return list(cached)
+            # Identical requests arriving together wait for the first one's answer instead of repeating it
+            with self._lock:
+                answered = self._inflight.get(key)
+                if answered is None:
+                    answered = self._inflight[key] = threading.Event()
+                    break
+            # Then look again (if the first request failed or got no answer, this one asks instead)
+            if not answered.wait(self.timeout):
+                raise KeywordServiceBusy(f"no keyword extraction answer within {self.timeout}s")
+        try:
+            return self._ask(key, text)
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is answered:
+                    del self._inflight[key]
+            answered.set()
+
+    def _lookup(self, key):
+        """Find a cached answer in memory, then in the database."""
+        cached = self.cache.get(key)
+        if cached is None and self.persist:
+            model, prompt_version, text_hash = key
+            stored = KeywordExtraction.query.filter_by(model=model, prompt_version=prompt_version,
+                                                       text_hash=text_hash).first()
+            if stored is not None:
+                cached = tuple(json.loads(stored.keywords))
+                self.cache.put(key, cached)
+                with self._lock:
+                    self.stored_hits += 1
+        return cached
+
+    def _ask(self, key, text):
+        """Ask the backend (once a request slot is free) and cache a non-empty answer."""
+        model, prompt_version, text_hash = key
+        if not self._slots.acquire(timeout=self.timeout):
+            raise KeywordServiceBusy(f"no keyword extraction slot free within {self.timeout}s")
+        started = time.monotonic()
+        try:
+            keywords = self.backend.extract(text, model)
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.backend_calls += 1
+                self.backend_seconds += time.monotonic() - started
+        if keywords:
+            self.cache.put(key, tuple(keywords))
+            if self.persist:
+                # Another process may have stored the same answer meanwhile
+                db.session.execute(sqlite_insert(KeywordExtraction).values(
+                    model=model, prompt_version=prompt_version, text_hash=text_hash,
+                    keywords=json.dumps(keywords)).on_conflict_do_nothing())
+        return keywords
+
+    def stats(self):
+        """
+        Report how requests were served.
+
+        Returns:
+            dict: Requests, memory and database cache hits, backend calls and their mean latency in seconds.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "memory_hits": self.cache.hits,
+                "stored_hits": self.stored_hits,
+                "backend_calls": self.backend_calls,
+                "backend_latency": self.backend_seconds / self.backend_calls if self.backend_calls else 0.0,
+            }
+
+
+def create_backend(name, config):
+    """
+    Create the keyword backend named by KEYWORD_BACKEND.
+
+    Args:
+        name (str): 'openai' or 'fake'.
+        config (dict): The application config.
+
+    Returns:
+        OpenAIBackend | FakeBackend: The backend.
+    """
+    if name == "fake":
+        return FakeBackend(latency=config.get("KEYWORD_FAKE_LATENCY", 0.0))
+    if name == "openai":
+        return OpenAIBackend(timeout=config.get("KEYWORD_TIMEOUT", 30),
+                             max_retries=config.get("KEYWORD_MAX_RETRIES", 2))
+    raise ValueError(f"Unknown keyword backend: {name}")
+
+
+def get_keyword_service():
+    """
+    Get the application's keyword service (stored in app.extensions so each app instance has its own).
+
+    Returns:
+        KeywordService: The service, configured by the KEYWORD_* settings.
+    """
+    service = current_app.extensions.get("keyword_service")
+    if service is None:
+        config = current_app.config
+        service = current_app.extensions.setdefault("keyword_service", KeywordService(
+            create_backend(config.get("KEYWORD_BACKEND", "openai"), config),
+            model=config.get("KEYWORD_MODEL", "gpt-3.5-turbo"),
+            concurrency=config.get("KEYWORD_CONCURRENCY", 4),
+            timeout=config.get("KEYWORD_TIMEOUT", 30),
+            cache_size=config.get("KEYWORD_CACHE_SIZE", 512),
+        ))
+    return service
+
+
+def benchmark(service, texts, threads=8):
+    """
+    Send texts through a service from several threads and measure throughput and latency.
+
+    Args:
+        service (KeywordService): The service to measure.
+        texts (list[str]): Resume texts, one request each (repeats exercise the cache).
+        threads (int): Number of concurrent callers.
+
+    Returns:
+        dict: Requests, elapsed seconds, requests per second and median/95th percentile latency (seconds),
+        plus the service's stats.
+    """
+    def timed(text):
+        started = time.monotonic()
+        service.extract(text)
+        return time.monotonic() - started
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = sorted(pool.map(timed, texts))
+    elapsed = time.monotonic() - started
+    return dict({
+        "requests": len(texts),
+        "seconds": elapsed,
+        "throughput": len(texts) / elapsed if elapsed else 0.0,
+        "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }, **service.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark keyword extraction against the fake backend")
+    parser.add_argument("--requests", type=int, default=200, help="number of requests")
+    parser.add_argument("--unique", type=int, default=50, help="number of distinct resume texts")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent callers")
+    parser.add_argument("--concurrency", type=int, default=4, help="backend requests in flight at once")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per backend request")
+    args = parser.parse_args()
+    fake = KeywordService(FakeBackend(latency=args.latency), concurrency=args.concurrency, persist=False)
+    sample = [f"resume {i}: python data analysis statistics engineering software {i % 7}"
+              for i in range(args.unique)]
+    result = benchmark(fake, [sample[i % len(sample)] for i in range(args.requests)], threads=args.threads)
+    print("[BENCHMARK] " + ", ".join(f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                                     for name, value in result.items()))
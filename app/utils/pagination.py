@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+
+"""
+Opaque cursors for keyset (seek) pagination.
+
+A cursor records the sort key of the last row on a page, so the next page is fetched with a
+'WHERE (key) > (last key)' predicate and a LIMIT instead of OFFSET. Rows before the cursor are not read
+again (when the ordering is indexed, the database seeks straight to the cursor; a computed ordering such as
+a relevance score is still evaluated for every match, but only the page's rows are kept), and rows inserted
+while a client is paging do not shift later pages. Cursors are base64-encoded JSON, and are meant to be
+passed back unmodified by clients.
+"""
+
+
+def encode_cursor(*values):
+    """
+    Encode the sort key of the last row of a page as an opaque cursor string.
+
+    Args:
+        *values: The sort key values (datetimes, numbers, strings or None), in ORDER BY order.
+
+    Returns:
+        str: A URL-safe cursor string.
+    """
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor string from the client.
+        size (int): The expected number of sort key values.
+
+    Returns:
+        list: The sort key values, with datetimes restored.
+
+    Raises:
+        ValueError: If the cursor is malformed or has the wrong number of values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in payload]
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(payload, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
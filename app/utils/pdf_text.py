@@ -0,0 +1,155 @@
+import io
+import os
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from concurrent.futures.process import BrokenProcessPool
+import pypdf
+
+"""
+Budgeted, page-parallel text extraction from PDF files.
+
+Only the first max_pages pages of a PDF are read, files larger than max_bytes are refused, and extraction
+stops at a deadline, so an oversized or pathological resume cannot hold a worker for long. Documents with
+many pages, when given as a file on disk, are split into page ranges extracted by a pool of worker processes
+(pypdf is pure Python, so threads would not run in parallel); each worker opens the file itself, so the
+document is never copied between processes. Page texts are collected in a list and joined once.
+
+Workers only run extract_pages, which needs nothing but pypdf and the path of the file.
+"""
+
+# Pages per task sent to a worker process
+PAGES_PER_TASK = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(processes):
+    """Get the shared process pool, creating it with the given number of processes on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn': forking a multi-threaded web server could copy locks held by other threads
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the worker processes (a new pool is started on next use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def extract_pages(source, start, stop):
+    """
+    Extract the text of a range of pages, timing each page.
+
+    Args:
+        source (str | bytes | file-like): Path to the PDF, or its data.
+        start (int): Index of the first page.
+        stop (int): Index after the last page.
+
+    Returns:
+        list[tuple[str, float]]: (text, seconds) per page.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    reader = pypdf.PdfReader(source)
+    pages = []
+    for index in range(start, min(stop, len(reader.pages))):
+        started = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        pages.append((text, time.perf_counter() - started))
+    return pages
+
+
+def extract_pdf_text(source, max_pages=None, max_bytes=None, processes=0, parallel_min_pages=8, timeout=None):
+    """
+    Extract the text of a PDF within a page, size and time budget.
+
+    Args:
+        source (str | bytes | file-like): Path to the PDF (required for parallel extraction), or its data.
+        max_pages (int, optional): Only the first max_pages pages are extracted.
+        max_bytes (int, optional): Files larger than this are not read at all.
+        processes (int): Worker processes for documents with at least parallel_min_pages pages (0 to always
+            extract in the calling process).
+        parallel_min_pages (int): Smallest number of pages worth the overhead of the process pool.
+        timeout (float, optional): Seconds after which extraction stops with the pages done so far.
+
+    Returns:
+        dict: 'text' (pages joined by newlines), 'pages' (number extracted), 'total_pages', 'timings'
+        (seconds per extracted page) and 'truncated' (True if a budget cut the extraction short).
+    """
+    result = {"text": "", "pages": 0, "total_pages": 0, "timings": [], "truncated": False}
+    if max_bytes is not None:
+        if isinstance(source, (str, os.PathLike)):
+            size = os.path.getsize(source)
+        elif isinstance(source, bytes):
+            size = len(source)
+        else:
+            size = source.seek(0, io.SEEK_END)
+            source.seek(0)
+        if size > max_bytes:
+            result["truncated"] = True
+            return result
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    deadline = time.monotonic() + timeout if timeout else None
+    reader = pypdf.PdfReader(source)
+    total = len(reader.pages)
+    wanted = min(total, max_pages) if max_pages else total
+    result["total_pages"] = total
+    pages = None
+    if processes and wanted >= parallel_min_pages and isinstance(source, (str, os.PathLike)):
+        pages = _extract_parallel(source, wanted, processes, deadline)
+    if pages is None:
+        pages = []
+        for index in range(wanted):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            started = time.perf_counter()
+            text = reader.pages[index].extract_text() or ""
+            pages.append((text, time.perf_counter() - started))
+    result["text"] = "\n".join(text for text, _ in pages) + ("\n" if pages else "")
+    result["pages"] = len(pages)
+    result["timings"] = [seconds for _, seconds in pages]
+    result["truncated"] = len(pages) < total
+    return result
+
+
+def _extract_parallel(path, page_count, processes, deadline):
+    """
+    Extract pages in the process pool, in page ranges of PAGES_PER_TASK.
+
+    Returns:
+        list[tuple[str, float]] | None: (text, seconds) of the leading pages finished by the deadline, or
+        None if the pool is unavailable (the caller then extracts in-process).
+    """
+    try:
+        pool = _get_pool(processes)
+        futures = [pool.submit(extract_pages, os.fspath(path), start, min(start + PAGES_PER_TASK, page_count))
+                   for start in range(0, page_count, PAGES_PER_TASK)]
+    except (BrokenProcessPool, RuntimeError, OSError):
+        shutdown_pool()
+        return None
+    remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+    wait(futures, timeout=remaining, return_when=FIRST_EXCEPTION)
+    pages = []
+    for future in futures:
+        # Keep the text in page order: stop at the first range that is unfinished or failed
+        if not future.done() or future.cancelled() or future.exception() is not None:
+            break
+        pages.extend(future.result())
+    for future in futures:
+        future.cancel()
+    if any(isinstance(future.exception(), BrokenProcessPool) for future in futures
+           if future.done() and not future.cancelled()):
+        shutdown_pool()
+        return None
+    return pages
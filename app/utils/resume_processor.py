@@ -1,11 +1,16 @@
-import pypdf
 import docx2txt
-import re
 import json
-from collections import Counter
-import openai
-from app.utils.fuzzy_search import job_matches
-from app.models import ScrapedJob
+import string
+import hashlib
+import traceback
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from app.utils.cache import LRUCache
+from app.utils.keyword_service import OpenAIBackend, get_keyword_service
+from app.utils.job_matcher import get_match_index
+from app.utils.pdf_text import extract_pdf_text
+from app.models import db, ScrapedJob, ResumeAnalysis
 import io
 import os
 
@@ -15,6 +20,14 @@ Resume processing utilities for extracting and analyzing resume content.
 This module provides functions to extract text from PDF and DOCX resumes, interface with OpenAI for
 keyword/job title extraction, and support downstream matching of resumes to job listings. It is designed
 to be robust to different file types and to facilitate AI-driven resume analysis for job recommendation systems.
+
+Analyses are content-addressed: the SHA-256 of the uploaded bytes identifies a file, so re-uploading a file
+returns its extracted text and keywords from an in-memory LRU cache or a stored ResumeAnalysis instead of
+parsing it and calling the model again.
+
+Uploads are analysed in the background (submit_resume_analysis): the upload only records a pending
+ResumeAnalysis, and a small worker pool parses the file, calls the model and matches jobs, then stores the
+results on that row, which the job search page polls. Slow model responses never hold up a web worker.
 """
 
 OPENAI_MODEL = "gpt-3.5-turbo"
@@ -22,28 +35,34 @@ OPENAI_MODEL = "gpt-3.5-turbo"
 # The OpenAI API key should be set as an environment variable for security and flexibility.
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def extract_text_from_pdf(file_stream, debug=False):
+def extract_text_from_pdf(file_stream, debug=False, max_pages=None, max_bytes=None, processes=0,
+                          parallel_min_pages=8, timeout=None):
     """
     Extracts text content from a PDF file stream.
 
     Args:
-        file_stream (bytes or file-like): The PDF file data or stream.
-        debug (bool): If True, prints error messages for debugging.
+        file_stream (str, bytes or file-like): Path to the PDF file, or its data or stream.
+        debug (bool): If True, prints error messages and per-page timings for debugging.
+        max_pages (int, optional): Only the first max_pages pages are extracted.
+        max_bytes (int, optional): Larger files are not read (an empty string is returned).
+        processes (int): Worker processes extracting pages of long documents given as a path (0 for none).
+        parallel_min_pages (int): Smallest number of pages extracted in worker processes.
+        timeout (float, optional): Seconds after which extraction stops with the pages done so far.
 
     Returns:
         str: The extracted text from the PDF, or an empty string on failure.
 
-    This function uses the pypdf library to read and extract text from each page of the PDF.
-    It handles both bytes and file-like objects for flexibility in file uploads.
+    This function uses the pypdf library (see app.utils.pdf_text) to read and extract text from each page
+    of the PDF within the given page, size and time budget.
     """
     try:
-        if isinstance(file_stream, bytes):
-            file_stream = io.BytesIO(file_stream)
-        reader = pypdf.PdfReader(file_stream)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        result = extract_pdf_text(file_stream, max_pages=max_pages, max_bytes=max_bytes, processes=processes,
+                                  parallel_min_pages=parallel_min_pages, timeout=timeout)
+        if debug:
+            timings = result["timings"]
+            print(f"[RESUME] extracted {result['pages']}/{result['total_pages']} PDF pages in {sum(timings):.2f}s"
+                  f" (slowest page {max(timings, default=0):.2f}s){' - truncated' if result['truncated'] else ''}")
+        return result["text"]
     except Exception as e:
         if debug:
             print(f"Error extracting text from PDF: {e}")
@@ -54,7 +73,7 @@ def extract_text_from_docx(file_stream, debug=False):
     Extracts text content from a DOCX file stream.
 
     Args:
-        file_stream (bytes or file-like): The DOCX file data or stream.
+        file_stream (str, bytes or file-like): Path to the DOCX file, or its data or stream.
         debug (bool): If True, prints error messages for debugging.
 
     Returns:
@@ -73,14 +92,15 @@ def extract_text_from_docx(file_stream, debug=False):
             print(f"Error extracting text from DOCX: {e}")
         return ""
 
-def extract_text(file_stream, content_type, debug=False):
+def extract_text(file_stream, content_type, debug=False, **pdf_options):
     """
     Extracts text from a resume file based on its MIME content type.
 
     Args:
-        file_stream (bytes or file-like): The resume file data or stream.
+        file_stream (str, bytes or file-like): Path to the resume file, or its data or stream.
         content_type (str): The MIME type of the file (e.g., 'application/pdf').
         debug (bool): If True, prints error messages for debugging.
+        **pdf_options: Budget and parallelism options for PDFs (see extract_text_from_pdf).
 
     Returns:
         str: The extracted text from the file, or an empty string if unsupported type or failure.
@@ -88,7 +108,7 @@ def extract_text(file_stream, content_type, debug=False):
     This function delegates to the appropriate extraction function based on file type.
     """
     if "pdf" in content_type:
-        return extract_text_from_pdf(file_stream, debug=debug)
+        return extract_text_from_pdf(file_stream, debug=debug, **pdf_options)
     elif "docx" in content_type or "document" in content_type:
         return extract_text_from_docx(file_stream, debug=debug)
     return ""
@@ -100,48 +120,262 @@ def extract_keywords_openai(text, direction=None, model=None, api_key=None):
     Args:
         text (str): The resume text to analyze.
         direction (str, optional): Reserved for future prompt customization.
-        model (str, optional): The OpenAI model to use (defaults to OPENAI_MODEL).
+        model (str, optional): The OpenAI model to use (defaults to KEYWORD_MODEL, or OPENAI_MODEL outside the app).
         api_key (str, optional): The OpenAI API key (defaults to environment variable).
 
     Returns:
         list[str]: A list of job titles suggested by the AI, or an empty list on failure.
 
-    This function sends a carefully crafted prompt to the OpenAI API, requesting a comma-separated list
-    of real-world job titles that fit the candidate's background. It parses the response and returns the list.
-    """
-    model = model or OPENAI_MODEL
-    api_key = api_key or OPENAI_API_KEY
-    client = openai.OpenAI(api_key=api_key)
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a helpful career advisor AI. "
-                "When given a resume, you suggest job titles that fit the candidate's university studies. "
-                "Only output job titles as instructed."
-            )
-        },
-        {
-            "role": "user",
-            "content": (
-                "Based on the following resume text, suggest exactly 6 real-world job titles that would be a good fit for this candidate. The last one should one word and very general such as 'engineering', 'software' or 'consulting'. "
-                "Each job title should be a real job title (max 3 words each), and ONLY contain letters and spaces, no numbers or special characters. "
-                "Output only a comma-separated list of job titles, with no explanation or extra text.\n\n"
-                f"{text}"
-            )
+    Inside the app, requests go through the shared keyword service (see app.utils.keyword_service), which
+    reuses one client, caches answers by model, prompt version and text, and limits concurrent requests.
+    With an explicit API key, or outside an application context, the model is asked directly.
+    """
+    if api_key is None and has_app_context():
+        return get_keyword_service().extract(text, model=model)
+    return OpenAIBackend(api_key=api_key or OPENAI_API_KEY).extract(text, model or OPENAI_MODEL)
+
+class ResumeTooLarge(ValueError):
+    """Raised when an uploaded resume exceeds RESUME_MAX_BYTES."""
+
+def content_hash(source):
+    """
+    Identify a file by its content.
+
+    Args:
+        source (bytes | str): The file data, or the path of the file (read in chunks).
+
+    Returns:
+        str: The SHA-256 hex digest of the data.
+    """
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    with open(source, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def spool_upload(stream, max_bytes=None, chunk_size=64 * 1024):
+    """
+    Copy an uploaded file to a temporary file in chunks, hashing it on the way, so the upload never has to
+    be held in memory as a whole.
+
+    Args:
+        stream (file-like): The upload's stream (e.g. FileStorage.stream).
+        max_bytes (int, optional): Largest accepted size.
+        chunk_size (int): Bytes copied at a time.
+
+    Returns:
+        tuple: (path, content_hash) of the temporary file, which the caller must delete.
+
+    Raises:
+        ResumeTooLarge: If the upload is larger than max_bytes (nothing is left on disk).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    handle, path = tempfile.mkstemp(prefix="resume-", suffix=".upload")
+    try:
+        with os.fdopen(handle, "wb") as spooled:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ResumeTooLarge(f"resume larger than {max_bytes} bytes")
+                digest.update(chunk)
+                spooled.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+def pdf_budget():
+    """
+    Read the PDF extraction budget from the app config.
+
+    Returns:
+        dict: Options for extract_text_from_pdf (page, size and time limits and worker processes).
+    """
+    config = current_app.config
+    return {
+        "max_pages": config.get("RESUME_MAX_PAGES", 30),
+        "max_bytes": config.get("RESUME_MAX_BYTES"),
+        "processes": config.get("PDF_EXTRACT_PROCESSES", 0),
+        "parallel_min_pages": config.get("PDF_PARALLEL_MIN_PAGES", 8),
+        "timeout": config.get("PDF_EXTRACT_TIMEOUT"),
+    }
+
+def get_resume_cache():
+    """
+    Get the in-memory cache of resume analyses (stored in app.extensions so each app instance has its own).
+
+    Returns:
+        LRUCache: Maps content hashes to (raw_text, keywords), holding RESUME_CACHE_SIZE entries.
+    """
+    cache = current_app.extensions.get("resume_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault("resume_cache", LRUCache(
+            max_entries=current_app.config.get("RESUME_CACHE_SIZE", 128), ttl=None))
+    return cache
+
+def analyze_resume(source, content_type, debug=False, digest=None):
+    """
+    Extract a resume's text and AI-suggested job titles, reusing the analysis of an identical earlier upload.
+
+    Looks the content hash up in the in-memory cache, then in stored ResumeAnalysis rows, and only parses the
+    file and calls the model when neither has it. Analyses without keywords (e.g. the model call failed) are
+    not cached, so the next upload tries again.
+
+    Args:
+        source (bytes | str): The resume file data, or the path of the file.
+        content_type (str): The MIME type of the file.
+        debug (bool): If True, prints where the analysis came from.
+        digest (str, optional): The file's content hash, if already known.
+
+    Returns:
+        tuple: (content_hash, raw_text, keywords, cached) where keywords is a list of job titles and cached
+        is True if the analysis was reused.
+    """
+    digest = digest or content_hash(source)
+    cache = get_resume_cache()
+    cached = cache.get(digest)
+    if cached is None:
+        stored = ResumeAnalysis.query.filter(ResumeAnalysis.content_hash == digest,
+                                             ResumeAnalysis.keywords.isnot(None))\
+            .order_by(ResumeAnalysis.id.desc()).first()
+        if stored is not None and json.loads(stored.keywords):
+            cached = (stored.raw_text or "", tuple(json.loads(stored.keywords)))
+            cache.put(digest, cached)
+    if cached is not None:
+        if debug:
+            print(f"[RESUME] reusing analysis of {digest[:12]}")
+        return digest, cached[0], list(cached[1]), True
+
+    text = extract_text(source, content_type, debug=debug, **pdf_budget())
+    keywords = extract_keywords_openai(text)
+    keywords = [kw.strip().strip(string.punctuation) for kw in keywords if kw.strip()]
+    if keywords:
+        cache.put(digest, (text, tuple(keywords)))
+    if debug:
+        print(f"[RESUME] analyzed {digest[:12]}: {keywords}")
+    return digest, text, keywords, False
+
+def suggest_jobs(keywords, text="", limit=20, debug=False):
+    """
+    Find the scraped jobs that best match a resume.
+
+    Args:
+        keywords (list[str]): Job titles suggested for the resume.
+        text (str): The resume's text.
+        limit (int): Maximum number of jobs to return.
+        debug (bool): If True, prints each match.
+
+    Returns:
+        list[int]: IDs of the best matching jobs, best first.
+    """
+    if not keywords and not text:
+        return []
+    matches = get_match_index().top_k(keywords, text, k=limit)
+    if debug:
+        print(f"[DEBUG] Best matching jobs (id, score): {[(job_id, round(score, 3)) for job_id, score in matches]}")
+    return [job_id for job_id, _ in matches]
+
+def resume_suggestions(job_ids):
+    """
+    Load the suggested jobs of an analysis for display.
+
+    Args:
+        job_ids (list[int]): Job IDs, best first (jobs deleted since are skipped).
+
+    Returns:
+        list[dict]: Title, company, dates, link and tags of each job, in the given order.
+    """
+    jobs = {job.id: job for job in ScrapedJob.query.filter(ScrapedJob.id.in_(job_ids))} if job_ids else {}
+    return [{
+        'id': job.id,
+        'title': job.title,
+        'company': job.company or '',
+        'posted_date': job.posted_date,
+        'closing_in': job.closing_in,
+        'closing_date': job.closing_date.strftime('%Y-%m-%d') if job.closing_date else '',
+        'link': job.link,
+        'tags': {
+            'location': job.tag_location,
+            'jobtype': job.tag_jobtype,
+            'category': job.tag_category
         }
-    ]
-    # The OpenAI API is called with a strict prompt to ensure a clean, parseable response.
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        max_tokens=50 
-    )
-    keywords_str = response.choices[0].message.content.strip()
-    # Try to split by comma first for standard output
-    keywords = [kw.strip() for kw in keywords_str.split(",") if kw.strip()]
-    # If only one keyword and it looks like a numbered list, split by regex as a fallback
-    if len(keywords) == 1 and re.search(r"\d+\. ", keywords[0]):
-        keywords = re.split(r"\d+\. ?", keywords[0])
-        keywords = [kw.strip() for kw in keywords if kw.strip()]
-    return keywords
+    } for job in (jobs.get(job_id) for job_id in job_ids) if job is not None]
+
+def get_resume_executor():
+    """
+    Get the worker pool analysing uploaded resumes (stored in app.extensions so each app instance has its own).
+
+    Returns:
+        ThreadPoolExecutor | None: The pool, with RESUME_ANALYSIS_WORKERS threads, or None if that is 0.
+    """
+    workers = current_app.config.get("RESUME_ANALYSIS_WORKERS", 2)
+    if workers <= 0:
+        return None
+    executor = current_app.extensions.get("resume_executor")
+    if executor is None:
+        executor = current_app.extensions.setdefault("resume_executor", ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="resume-analysis"))
+    return executor
+
+def submit_resume_analysis(analysis_id, path, content_type):
+    """
+    Analyse an uploaded resume in the background, storing the results on its pending ResumeAnalysis.
+
+    Args:
+        analysis_id (int): ID of the committed ResumeAnalysis (status 'pending').
+        path (str): The spooled upload (see spool_upload); deleted once analysed.
+        content_type (str): The MIME type of the file.
+
+    Returns:
+        Future | None: The running analysis, or None if it already ran in the calling thread
+        (RESUME_ANALYSIS_WORKERS = 0).
+    """
+    app = current_app._get_current_object()
+    executor = get_resume_executor()
+    if executor is None:
+        run_resume_analysis(app, analysis_id, path, content_type)
+        return None
+    return executor.submit(run_resume_analysis, app, analysis_id, path, content_type)
+
+def run_resume_analysis(app, analysis_id, path, content_type):
+    """
+    Analyse a resume and store its text, keywords and suggested jobs on its ResumeAnalysis.
+
+    Args:
+        app (Flask): The application (the analysis runs in its own application context).
+        analysis_id (int): ID of the ResumeAnalysis to fill in.
+        path (str): The spooled upload, deleted afterwards.
+        content_type (str): The MIME type of the file.
+
+    Returns:
+        str | None: The analysis' final status ('done' or 'failed'), or None if it no longer exists.
+    """
+    with app.app_context():
+        try:
+            return _analyze_upload(analysis_id, path, content_type, app.config.get('DEBUG', False))
+        finally:
+            os.remove(path)
+
+def _analyze_upload(analysis_id, path, content_type, debug):
+    """Run the analysis of a spooled upload and record its outcome (see run_resume_analysis)."""
+    analysis = db.session.get(ResumeAnalysis, analysis_id)
+    if analysis is None:
+        return None
+    analysis.status = "processing"
+    db.session.commit()
+    try:
+        digest, text, keywords, cached = analyze_resume(path, content_type, debug=debug,
+                                                        digest=analysis.content_hash)
+        if debug:
+            print("[DEBUG] Extracted keywords:", keywords, "(cached)" if cached else "")
+        analysis.content_hash = digest
+        analysis.raw_text = text
+        analysis.keywords = json.dumps(keywords)
+        analysis.suggested_jobs = json.dumps(suggest_jobs(keywords, text, debug=debug))
+        analysis.status, analysis.error = "done", None
+    except Exception as exc:
+        traceback.print_exc()
+        db.session.rollback()
+        analysis.status, analysis.error = "failed", str(exc)
+    db.session.commit()
+    return analysis.status
@@ -0,0 +1,432 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from flask import current_app
+
+try:  # POSIX only; without it (e.g. on Windows) hold_server_lock does not enforce a single process
+    import fcntl
+except ImportError:
+    fcntl = None
+
+"""
+Publish/subscribe broker for streaming scrape progress to clients.
+
+Every scrape gets its own channel, identified by a random scrape id that /api/start-scraping returns to the
+client. Events published to a channel are fanned out to every subscriber of that channel only, so concurrent
+scrapes by different users never see (or end) each other's streams.
+
+Publishing never blocks the scraper: each subscriber has a bounded buffer, and when a slow client falls
+behind the oldest buffered events are dropped and the client is told how many it missed. The final event of
+a scrape is never dropped, and finished channels are kept for a while so that a client subscribing late
+still learns that the scrape completed.
+
+Each event carries an id that increases within its scrape, and each channel keeps its most recent events in
+a bounded ring buffer. A client that reconnects (EventSource does so automatically, sending the id of the
+last event it received as Last-Event-ID) is replayed just the events it missed.
+
+Subscribers can wait for events from a thread (Subscription.get) or from an asyncio event loop
+(Subscription.aget), so one event loop can hold many idle streams (see app/asgi.py). The same broker class
+also carries each user's live notifications, on a long-lived channel per user.
+
+Brokers live in the memory of the server process, so a scrape id can only be subscribed to in the process
+that started the scrape. The app must therefore be served by a single process (threads and one asyncio loop
+scale the streams instead); hold_server_lock refuses to start a second one.
+"""
+
+COMPLETE_EVENT = {"status": "complete"}
+
+
+class Subscription:
+    """
+    A client's view of a scrape channel, with its own bounded buffer of undelivered events.
+
+    Attributes:
+        dropped (int): Events dropped because the buffer was full and not yet reported to the client.
+    """
+
+    def __init__(self, channel, buffer_size):
+        self._channel = channel
+        self._buffer = deque()
+        self._buffer_size = max(1, int(buffer_size))
+        self._wakeup = None  # (event loop, asyncio.Event) of a waiting aget()
+        self.dropped = 0
+
+    def _push(self, event_id, event):
+        """Buffer an event, dropping the oldest one if the buffer is full. Called with the channel lock held."""
+        if len(self._buffer) >= self._buffer_size:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append((event_id, event))
+        self._wake()
+
+    def _wake(self):
+        """Wake a waiting aget() from any thread. Called with the channel lock held."""
+        if self._wakeup is not None:
+            loop, wakeup = self._wakeup
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:  # the event loop has been closed
+                pass
+
+    def get(self, timeout=None):
+        """
+        Wait for the next event.
+
+        Args:
+            timeout (float, optional): Seconds to wait (None waits until an event arrives).
+
+        Returns:
+            tuple | None: (event id, event) for the next event; (None, {'type': 'dropped', 'count': n}) if
+            events were dropped since the last call; the channel's final event once the scrape finished and
+            the buffer is drained; or None if the timeout expired.
+        """
+        channel = self._channel
+        with channel.condition:
+            channel.condition.wait_for(lambda: self._buffer or self.dropped or channel.final_event,
+                                       timeout=timeout)
+            if self.dropped:
+                count, self.dropped = self.dropped, 0
+                return None, {"type": "dropped", "count": count}
+            if self._buffer:
+                return self._buffer.popleft()
+            if channel.final_event is not None:
+                return channel.last_id, channel.final_event
+            return None
+
+    async def aget(self, timeout=None):
+        """
+        Wait for the next event without blocking the event loop (or any thread).
+
+        Args:
+            timeout (float, optional): Seconds to wait (None waits until an event arrives).
+
+        Returns:
+            tuple | None: Same as get().
+        """
+        wakeup = asyncio.Event()
+        with self._channel.condition:
+            # Registered before checking, so an event published right after the check still wakes us
+            self._wakeup = (asyncio.get_running_loop(), wakeup)
+            item = self.get(timeout=0)
+        try:
+            if item is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return None
+                item = self.get(timeout=0)
+            return item
+        finally:
+            with self._channel.condition:
+                self._wakeup = None
+
+    def close(self):
+        """Stop receiving events (call when the client disconnects)."""
+        with self._channel.condition:
+            if self in self._channel.subscribers:
+                self._channel.subscribers.remove(self)
+
+
+class Channel:
+    """
+    The events of one scrape.
+
+    Attributes:
+        scrape_id (str): The channel's id.
+        owner_id (int | None): The user who started the scrape (None for anonymous scrapes).
+        viewers (set | None): Users who may subscribe: the owner and users who joined the scrape
+            (None if anyone with the id may).
+        subscribers (list[Subscription]): Current subscribers.
+        final_event (dict | None): The last event, set once the scrape has finished.
+        finished_at (float | None): Monotonic time the scrape finished.
+        last_id (int): Id of the latest event (event ids start at 1).
+        history (deque): The most recent (event id, event) pairs, for replay to reconnecting clients.
+    """
+
+    def __init__(self, scrape_id, owner_id=None, history_size=500):
+        self.scrape_id = scrape_id
+        self.owner_id = owner_id
+        self.viewers = None if owner_id is None else {owner_id}
+        self.subscribers = []
+        self.last_id = 0
+        self.history = deque(maxlen=max(1, int(history_size)))
+        self.final_event = None
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    def allows(self, user_id):
+        """Whether a user (None if anonymous) may subscribe to the channel."""
+        return self.viewers is None or user_id in self.viewers
+
+
+class ScrapeBroker:
+    """
+    Thread-safe registry of scrape channels.
+
+    Attributes:
+        buffer_size (int): Events buffered per subscriber before the oldest are dropped.
+        retention (float): Seconds a finished channel is kept for late subscribers.
+        history_size (int): Recent events kept per channel for replay.
+    """
+
+    def __init__(self, buffer_size=256, retention=300, history_size=500):
+        self.buffer_size = buffer_size
+        self.retention = retention
+        self.history_size = history_size
+        self._channels = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def open(self, owner_id=None, scrape_id=None):
+        """
+        Create a channel for a new scrape.
+
+        Args:
+            owner_id (int, optional): The user starting the scrape; only they may subscribe to it.
+            scrape_id (str, optional): Id for a long-lived channel (e.g. a user's notifications); if the
+                channel already exists it is reused. Defaults to a new random id.
+
+        Returns:
+            str: The scrape id.
+        """
+        scrape_id = scrape_id or uuid.uuid4().hex
+        with self._lock:
+            self._prune()
+            if scrape_id not in self._channels:
+                self._channels[scrape_id] = Channel(scrape_id, owner_id, self.history_size)
+        return scrape_id
+
+    def _prune(self):
+        """Forget channels that finished longer than the retention period ago. Called with the lock held."""
+        cutoff = time.monotonic() - self.retention
+        for scrape_id, channel in list(self._channels.items()):
+            if channel.finished_at is not None and channel.finished_at < cutoff:
+                del self._channels[scrape_id]
+
+    def allow(self, scrape_id, user_id):
+        """
+        Let another user subscribe to a scrape (e.g. one who joined it).
+
+        Args:
+            scrape_id (str): The scrape id.
+            user_id (int): The user.
+        """
+        channel = self.get_channel(scrape_id)
+        if channel is not None and channel.viewers is not None:
+            with channel.condition:
+                channel.viewers.add(user_id)
+
+    def get_channel(self, scrape_id):
+        """Return a scrape's channel, or None if the id is unknown or has expired."""
+        with self._lock:
+            return self._channels.get(scrape_id)
+
+    def subscribe(self, scrape_id, last_event_id=0):
+        """
+        Subscribe to a scrape's events after the given event id.
+
+        Events after last_event_id that are still in the channel's history are replayed first; if some of
+        them have already left the history, the subscription starts with a 'dropped' notice.
+
+        Args:
+            scrape_id (str): The scrape id.
+            last_event_id (int): Id of the last event the client received (0 for all events).
+
+        Returns:
+            Subscription | None: The subscription, or None if the id is unknown or has expired.
+        """
+        channel = self.get_channel(scrape_id)
+        if channel is None:
+            return None
+        with channel.condition:
+            replay = [(event_id, event) for event_id, event in channel.history if event_id > last_event_id]
+            first_id = replay[0][0] if replay else channel.last_id + 1
+            # The buffer fits the whole replay (bounded by the history size)
+            subscription = Subscription(channel, max(self.buffer_size, len(replay)))
+            subscription.dropped = max(0, first_id - last_event_id - 1)
+            for event_id, event in replay:
+                if event is not channel.final_event:  # delivered by get() once the buffer is drained
+                    subscription._push(event_id, event)
+            channel.subscribers.append(subscription)
+        return subscription
+
+    def publish(self, scrape_id, event):
+        """
+        Send an event to every subscriber of a scrape. Never blocks; events for unknown or finished
+        scrapes are ignored.
+
+        Args:
+            scrape_id (str): The scrape id.
+            event (dict): JSON-serializable event.
+        """
+        channel = self.get_channel(scrape_id)
+        if channel is None:
+            return
+        with channel.condition:
+            if channel.final_event is not None:
+                return
+            channel.last_id += 1
+            channel.history.append((channel.last_id, event))
+            for subscription in channel.subscribers:
+                before = subscription.dropped
+                subscription._push(channel.last_id, event)
+                self.dropped += subscription.dropped - before
+            self.published += 1
+            channel.condition.notify_all()
+
+    def close(self, scrape_id, final_event=None):
+        """
+        Mark a scrape as finished. Subscribers receive the final event after any events still buffered.
+
+        Args:
+            scrape_id (str): The scrape id.
+            final_event (dict, optional): The last event (defaults to {'status': 'complete'}).
+        """
+        channel = self.get_channel(scrape_id)
+        if channel is None:
+            return
+        with channel.condition:
+            if channel.final_event is None:
+                channel.final_event = dict(final_event or COMPLETE_EVENT)
+                channel.finished_at = time.monotonic()
+                channel.last_id += 1
+                channel.history.append((channel.last_id, channel.final_event))
+            for subscription in channel.subscribers:
+                subscription._wake()
+            channel.condition.notify_all()
+
+    def stats(self):
+        """
+        Report the broker's activity for monitoring.
+
+        Returns:
+            dict: Counts of active and finished channels, subscribers, and published and dropped events.
+        """
+        with self._lock:
+            channels = list(self._channels.values())
+        return {
+            "active_scrapes": sum(1 for channel in channels if channel.final_event is None),
+            "finished_scrapes": sum(1 for channel in channels if channel.final_event is not None),
+            "subscribers": sum(len(channel.subscribers) for channel in channels),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+def parse_last_event_id(value):
+    """
+    Parse a Last-Event-ID header (or query parameter) value.
+
+    Args:
+        value (str | None): The value sent by the client.
+
+    Returns:
+        int: The event id, or 0 (replay everything) if missing or invalid.
+    """
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def format_event(event_id, event):
+    """
+    Format an event as a server-sent event message.
+
+    Job payloads get a 'tags' object for the client; events with an id get an 'id:' line so that the client
+    sends it back as Last-Event-ID when it reconnects.
+
+    Args:
+        event_id (int | None): The event id (None for notices that are not replayed, like pings).
+        event (dict): The event.
+
+    Returns:
+        str: The message, ending with a blank line.
+    """
+    if "status" not in event and "type" not in event:  # normal job payload
+        event = dict(event, tags={
+            "location": event.get("tag_location"),
+            "jobtype":  event.get("tag_jobtype"),
+            "category": event.get("tag_category"),
+        })
+    message = f"data: {json.dumps(event)}\n\n"
+    return message if event_id is None else f"id: {event_id}\n{message}"
+
+
+def get_scrape_broker():
+    """
+    Get the application's scrape broker (stored in app.extensions so each app instance has its own).
+
+    Returns:
+        ScrapeBroker: The broker, configured from SCRAPE_STREAM_BUFFER, SCRAPE_STREAM_RETENTION and
+        SCRAPE_STREAM_HISTORY.
+    """
+    broker = current_app.extensions.get("scrape_broker")
+    if broker is None:
+        broker = current_app.extensions.setdefault("scrape_broker", ScrapeBroker(
+            buffer_size=current_app.config.get("SCRAPE_STREAM_BUFFER", 256),
+            retention=current_app.config.get("SCRAPE_STREAM_RETENTION", 300),
+            history_size=current_app.config.get("SCRAPE_STREAM_HISTORY", 500),
+        ))
+    return broker
+
+
+def get_notification_broker():
+    """
+    Get the application's broker of live notifications, which has one channel per user.
+
+    Returns:
+        ScrapeBroker: The broker (notification channels are never closed, so they are kept for good).
+    """
+    broker = current_app.extensions.get("notification_broker")
+    if broker is None:
+        broker = current_app.extensions.setdefault("notification_broker", ScrapeBroker(
+            buffer_size=current_app.config.get("SCRAPE_STREAM_BUFFER", 256),
+            history_size=current_app.config.get("NOTIFICATION_STREAM_HISTORY", 20),
+        ))
+    return broker
+
+
+def notification_channel(user_id):
+    """
+    Open (or reuse) a user's notification channel.
+
+    Args:
+        user_id (int): The user.
+
+    Returns:
+        str: The channel id, to publish to or subscribe to.
+    """
+    return get_notification_broker().open(user_id, scrape_id=f"user-{user_id}")
+
+
+def hold_server_lock():
+    """
+    Make sure no other server process is running the app, by locking SERVER_LOCK_FILE in the instance folder
+    for as long as this process lives. Call once at startup, inside an application context.
+
+    Scrape channels, notification channels, the scrape queue and the search cache all live in process memory,
+    so a second process (e.g. `uvicorn --workers 2` or several gunicorn workers) would answer reconnecting
+    streams with 404 and serve stale searches. Repeated calls in the same application do nothing.
+
+    Raises:
+        RuntimeError: If another process holds the lock.
+    """
+    if fcntl is None or "server_lock" in current_app.extensions:
+        return
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    path = os.path.join(current_app.instance_path, current_app.config.get("SERVER_LOCK_FILE", "server.lock"))
+    lock_file = open(path, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError(f"Another server process is already running this app (it holds {path}); "
+                           "serve it with a single worker process") from None
+    # Kept open, so the lock is held until the process exits
+    current_app.extensions["server_lock"] = lock_file
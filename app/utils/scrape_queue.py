@@ -0,0 +1,317 @@
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import func, select, update
+from app.models import db, ScrapeTask, User
+from app.utils.job_catalog import copy_sightings
+from app.utils.scrape_broker import get_scrape_broker
+
+"""
+Durable queue of scrape requests, run by a fixed-size pool of worker threads.
+
+/api/start-scraping records each request as a ScrapeTask row instead of starting a thread of its own, so the
+number of scrapes running at once is capped by SCRAPE_QUEUE_WORKERS however many requests arrive, and no
+request is lost when the server restarts: tasks that were pending or interrupted are picked up again at
+startup (resume_scrape_tasks).
+
+Identical requests share one scrape, whoever makes them: a request for the same (normalized) filters as an
+unfinished task joins it, following its event stream and getting its results, instead of starting another
+browser session on the same pages. Within SCRAPE_FRESHNESS seconds of such a scrape finishing, its results
+are served as they are, without scraping at all.
+
+Workers claim tasks with a conditional UPDATE, so two worker threads never run the same task twice, and no
+more than SCRAPE_QUEUE_WORKERS tasks run at once. While a task runs, its worker records a heartbeat every few
+seconds along with the task's progress, outcome and duration. A running task whose heartbeat is older than
+SCRAPE_TASK_LEASE seconds was abandoned (the server stopped while it ran), and is queued again.
+
+The app runs as a single server process (see scrape_broker.hold_server_lock), and the queue relies on it: a
+task's event stream lives in that process's scrape broker, and so do the search cache and indexes that each
+saved batch invalidates.
+"""
+
+class ScrapeQueue:
+    """
+    Worker pool running queued ScrapeTasks for one application.
+
+    Attributes:
+        workers (int): Number of worker threads, and of tasks run at once (0 runs nothing in the background,
+            e.g. in tests).
+        poll_interval (float): Seconds an idle worker waits before checking the table for new tasks.
+        lease (float): Seconds without a heartbeat after which a running task is considered abandoned.
+    """
+
+    def __init__(self, app, workers=2, poll_interval=5.0, lease=300):
+        self.app = app
+        self.workers = max(0, int(workers))
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def start(self):
+        """Start the worker threads, if they are not running yet."""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"scrape-worker-{len(self._threads) + 1}",
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        """Wake an idle worker to look for new tasks."""
+        self._wakeup.set()
+
+    def _work(self):
+        """Worker loop: run pending tasks, sleeping when there are none."""
+        while True:
+            if not self._work_once():
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _work_once(self):
+        """Run the next pending task, if any. Errors (e.g. a locked database) are logged, not raised, so the
+        worker thread keeps going."""
+        try:
+            with self.app.app_context():
+                return self.run_next()
+        except Exception:
+            traceback.print_exc()
+            return False
+
+    def run_next(self):
+        """
+        Claim the oldest pending task and run it in the calling thread. Must be called inside an application
+        context.
+
+        Returns:
+            bool: True if a task was run, False if none was pending.
+        """
+        task = self._claim()
+        if task is None:
+            return False
+        self._run(task)
+        return True
+
+    def run_pending(self):
+        """
+        Run pending tasks in the calling thread until none is left (e.g. for maintenance scripts and tests).
+
+        Returns:
+            int: The number of tasks run.
+        """
+        count = 0
+        while self.run_next():
+            count += 1
+        return count
+
+    def _claim(self):
+        """
+        Atomically move the oldest pending task to 'running' (retrying if another worker wins the race),
+        unless `workers` tasks are running already.
+        """
+        requeue_abandoned_tasks(self.lease)
+        while True:
+            task = (ScrapeTask.query.filter_by(status="pending")
+                    .order_by(ScrapeTask.created_at, ScrapeTask.id).first())
+            if task is None:
+                return None
+            conditions = [ScrapeTask.id == task.id, ScrapeTask.status == "pending"]
+            if self.workers:
+                # Checked in the same statement, so workers claiming at the same time respect the cap together
+                running = select(func.count()).select_from(ScrapeTask).where(ScrapeTask.status == "running")
+                conditions.append(running.scalar_subquery() < self.workers)
+            now = datetime.now(timezone.utc)
+            claimed = db.session.execute(
+                update(ScrapeTask).where(*conditions).values(status="running", started_at=now, heartbeat_at=now)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                db.session.refresh(task)
+                return task
+            db.session.refresh(task)
+            if task.status == "pending":
+                return None  # still pending: the running tasks are at the cap
+
+    def _run(self, task):
+        """Run a claimed task and record its outcome."""
+        from app.routes import background_scraper   # routes imports this module
+        debug = current_app.config.get("DEBUG", False)
+        if debug:
+            print(f"[QUEUE] running task {task.id} (scrape {task.scrape_id})")
+        args = (task.user_id, task.jobtype, task.discipline, task.location, task.keyword, task.scrape_id)
+        started = time.monotonic()
+        stop_heartbeat = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(task.id, stop_heartbeat), daemon=True,
+                         name=f"scrape-heartbeat-{task.id}").start()
+        try:
+            get_scrape_broker().open(task.user_id, scrape_id=task.scrape_id)  # gone if the server restarted
+            # The scraper writes through its own session: end this one's read transaction so it cannot block it
+            db.session.commit()
+            background_scraper(current_app._get_current_object(), *args)
+            task.status, task.error = "done", None
+            # Users who joined the scrape see its jobs as their own results too
+            if task.followers:
+                copy_sightings(task.user_id, [user.id for user in task.followers], task.started_at,
+                               scrape_tags(task))
+        except Exception as exc:
+            traceback.print_exc()
+            db.session.rollback()
+            task.status, task.error = "failed", str(exc)
+        finally:
+            stop_heartbeat.set()
+        task.finished_at = datetime.now(timezone.utc)
+        task.duration = time.monotonic() - started
+        # If this fails too, the task's heartbeat has stopped, so it is queued again once its lease expires
+        db.session.commit()
+        if debug:
+            print(f"[QUEUE] task {task.id} {task.status} after {task.duration:.1f}s ({task.progress} jobs)")
+
+    def _heartbeat(self, task_id, stop):
+        """Record that a task is still running every third of the lease, until stop is set."""
+        while not stop.wait(max(self.lease / 3, 1.0)):
+            try:
+                with self.app.app_context():
+                    db.session.execute(update(ScrapeTask)
+                                       .where(ScrapeTask.id == task_id, ScrapeTask.status == "running")
+                                       .values(heartbeat_at=datetime.now(timezone.utc)))
+                    db.session.commit()
+            except Exception:
+                traceback.print_exc()  # a missed beat is retried; the lease allows for a few
+
+
+_submit_lock = threading.Lock()
+
+
+def filter_key(jobtype, discipline=None, location=None, keyword=None):
+    """
+    Normalize scrape filters, so requests that would scrape the same pages get the same key.
+
+    Returns:
+        str: The filters, lowercased with whitespace collapsed, joined by '|'.
+    """
+    return "|".join(" ".join((value or "").lower().split()) for value in (jobtype, discipline, location, keyword))
+
+
+def scrape_tags(task):
+    """The tag_* values of the jobs (and sightings) a task's scrape saves."""
+    return {"tag_jobtype": task.jobtype, "tag_location": task.location, "tag_category": task.discipline}
+
+
+def get_scrape_queue():
+    """
+    Get the application's scrape queue (stored in app.extensions so each app instance has its own).
+
+    Returns:
+        ScrapeQueue: The queue, with SCRAPE_QUEUE_WORKERS workers.
+    """
+    scrape_queue = current_app.extensions.get("scrape_queue")
+    if scrape_queue is None:
+        scrape_queue = current_app.extensions.setdefault("scrape_queue", ScrapeQueue(
+            current_app._get_current_object(),
+            workers=current_app.config.get("SCRAPE_QUEUE_WORKERS", 2),
+            lease=current_app.config.get("SCRAPE_TASK_LEASE", 300),
+        ))
+    return scrape_queue
+
+
+def submit_scrape(user_id, jobtype, discipline=None, location=None, keyword=None, owner_id=None):
+    """
+    Queue a scrape, or share an identical one that is unfinished or finished recently.
+
+    Args:
+        user_id (int): The user the jobs are scraped for.
+        jobtype (str): Job type filter.
+        discipline (str, optional): Discipline filter.
+        location (str, optional): Location filter.
+        keyword (str, optional): Keyword filter.
+        owner_id (int, optional): User allowed to watch the scrape's stream (None for anyone with the id).
+
+    Returns:
+        tuple: (ScrapeTask, str) with the task and how the request was handled: 'queued' (a new task),
+        'joined' (an identical unfinished task) or 'fresh' (the results of an identical task that finished
+        within SCRAPE_FRESHNESS seconds).
+    """
+    key = filter_key(jobtype, discipline, location, keyword)
+    broker = get_scrape_broker()
+    with _submit_lock:  # so that simultaneous identical requests cannot both queue a task
+        task = (ScrapeTask.query.filter(ScrapeTask.filter_key == key, ScrapeTask.status.in_(("pending", "running")))
+                .order_by(ScrapeTask.created_at).first())
+        outcome = "joined"
+        if task is None:
+            fresh_since = datetime.now(timezone.utc) - timedelta(
+                seconds=current_app.config.get("SCRAPE_FRESHNESS", 600))
+            task = (ScrapeTask.query.filter(ScrapeTask.filter_key == key, ScrapeTask.status == "done",
+                                            ScrapeTask.finished_at >= fresh_since)
+                    .order_by(ScrapeTask.finished_at.desc()).first())
+            outcome = "fresh"
+        if task is None:
+            task = ScrapeTask(scrape_id=broker.open(owner_id), user_id=user_id, jobtype=jobtype,
+                              discipline=discipline, location=location, keyword=keyword, filter_key=key,
+                              status="pending")
+            db.session.add(task)
+            outcome = "queued"
+        elif user_id != task.user_id and all(user.id != user_id for user in task.followers):
+            task.followers.append(db.session.get(User, user_id))
+            if outcome == "fresh":
+                copy_sightings(task.user_id, [user_id], task.started_at, scrape_tags(task))
+        if owner_id is not None:
+            broker.allow(task.scrape_id, owner_id)
+        db.session.commit()
+    if outcome != "fresh":
+        scrape_queue = get_scrape_queue()
+        scrape_queue.start()
+        scrape_queue.notify()
+    return task, outcome
+
+
+def requeue_abandoned_tasks(lease):
+    """
+    Queue again the running tasks whose worker has not sent a heartbeat for `lease` seconds (because the
+    server was stopped while they ran). Must be called inside an application context.
+
+    Args:
+        lease (float): Seconds without a heartbeat after which a task is considered abandoned.
+
+    Returns:
+        int: The number of tasks queued again.
+    """
+    expired = datetime.now(timezone.utc) - timedelta(seconds=lease)
+    abandoned = (ScrapeTask.status == "running",
+                 func.coalesce(ScrapeTask.heartbeat_at, ScrapeTask.started_at, ScrapeTask.created_at) < expired)
+    # Checked first, so that idle workers polling the queue do not take the write lock for nothing
+    if db.session.query(ScrapeTask.id).filter(*abandoned).first() is None:
+        db.session.commit()
+        return 0
+    count = db.session.execute(update(ScrapeTask).where(*abandoned)
+                               .values(status="pending", started_at=None, heartbeat_at=None)).rowcount
+    db.session.commit()
+    return count
+
+
+def resume_scrape_tasks(debug=False):
+    """
+    Requeue tasks abandoned by a stopped server, reopen the event streams of unfinished tasks and start the
+    workers for them. Call once at startup, inside an application context.
+
+    Args:
+        debug (bool): If True, prints how many tasks were resumed.
+
+    Returns:
+        int: The number of unfinished tasks.
+    """
+    requeue_abandoned_tasks(current_app.config.get("SCRAPE_TASK_LEASE", 300))
+    pending = ScrapeTask.query.filter_by(status="pending").all()
+    broker = get_scrape_broker()
+    for task in pending:
+        broker.open(task.user_id, scrape_id=task.scrape_id)  # so clients can reconnect to the stream
+        for user in task.followers:
+            broker.allow(task.scrape_id, user.id)
+    if pending:
+        get_scrape_queue().start()
+    if debug:
+        print(f"[QUEUE] {len(pending)} unfinished scrape tasks resumed")
+    return len(pending)
@@ -3,14 +3,23 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time, json
+from selenium.common.exceptions import TimeoutException
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.utils.driver_pool import get_pool
+from app.utils.html_fetch import fetch_html, parse_html
+from app.models import db
+from app.utils.job_catalog import canonical_link, save_catalog_batch, remove_stale_sightings
+from app.utils.search_index import mark_jobs_changed
+from datetime import datetime, timezone
+import time, json, re, hashlib
 
 """
 GradConnection Job Scraper Utilities
 
 This module provides functions to scrape detailed job listings from the GradConnection website using Selenium.
 It includes helpers for URL construction, robust extraction of job details (handling various page layouts),
-pagination, and saving results to a database. Designed for use in automated job aggregation and enrichment pipelines.
+pagination, and saving results to a database. Job detail pages are scraped in parallel by a bounded pool of
+reusable browsers (see driver_pool). Designed for use in automated job aggregation and enrichment pipelines.
 """
 
 # ───────────────────────────── helpers ────────────────────────────────────────
@@ -47,42 +56,61 @@ def add_page_param(base: str, page_no: int) -> str:
     joiner = "&" if "?" in base else "?"
     return f"{base}{joiner}page={page_no}"
 
-def scrape_job_detail(driver) -> dict:
+# Map possible heading text to normalized section keys
+SECTION_MAPPING = {
+    "about": "overview",
+    "overview": "overview",
+    "working at": "overview",
+    "responsibilities": "responsibilities",
+    "duties": "responsibilities",
+    "tasks": "responsibilities",
+    "objectives": "responsibilities",
+    "qualifications": "requirements",
+    "requirements": "requirements",
+    "selection criteria": "requirements",
+    "skills": "skills_and_qualities",
+    "talents": "skills_and_qualities",
+    "salary": "salary_info",
+    "about company": "about_company",
+    "about atlassian": "about_company",
+    "perks & benefits": "about_company",
+}
+
+# CSS selectors of the job detail fields, shared by the Selenium and HTTP backends
+FIELD_SELECTORS = {
+    "title": "h1.employers-profile-h1",
+    "ai_summary": "div.ai-summary_campaign-summary-container",
+    "full_text": "div.campaign-content-container",
+    "posted_date": "span.hidden",
+    "closing_in": "span.job-info-header-closing-in",
+}
+PARAGRAPH_SELECTOR = "div.campaign-content-container p"
+HEADING_SELECTOR = "div.campaign-content-container h2"
+LIST_SELECTOR = "div.campaign-content-container ul, div.campaign-content-container ul.ak-ul"
+
+def map_heading(text):
     """
-    Extract full job information from a GradConnection job detail page.
+    Map a heading string to a section key using SECTION_MAPPING.
+    Returns None if no match is found.
+    """
+    text = text.lower().strip()
+    for key, value in SECTION_MAPPING.items():
+        if key in text:
+            return value
+    return None
+
+def build_job_detail(fields: dict, elements: list) -> dict:
+    """
+    Assemble the job detail dictionary from extracted fields and content elements.
 
     Args:
-        driver (selenium.webdriver): The Selenium WebDriver instance, already on the job detail page.
+        fields (dict): Text of each FIELD_SELECTORS field ('n/a' if missing).
+        elements (list[tuple]): (tag, text, list_items) for each paragraph, heading and list of the content,
+            in the order paragraphs, headings, lists.
 
     Returns:
         dict: A dictionary containing all extracted job fields, including structured sections.
-
-    This function is robust to variations in page structure and attempts to extract as much information as possible.
     """
-    import re
-    wait = WebDriverWait(driver, 10)
-    time.sleep(1)  # Allow dynamic content to load
-
-    def safe_text(selector, many=False):
-        """
-        Safely extract text or elements from the page using a CSS selector.
-        Returns 'n/a' or [] on failure, depending on the 'many' flag.
-        """
-        try:
-            if many:
-                return driver.find_elements(By.CSS_SELECTOR, selector)
-            return driver.find_element(By.CSS_SELECTOR, selector).text.strip()
-        except:
-            return [] if many else "n/a"
-
-    # ─── basic fields ───
-    title = safe_text("h1.employers-profile-h1")
-    ai_summary = safe_text("div.ai-summary_campaign-summary-container")
-    full_text_block = safe_text("div.campaign-content-container")
-    posted_date = safe_text("span.hidden")
-    closing_in = safe_text("span.job-info-header-closing-in")
-
-    # ─── deeper extraction ───
     sections = {
         "overview": [],
         "responsibilities": [],
@@ -92,49 +120,10 @@ def scrape_job_detail(driver) -> dict:
         "about_company": [],
     }
 
-    # Gather text elements for further parsing
-    paragraphs = safe_text("div.campaign-content-container p", many=True)
-    headings = safe_text("div.campaign-content-container h2", many=True)
-    lists = safe_text("div.campaign-content-container ul, div.campaign-content-container ul.ak-ul", many=True)
-
-    # Map possible heading text to normalized section keys
-    section_mapping = {
-        "about": "overview",
-        "overview": "overview",
-        "working at": "overview",
-        "responsibilities": "responsibilities",
-        "duties": "responsibilities",
-        "tasks": "responsibilities",
-        "objectives": "responsibilities",
-        "qualifications": "requirements",
-        "requirements": "requirements",
-        "selection criteria": "requirements",
-        "skills": "skills_and_qualities",
-        "talents": "skills_and_qualities",
-        "salary": "salary_info",
-        "about company": "about_company",
-        "about atlassian": "about_company",
-        "perks & benefits": "about_company",
-    }
-
-    def map_heading(text):
-        """
-        Map a heading string to a section key using the section_mapping dictionary.
-        Returns None if no match is found.
-        """
-        text = text.lower().strip()
-        for key, value in section_mapping.items():
-            if key in text:
-                return value
-        return None
-
     current_section = "overview"  # Default section if no headings found yet
 
     # Step through elements in order, assigning content to the correct section
-    for elem in paragraphs + headings + lists:
-        tag = elem.tag_name.lower()
-        text = elem.text.strip()
-
+    for tag, text, items in elements:
         if not text:
             continue
 
@@ -149,35 +138,264 @@ def scrape_job_detail(driver) -> dict:
             continue
 
         if tag == "ul":
-            items = [li.text.strip() for li in elem.find_elements(By.TAG_NAME, "li")]
             sections[current_section].extend(items)
 
     return {
-        "title": title,
-        "posted_date": posted_date,
-        "closing_in": closing_in,
-        "ai_summary": ai_summary,
+        "title": fields["title"],
+        "posted_date": fields["posted_date"],
+        "closing_in": fields["closing_in"],
+        "ai_summary": fields["ai_summary"],
         "overview": sections["overview"],
         "responsibilities": sections["responsibilities"],
         "requirements": sections["requirements"],
         "skills_and_qualities": sections["skills_and_qualities"],
         "salary_info": sections["salary_info"],
         "about_company": sections["about_company"],
-        "full_text": full_text_block
+        "full_text": fields["full_text"]
+    }
+
+def scrape_job_detail(driver) -> dict:
+    """
+    Extract full job information from a GradConnection job detail page.
+
+    Args:
+        driver (selenium.webdriver): The Selenium WebDriver instance, already on the job detail page.
+
+    Returns:
+        dict: A dictionary containing all extracted job fields, including structured sections.
+
+    This function is robust to variations in page structure and attempts to extract as much information as possible.
+    """
+    wait = WebDriverWait(driver, 10)
+    try:
+        # Wait for the dynamic content to render instead of sleeping for a fixed time
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR,
+                                                   "h1.employers-profile-h1, div.campaign-content-container")))
+    except TimeoutException:
+        pass  # extract whatever is there; missing fields fall back to 'n/a'
+
+    def safe_text(selector, many=False):
+        """
+        Safely extract text or elements from the page using a CSS selector.
+        Returns 'n/a' or [] on failure, depending on the 'many' flag.
+        """
+        try:
+            if many:
+                return driver.find_elements(By.CSS_SELECTOR, selector)
+            return driver.find_element(By.CSS_SELECTOR, selector).text.strip()
+        except:
+            return [] if many else "n/a"
+
+    fields = {name: safe_text(selector) for name, selector in FIELD_SELECTORS.items()}
+
+    # Gather text elements for further parsing
+    elements = []
+    for selector in (PARAGRAPH_SELECTOR, HEADING_SELECTOR, LIST_SELECTOR):
+        for elem in safe_text(selector, many=True):
+            tag = elem.tag_name.lower()
+            items = [li.text.strip() for li in elem.find_elements(By.TAG_NAME, "li")] if tag == "ul" else []
+            elements.append((tag, elem.text.strip(), items))
+
+    return build_job_detail(fields, elements)
+
+def parse_job_detail_html(html: str) -> dict | None:
+    """
+    Extract full job information from the HTML of a GradConnection job detail page, without a browser.
+
+    Uses the same selectors and section mapping as scrape_job_detail.
+
+    Args:
+        html (str): The page source.
+
+    Returns:
+        dict | None: The job details, or None if the page has no job content in its HTML (i.e. the
+        content is rendered by JavaScript and a browser is needed).
+    """
+    root = parse_html(html)
+    if root.select_one(FIELD_SELECTORS["title"]) is None and root.select_one(FIELD_SELECTORS["full_text"]) is None:
+        return None
+
+    fields = {}
+    for name, selector in FIELD_SELECTORS.items():
+        element = root.select_one(selector)
+        fields[name] = element.text.strip() if element is not None else "n/a"
+
+    elements = []
+    for selector in (PARAGRAPH_SELECTOR, HEADING_SELECTOR, LIST_SELECTOR):
+        for elem in root.select(selector):
+            items = [li.text.strip() for li in elem.select("li")] if elem.tag == "ul" else []
+            elements.append((elem.tag, elem.text.strip(), items))
+
+    return build_job_detail(fields, elements)
+
+def fetch_job_detail(link: str, client=None) -> dict | None:
+    """
+    Fetch a job detail page over plain HTTP and parse it (see parse_job_detail_html).
+
+    Args:
+        link (str): URL of the job detail page.
+        client (httpx.Client, optional): HTTP client (defaults to the shared pooled client).
+
+    Returns:
+        dict | None: The job details, or None if the page could not be fetched or needs a browser.
+    """
+    html = fetch_html(link, client)
+    if html is None:
+        return None
+    return parse_job_detail_html(html)
+
+
+# Parts of a listing card that change without the job changing (countdowns and relative dates)
+VOLATILE_CARD_TEXT = re.compile(r"closing in[^\n]*|closes? (today|tomorrow)[^\n]*|\d+\s*\w+ ago|just now",
+                                re.IGNORECASE)
+
+def listing_fingerprint(card_text: str) -> str:
+    """
+    Fingerprint a job's listing card, so a job can be recognised as unchanged without visiting its page.
+
+    Countdowns like 'Closing in 3 days' are ignored, so the fingerprint only changes when the listing does.
+
+    Args:
+        card_text (str): The visible text of the listing card.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    text = VOLATILE_CARD_TEXT.sub("", card_text or "")
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+def job_columns(job: dict) -> dict:
+    """
+    Convert scraped job details into ScrapedJob column values, including the precomputed search document.
+
+    Args:
+        job (dict): Job details as returned by get_jobs_full.
+
+    Returns:
+        dict: Column name to value, ready for an insert or an update.
+    """
+    from app.utils.fuzzy_search import build_search_document
+    document = build_search_document(job)
+    return {
+        "title": job.get("title"),
+        "posted_date": job.get("posted_date"),
+        "closing_in": job.get("closing_in"),
+        "ai_summary": job.get("ai_summary"),
+        "overview": json.dumps(job.get("overview", [])),
+        "responsibilities": json.dumps(job.get("responsibilities", [])),
+        "requirements": json.dumps(job.get("requirements", [])),
+        "skills_and_qualities": json.dumps(job.get("skills_and_qualities", [])),
+        "salary_info": json.dumps(job.get("salary_info", [])),
+        "about_company": json.dumps(job.get("about_company", [])),
+        "full_text": job.get("full_text"),
+        "link": job.get("link"),
+        "fingerprint": job.get("fingerprint"),
+        "company": document["company"],
+        "search_text": document["search_text"],
     }
 
+def apply_job_detail(scraped_job, job: dict) -> None:
+    """
+    Copy scraped job details onto an existing ScrapedJob row (see job_columns).
+
+    Args:
+        scraped_job (ScrapedJob): The row to update.
+        job (dict): Job details as returned by get_jobs_full.
+    """
+    for column, value in job_columns(job).items():
+        setattr(scraped_job, column, value)
+
 
 # ───────────────────────────── scraper ────────────────────────────────────────
+def make_driver(headless: bool = False):
+    """
+    Start a Chrome browser configured for scraping.
+
+    Args:
+        headless (bool): Whether to run the browser in headless mode.
+
+    Returns:
+        selenium.webdriver.Chrome: The new browser.
+    """
+    opts = Options()
+    if headless:
+        opts.add_argument("--headless=new")
+    opts.add_argument("--disable-notifications")
+    opts.add_argument("--window-size=1920,1080")
+    return webdriver.Chrome(options=opts)
+
+def get_driver_pool(workers: int = 4, headless: bool = False):
+    """
+    Get the shared pool of Chrome browsers, so browsers are reused across scrapes.
+
+    Args:
+        workers (int): Maximum number of browsers (only used when the pool is first created).
+        headless (bool): Whether the browsers run in headless mode.
+
+    Returns:
+        DriverPool: The shared pool for this headless setting.
+    """
+    return get_pool(("chrome", headless), lambda: make_driver(headless), size=workers)
+
+def scrape_job_link(pool, link: str, debug: bool = False, backend: str = "selenium") -> dict | None:
+    """
+    Scrape one job detail page.
+
+    With the 'http' backend the page is fetched and parsed without a browser, and a browser borrowed from
+    the pool is only used if that fails (e.g. the content is rendered by JavaScript). The 'selenium'
+    backend always uses a browser.
+
+    Args:
+        pool (DriverPool): The browser pool.
+        link (str): URL of the job detail page.
+        debug (bool): If True, prints debug information.
+        backend (str): 'http' or 'selenium'.
+
+    Returns:
+        dict | None: The job details (see scrape_job_detail) with its 'link', or None if scraping failed.
+    """
+    if backend == "http":
+        job_detail = fetch_job_detail(link)
+        if job_detail is not None:
+            job_detail["link"] = link
+            if debug:
+                print(f"[detail] fetched {link}")
+            return job_detail
+        if debug:
+            print(f"[detail] {link} needs a browser, falling back to Selenium")
+    try:
+        with pool.driver() as driver:
+            driver.get(link)
+            job_detail = scrape_job_detail(driver)
+    except Exception as e:
+        print(f"Error scraping job: {e}")
+        return None
+    job_detail["link"] = link
+    if debug:
+        print(f"[detail] scraped {link}")
+    return job_detail
+
 def get_jobs_full(jobtype:   str,
                   discipline: str | None = None,
                   location:   str | None = None,
                   keyword:    str | None = None,
                   max_pages:  int = 10,
                   headless:   bool = False,
-                  debug:      bool = False) -> list[dict]:
+                  debug:      bool = False,
+                  workers:    int = 4,
+                  pool=None,
+                  backend:    str = "selenium",
+                  known:      dict | None = None,
+                  on_job=None) -> list[dict]:
     """
     Scrape all job listings from GradConnection search results, visiting each job page for full details.
 
+    One browser walks the result pages and queues every new job link as soon as it is found; the detail
+    pages are scraped concurrently by up to 'workers' browsers from the pool.
+
+    For incremental scrapes, pass the links already stored with their listing fingerprints as 'known':
+    jobs whose listing card is unchanged are not visited again.
+
     Args:
         jobtype (str): The type of job (e.g., 'internships').
         discipline (str, optional): The job discipline/category.
@@ -186,119 +404,128 @@ def get_jobs_full(jobtype:   str,
         max_pages (int): Maximum number of result pages to scrape.
         headless (bool): Whether to run the browser in headless mode.
         debug (bool): If True, prints debug information.
+        workers (int): Number of browsers scraping detail pages in parallel.
+        pool (DriverPool, optional): Browser pool to use (defaults to the shared pool, see get_driver_pool).
+        backend (str): How detail pages are scraped: 'selenium', or 'http' to fetch and parse them without a
+            browser, falling back to Selenium for pages that need JavaScript.
+        known (dict, optional): Maps job links to the listing fingerprint stored for them.
+        on_job (callable, optional): Called with each job (or unchanged marker) as soon as it has been
+            scraped, in completion order, from the calling thread. Lets callers stream results.
 
     Returns:
-        list[dict]: A list of dictionaries, each containing detailed job information.
+        list[dict]: A list of dictionaries, each containing detailed job information and its listing
+        'fingerprint', in listing order. Known jobs with an unchanged listing are returned as
+        {'link', 'fingerprint', 'unchanged': True} only.
 
     This function handles pagination, popups, and robustly collects all job links and their details.
     """
     base = build_url(jobtype, discipline, location, keyword)
+    if pool is None:
+        pool = get_driver_pool(workers, headless)
 
-    opts = Options()
-    if headless:
-        opts.add_argument("--headless=new")
-    opts.add_argument("--disable-notifications")
-    opts.add_argument("--window-size=1920,1080")
-
-    driver = webdriver.Chrome(options=opts)
-    wait = WebDriverWait(driver, 10)
+    seen, results, skipped = set(), [], 0
 
-    seen, jobs = set(), []
+    with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="scrape-detail") as executor:
+        with pool.driver() as driver:
+            wait = WebDriverWait(driver, 10)
+            for page in range(1, max_pages + 1):
+                url = base if page == 1 else add_page_param(base, page)
+                driver.get(url)
 
-    try:
-        for page in range(1, max_pages + 1):
-            url = base if page == 1 else add_page_param(base, page)
-            driver.get(url)
-
-            try:
-                # Attempt to close any login popups that may block interaction
-                wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR,
-                                                       "button.forcelogin-close-btn"))
-                           ).click()
-                time.sleep(0.4)
-            except Exception:
-                pass
-
-            # Scroll to the bottom to ensure all jobs are loaded
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-
-            cards = driver.find_elements(By.CSS_SELECTOR, "div.campaign-box")
-            if not cards:
-                break
-
-            for box in cards:
                 try:
-                    a = box.find_element(By.CSS_SELECTOR, "a.box-header-title")
-                    link = a.get_attribute("href")
+                    # Attempt to close any login popups that may block interaction
+                    wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR,
+                                                           "button.forcelogin-close-btn"))
+                               ).click()
+                    time.sleep(0.4)
+                except Exception:
+                    pass
+
+                # Scroll to the bottom to ensure all jobs are loaded
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(1)
+
+                cards = driver.find_elements(By.CSS_SELECTOR, "div.campaign-box")
+                if not cards:
+                    break
+
+                for box in cards:
+                    try:
+                        a = box.find_element(By.CSS_SELECTOR, "a.box-header-title")
+                        link = canonical_link(a.get_attribute("href"))
+                        fingerprint = listing_fingerprint(box.text)
+                    except Exception as e:
+                        print(f"Error reading job card: {e}")
+                        continue
                     if link in seen:
                         continue
                     seen.add(link)
-
-                    # Visit individual job page in a new tab
-                    driver.execute_script("window.open('');")
-                    driver.switch_to.window(driver.window_handles[1])
-                    driver.get(link)
-
-                    job_detail = scrape_job_detail(driver)
-                    job_detail["link"] = link
-
-                    jobs.append(job_detail)
-
-                    driver.close()
-                    driver.switch_to.window(driver.window_handles[0])
-
-                except Exception as e:
-                    print(f"Error scraping job: {e}")
-                    try:
-                        driver.close()
-                        driver.switch_to.window(driver.window_handles[0])
-                    except:
-                        pass
-                    continue
-
-            print(f"[page {page}] collected {len(jobs)} jobs so far")
-
-        return jobs
-
-    finally:
-        driver.quit()
-
-def save_jobs_to_db(jobs, user_id, source="GradConnection"):
+                    if known and known.get(link) == fingerprint:
+                        skipped += 1
+                        results.append({"link": link, "fingerprint": fingerprint, "unchanged": True})
+                        continue
+                    # Scraped in the background by the next free browser
+                    results.append((executor.submit(scrape_job_link, pool, link, debug, backend), fingerprint))
+
+                print(f"[page {page}] queued {len(results) - skipped} jobs so far ({skipped} unchanged)")
+
+        if on_job is not None:
+            futures = {}
+            for entry in results:
+                if isinstance(entry, dict):
+                    on_job(entry)
+                else:
+                    futures[entry[0]] = entry[1]
+            for future in as_completed(futures):
+                job = future.result()
+                if job is not None:
+                    job["fingerprint"] = futures[future]
+                    on_job(job)
+
+        jobs = []
+        for entry in results:
+            if isinstance(entry, dict):
+                jobs.append(entry)
+                continue
+            future, fingerprint = entry
+            job = future.result()
+            if job is not None:
+                job["fingerprint"] = fingerprint
+                jobs.append(job)
+
+    print(f"[done] collected {len(jobs) - skipped} jobs, {skipped} unchanged")
+    return jobs
+
+def save_jobs_to_db(jobs, user_id, source="GradConnection", tags=None):
     """
-    Save a list of scraped jobs to the database for a specific user and source.
+    Save a list of scraped jobs to the shared job catalog for a specific user and source.
 
     Args:
-        jobs (list[dict]): The list of job dictionaries to save.
-        user_id (int): The user ID to associate with the jobs.
+        jobs (list[dict]): The list of job dictionaries to save (as returned by get_jobs_full).
+        user_id (int): The user ID whose scrape found the jobs.
         source (str): The source label for the jobs (default: 'GradConnection').
-
-    This function first deletes any existing scraped jobs for the user/source, then inserts the new jobs.
+        tags (dict, optional): tag_jobtype, tag_location and tag_category of the scrape's filters, e.g.
+            {"tag_jobtype": jobtype, "tag_location": location, "tag_category": discipline} as in
+            scrape_queue.scrape_tags (None for a scrape without filters).
+
+    Jobs are upserted into the catalog by link (unchanged jobs only get their 'last_seen' refreshed) and
+    recorded as seen by the user under the scrape's filters. Jobs of the source that the user's previous
+    scrapes with the same filters found but this one did not are forgotten for the user under those filters
+    (see job_catalog.remove_stale_sightings); sightings under other filters are kept. Everything is written
+    in one transaction.
     """
-    from app.models import db, ScrapedJob
-    import json
-    # Delete existing scraped jobs for this user and source
-    ScrapedJob.query.filter_by(user_id=user_id, source=source).delete()
-    db.session.commit()
+    tags = tags or {}
+    now = datetime.now(timezone.utc)
+    entries = []
     for job in jobs:
-        scraped_job = ScrapedJob(
-            user_id=user_id,
-            title=job.get("title"),
-            posted_date=job.get("posted_date"),
-            closing_in=job.get("closing_in"),
-            ai_summary=job.get("ai_summary"),
-            overview=json.dumps(job.get("overview", [])),
-            responsibilities=json.dumps(job.get("responsibilities", [])),
-            requirements=json.dumps(job.get("requirements", [])),
-            skills_and_qualities=json.dumps(job.get("skills_and_qualities", [])),
-            salary_info=json.dumps(job.get("salary_info", [])),
-            about_company=json.dumps(job.get("about_company", [])),
-            full_text=job.get("full_text"),
-            link=job.get("link"),
-            source=source
-        )
-        db.session.add(scraped_job)
+        if job.get("unchanged"):
+            entries.append({"link": job.get("link"), "unchanged": True, "last_seen": now})
+        else:
+            entries.append(dict(job_columns(job), last_seen=now))
+    save_catalog_batch(entries, user_id, now, source=source, tags=tags)
+    remove_stale_sightings(user_id, {job.get("link") for job in jobs}, source=source, tags=tags)
     db.session.commit()
+    mark_jobs_changed()
 
 # ───────────────────────────── CLI example ────────────────────────────────────
 if __name__ == "__main__":
@@ -0,0 +1,458 @@
+import re
+import threading
+from flask import current_app
+from sqlalchemy import and_, event, inspect, literal, literal_column, or_, select, text
+from app.models import db, ScrapedJob, UserScrapedJob
+from app.utils.cache import LRUCache
+from app.utils.fuzzy_search import build_search_document, decode_job_fields, TrigramIndex
+from app.utils.job_catalog import IN_CHUNK_SIZE
+from app.utils.pagination import encode_cursor, decode_cursor
+
+"""
+Full-text search index for scraped job listings.
+
+This module keeps an SQLite FTS5 virtual table in sync with the 'scraped_job' table using triggers, and provides
+helpers to translate free-text searches into FTS5 queries. Searching, tag filtering, counting and pagination
+are all pushed down to the database so that only the requested page of jobs is ever loaded into Python, and
+the totals and first pages of recent queries are cached until the scraped jobs change.
+When a search has no full-text match (e.g. a typo), an in-memory trigram index provides typo-tolerant results.
+"""
+
+FTS_TABLE = "scraped_job_fts"
+
+# Columns of 'scraped_job' mirrored into the full-text index (JSON section columns are indexed as-is;
+# the FTS5 tokenizer treats the JSON brackets and quotes as separators).
+FTS_COLUMNS = (
+    "title",
+    "ai_summary",
+    "full_text",
+    "overview",
+    "responsibilities",
+    "requirements",
+    "skills_and_qualities",
+    "salary_info",
+    "about_company",
+)
+
+# BM25 field boosts: a hit in the title counts far more than one buried in the full description
+FIELD_WEIGHTS = {
+    "title": 10.0,
+    "ai_summary": 4.0,
+    "full_text": 1.0,
+}
+
+
+def _index_ddl():
+    """
+    Build the DDL statements for the FTS5 table and the triggers that keep it in sync.
+
+    Returns:
+        list[str]: Idempotent CREATE statements, safe to run against an existing database.
+    """
+    cols = ", ".join(FTS_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{cols}, content='scraped_job', content_rowid='id')",
+        # External-content FTS tables are updated by inserting the special 'delete' command with the old values
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON scraped_job BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON scraped_job BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END",
+        # Only re-index when an indexed column changes (not e.g. for precomputed/tag-only updates)
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {cols} ON scraped_job BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def create_search_index(connection, rebuild=False):
+    """
+    Create the FTS5 index and its sync triggers on the given connection.
+
+    Args:
+        connection: An SQLAlchemy connection bound to the application database.
+        rebuild (bool): If True, repopulate the index from the current contents of 'scraped_job'.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in _index_ddl():
+        connection.exec_driver_sql(statement)
+    if rebuild:
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def ensure_search_index(debug=False):
+    """
+    Make sure the FTS5 index exists for a database created before the index was introduced.
+
+    Must be called inside an application context (e.g. right after db.create_all() in run.py).
+    Existing rows are indexed once when the index is first created, and rows stored without a
+    precomputed search document are backfilled.
+
+    Args:
+        debug (bool): If True, prints a message when the index is (re)built.
+    """
+    with db.engine.begin() as connection:
+        if connection.dialect.name != "sqlite":
+            return
+        missing = not inspect(connection).has_table(FTS_TABLE)
+        create_search_index(connection, rebuild=missing)
+    if missing and debug:
+        print(f"[SEARCH] built {FTS_TABLE} from existing scraped jobs")
+    backfill_search_documents(debug=debug)
+
+
+def backfill_search_documents(batch_size=500, debug=False):
+    """
+    Precompute the company and search document for scraped jobs stored without one.
+
+    Args:
+        batch_size (int): Number of rows to update per transaction.
+        debug (bool): If True, prints how many rows were updated.
+
+    Returns:
+        int: The number of jobs updated.
+    """
+    updated = 0
+    while True:
+        batch = ScrapedJob.query.filter(ScrapedJob.search_text.is_(None)).limit(batch_size).all()
+        if not batch:
+            break
+        for job in batch:
+            document = build_search_document(decode_job_fields(job))
+            job.company = document["company"]
+            job.search_text = document["search_text"]
+        db.session.commit()
+        updated += len(batch)
+    if updated and debug:
+        print(f"[SEARCH] precomputed search documents for {updated} scraped jobs")
+    return updated
+
+
+@event.listens_for(ScrapedJob.__table__, "after_create")
+def _create_index_with_table(target, connection, **kw):
+    """Create the full-text index whenever db.create_all() creates the 'scraped_job' table."""
+    create_search_index(connection)
+
+
+@event.listens_for(ScrapedJob.__table__, "before_drop")
+def _drop_index_with_table(target, connection, **kw):
+    """Drop the full-text index together with the 'scraped_job' table (triggers are dropped automatically)."""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def build_match_query(search):
+    """
+    Translate a free-text search string into an FTS5 MATCH expression.
+
+    The words are matched as a phrase with the last word treated as a prefix, so 'software eng' matches
+    'Software Engineer'. Any FTS5 syntax in the input is neutralised by quoting.
+
+    Args:
+        search (str): Raw search text from the user.
+
+    Returns:
+        str | None: The MATCH expression, or None if the search contains no searchable words.
+    """
+    tokens = re.findall(r"\w+", (search or "").lower())
+    if not tokens:
+        return None
+    return '"' + " ".join(tokens) + '"*'
+
+
+def _ranked_matches(match):
+    """
+    Build a subquery of the jobs matching an FTS5 expression together with their BM25 relevance.
+
+    Args:
+        match (str): An FTS5 MATCH expression (see build_match_query).
+
+    Returns:
+        sqlalchemy.sql.Subquery: Columns 'job_id' and 'score' (FTS5 bm25: lower is more relevant).
+    """
+    weights = ", ".join(str(FIELD_WEIGHTS.get(column, 1.0)) for column in FTS_COLUMNS)
+    return text(
+        f"SELECT rowid AS job_id, bm25({FTS_TABLE}, {weights}) AS score "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    ).bindparams(match=match).columns(job_id=db.Integer, score=db.Float).subquery("ranked")
+
+
+def filtered_jobs_query(search="", location="", job_type="", category=""):
+    """
+    Build a query for scraped jobs matching the search text and tag filters.
+
+    Args:
+        search (str): Free-text search over the indexed job fields.
+        location (str): Exact (case-insensitive) filter on the location tags the job was listed under.
+        job_type (str): Exact (case-insensitive) filter on the job type tags the job was listed under.
+        category (str): Exact (case-insensitive) filter on the category tags the job was listed under.
+
+    Returns:
+        sqlalchemy.orm.Query: An unordered query of (ScrapedJob, score) rows; the score is the
+        BM25 relevance when searching (lower is better) and None otherwise.
+    """
+    match = build_match_query(search)
+    if match:
+        ranked = _ranked_matches(match)
+        query = db.session.query(ScrapedJob, ranked.c.score).join(ranked, ScrapedJob.id == ranked.c.job_id)
+    else:
+        query = db.session.query(ScrapedJob, literal(None).label("score"))
+    # A job matches a tag filter if any scrape listed it under that tag (a job can be listed under several,
+    # so the tags live on the sightings). Tags are stored as lowercase slugs, so plain equality can use
+    # ix_user_scraped_job_tag_jobs.
+    tag_filters = [column == value.strip().lower()
+                   for column, value in ((UserScrapedJob.tag_location, location),
+                                         (UserScrapedJob.tag_jobtype, job_type),
+                                         (UserScrapedJob.tag_category, category)) if value]
+    if tag_filters:
+        query = query.filter(ScrapedJob.id.in_(select(UserScrapedJob.job_id).where(*tag_filters)))
+    return query
+
+
+def _search_state():
+    """
+    Get the per-application search state (stored in app.extensions so each app instance has its own index).
+
+    Returns:
+        dict: 'fuzzy_index' (TrigramIndex or None until built), the 'lock' guarding it, and the
+        'cache' of search results.
+    """
+    state = current_app.extensions.get("search_index")
+    if state is None:
+        state = current_app.extensions.setdefault("search_index", {
+            "fuzzy_index": None,
+            "lock": threading.Lock(),
+            "cache": LRUCache(max_entries=current_app.config.get("SEARCH_CACHE_SIZE", 256),
+                              ttl=current_app.config.get("SEARCH_CACHE_TTL", 300)),
+        })
+    return state
+
+
+def get_fuzzy_index():
+    """
+    Get the trigram index over all scraped jobs, building it from the database on first use.
+
+    Only the id and precomputed search document of each job are loaded. Must be called inside an
+    application context.
+
+    Returns:
+        TrigramIndex: The shared index.
+    """
+    state = _search_state()
+    with state["lock"]:
+        if state["fuzzy_index"] is None:
+            index = TrigramIndex()
+            for job_id, search_text in db.session.query(ScrapedJob.id, ScrapedJob.search_text):
+                index.add(job_id, search_text)
+            state["fuzzy_index"] = index
+        return state["fuzzy_index"]
+
+
+def reset_fuzzy_index():
+    """Discard the trigram index so it is rebuilt on next use. Call after scraped jobs are added or removed."""
+    state = _search_state()
+    with state["lock"]:
+        state["fuzzy_index"] = None
+
+
+def get_search_cache():
+    """
+    Get the cache of search results (total, ranking mode and the job ids of a few pages per normalized query).
+
+    Returns:
+        LRUCache: The per-application cache; see its stats() for hit/miss counters.
+    """
+    return _search_state()["cache"]
+
+
+def mark_jobs_changed():
+    """
+    Invalidate cached search results and the trigram index. Call after scraped jobs are added, changed
+    or removed (once per committed batch, not per row).
+    """
+    get_search_cache().invalidate()
+    reset_fuzzy_index()
+
+
+def normalize_query(search="", location="", job_type="", category=""):
+    """
+    Normalize search parameters so equivalent requests share a cache entry.
+
+    The search text is reduced to its lowercase words (the same tokens used for matching), and the tag
+    filters are trimmed and lowercased.
+
+    Returns:
+        tuple: (search, location, job_type, category) in normalized form.
+    """
+    words = " ".join(re.findall(r"\w+", (search or "").lower()))
+    return (words,) + tuple((value or "").strip().lower() for value in (location, job_type, category))
+
+
+def _fuzzy_matches(search, location, job_type, category, confidence):
+    """
+    Typo-tolerant fallback ranking with the trigram index, restricted to the jobs passing the tag filters.
+
+    Only job ids are read while applying the tag filters (in chunks of IN_CHUNK_SIZE ids).
+
+    Returns:
+        list[tuple]: (job_id, similarity) pairs, most similar first (ties by id).
+    """
+    ranked = get_fuzzy_index().search(search, confidence)
+    ids = [job_id for job_id, _ in ranked]
+    allowed = set()
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        allowed.update(job_id for job_id, in filtered_jobs_query("", location, job_type, category)
+                       .filter(ScrapedJob.id.in_(ids[start:start + IN_CHUNK_SIZE])).with_entities(ScrapedJob.id))
+    return [(job_id, similarity) for job_id, similarity in ranked if job_id in allowed]
+
+
+def _search_page(mode, search, location, job_type, category, offset, after, limit, fuzzy=None):
+    """
+    Fetch one page of results, seeking past the cursor's sort key (or skipping offset rows) in result order.
+
+    For 'fts' and 'date' the ranking, tag filters, seek and LIMIT run in one SQL query, so SQLite only keeps
+    the best rows of the page while scanning the matches. One extra row is fetched to find out whether there
+    is a next page.
+
+    Args:
+        mode (str): 'fts' (BM25), 'date' (closing date) or 'fuzzy' (trigram similarity).
+        offset (int): Number of results to skip (ignored when after is given).
+        after (list | None): The (ranking value, job id) of the last row of the previous page.
+        limit (int): Maximum number of jobs to return.
+        fuzzy (list, optional): The _fuzzy_matches of the query (needed in 'fuzzy' mode).
+
+    Returns:
+        tuple: (rows, next_cursor) where rows are (job, value) pairs, value being the job's BM25 score,
+        closing date or similarity, and next_cursor is None on the last page.
+    """
+    if mode == "fuzzy":
+        ordered = fuzzy
+        if after:
+            # Results are sorted by (-similarity, id), so seek past the last key seen
+            last_key = (-after[0], after[1])
+            page = [pair for pair in ordered if (-pair[1], pair[0]) > last_key][:limit + 1]
+        else:
+            page = ordered[offset:offset + limit + 1]
+        jobs = {job.id: job for job in ScrapedJob.query.filter(ScrapedJob.id.in_([job_id for job_id, _ in page]))}
+        rows = [(jobs[job_id], similarity) for job_id, similarity in page if job_id in jobs]
+    else:
+        query = filtered_jobs_query(search, location, job_type, category)
+        if mode == "fts":
+            score = literal_column("score")
+            order = (score, ScrapedJob.id)
+            if after:
+                last_score, last_id = after
+                query = query.filter(or_(score > last_score, and_(score == last_score, ScrapedJob.id > last_id)))
+        else:
+            no_date = ScrapedJob.closing_date.is_(None)
+            order = (no_date, ScrapedJob.closing_date, ScrapedJob.id)
+            if after:
+                last_date, last_id = after
+                if last_date is None:
+                    query = query.filter(no_date, ScrapedJob.id > last_id)
+                else:
+                    query = query.filter(or_(ScrapedJob.closing_date > last_date,
+                                             and_(ScrapedJob.closing_date == last_date, ScrapedJob.id > last_id),
+                                             no_date))
+        query = query.order_by(*order)
+        if not after:
+            query = query.offset(offset)
+        rows = [(job, value if mode == "fts" else job.closing_date) for job, value in query.limit(limit + 1)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_job, last_value = rows[-1]
+        next_cursor = encode_cursor(mode, last_value, last_job.id)
+    return rows, next_cursor
+
+
+def search_jobs(search="", location="", job_type="", category="", offset=0, limit=10, cursor=None,
+                confidence=None):
+    """
+    Search scraped jobs and return a single page of results, most relevant first.
+
+    Searches are ranked by BM25 over the full-text index with FIELD_WEIGHTS boosts; without a search term
+    jobs are ordered by closing date (soonest first, undated jobs last). If the full-text search finds
+    nothing, the search falls back to typo-tolerant matching with the trigram index, ranked by similarity.
+    The tag filters are always applied by the database.
+
+    Pages are addressed either by offset or, preferably, by the opaque cursor returned with the previous
+    page. Cursor pages seek straight past the last row seen (keyset pagination), so page N costs the same
+    as page 1 and rows added while a client is paging do not shift later pages.
+
+    Each normalized query's total and ranking mode are cached (see get_search_cache), together with the
+    ids of up to SEARCH_CACHE_PAGES of its pages, until the entry expires or the scraped jobs change (see
+    mark_jobs_changed). A cached page only loads its rows by id; other pages are fetched as above.
+
+    Args:
+        search (str): Free-text search over the indexed job fields.
+        location (str): Location tag filter.
+        job_type (str): Job type tag filter.
+        category (str): Category tag filter.
+        offset (int): Number of matching jobs to skip (ignored when a cursor is given).
+        limit (int): Maximum number of jobs to return.
+        cursor (str, optional): The 'next_cursor' of the previous page.
+        confidence (float, optional): Similarity threshold for the fuzzy fallback
+            (defaults to the FUZZY_SEARCH_CONFIDENCE config value, or 0.6).
+
+    Returns:
+        tuple: (rows, total, next_cursor) where rows is the requested page as (job, score) pairs (scores are
+        higher-is-better: negated BM25, fuzzy similarity, or None without a search), total is the number of
+        matches, and next_cursor is None on the last page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    if confidence is None:
+        confidence = current_app.config.get("FUZZY_SEARCH_CONFIDENCE", 0.6)
+    search, location, job_type, category = normalize_query(search, location, job_type, category)
+    after = None
+    if cursor:
+        cursor_mode, *after = decode_cursor(cursor, 3)
+        if cursor_mode not in ("fts", "date", "fuzzy"):
+            raise ValueError("Invalid cursor")
+
+    cache = get_search_cache()
+    key = (search, location, job_type, category, confidence)
+    entry = cache.get(key)
+    fuzzy = None
+    if entry is None:
+        version = cache.version
+        mode = "fts" if build_match_query(search) else "date"
+        total = filtered_jobs_query(search, location, job_type, category).order_by(None).count()
+        if total == 0 and mode == "fts":
+            # No full-text match (e.g. a typo): fall back to the trigram index
+            mode = "fuzzy"
+            fuzzy = _fuzzy_matches(search, location, job_type, category, confidence)
+            total = len(fuzzy)
+        entry = {"mode": mode, "total": total, "pages": {}}
+        cache.put(key, entry, version=version)
+        if current_app.config.get('DEBUG', False):
+            print(f"[CACHE] miss {key} -> {total} matches")
+    elif current_app.config.get('DEBUG', False):
+        print(f"[CACHE] hit {key}")
+
+    # A cursor keeps the mode of the page it came from, even if the jobs changed since
+    mode = cursor_mode if cursor else entry["mode"]
+    offset = max(offset, 0)
+    window = (cursor or offset, limit)
+    cached = entry["pages"].get(window)
+    if cached is None:
+        if mode == "fuzzy" and fuzzy is None:
+            fuzzy = _fuzzy_matches(search, location, job_type, category, confidence)
+        rows, next_cursor = _search_page(mode, search, location, job_type, category, offset, after, limit, fuzzy)
+        if len(entry["pages"]) < current_app.config.get("SEARCH_CACHE_PAGES", 8):
+            entry["pages"][window] = ([(job.id, value) for job, value in rows], next_cursor)
+    else:
+        page, next_cursor = cached
+        jobs = {job.id: job for job in ScrapedJob.query.filter(ScrapedJob.id.in_([job_id for job_id, _ in page]))}
+        rows = [(jobs[job_id], value) for job_id, value in page if job_id in jobs]
+
+    if mode == "fts":
+        rows = [(job, -value) for job, value in rows]
+    elif mode == "date":
+        rows = [(job, None) for job, _ in rows]
+    return rows, entry["total"], next_cursor
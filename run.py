@@ -2,6 +2,11 @@ import os
 from app import create_app
 from app.models import db
 from app.config import DevelopmentConfig, ProductionConfig, TestingConfig
+from app.utils.db_upgrade import upgrade_schema
+from app.utils.search_index import ensure_search_index
+from app.utils.scrape_queue import resume_scrape_tasks
+from app.utils.scrape_broker import hold_server_lock
+from werkzeug.serving import is_running_from_reloader
 
 from dotenv import load_dotenv
 
@@ -18,8 +23,24 @@ config_map = {
 config_name = os.environ.get("APP_CONFIG", "development")
 app = create_app(config_map[config_name])
 
+# The debug reloader's parent process only restarts the server, so it neither locks nor resumes scrapes
+serving = not (__name__ == "__main__" and app.debug and not is_running_from_reloader())
+
 with app.app_context():
+    if serving:
+        # Streams and the scrape queue live in this process: refuse to run a second one (e.g. --workers 2)
+        hold_server_lock()
     db.create_all()
+    # Add columns introduced since the database was created
+    upgrade_schema(debug=app.config.get("DEBUG", False))
+    # Build the full-text job index for databases created before it existed
+    ensure_search_index(debug=app.config.get("DEBUG", False))
+    # Pick up scrapes that were queued or running when the server stopped
+    if serving:
+        resume_scrape_tasks(debug=app.config.get("DEBUG", False))
+
+# ASGI servers (e.g. `uvicorn run:asgi_app`) serve event streams without a thread per client
+asgi_app = app.asgi_app
 
 if __name__ == "__main__":
     app.run(port=5001)
\ No newline at end of file
@@ -7,7 +7,8 @@ with correct relationships maintained.
 """
 
 import unittest
-from app.models import db, User, JobApplication
+from app.models import db, User, JobApplication, ScrapedJob, UserScrapedJob
+from app.utils.job_catalog import canonical_link, collapse_duplicate_jobs
 from tests.base import FlaskTestBase
 from datetime import datetime, timezone
 
@@ -68,5 +69,50 @@ class TestModels(FlaskTestBase):
 
     # Add more tests for relationships, updates, deletes, etc. as needed
 
+class TestJobCatalog(FlaskTestBase):
+    """
+    Tests for collapsing per-user scraped job copies into the shared catalog.
+    """
+    def test_collapse_duplicate_jobs(self):
+        """
+        Test that copies of a job collapse into its most recent copy, with a
+        sighting per user and applications re-pointed to the kept row.
+        """
+        alice = User(name='alice', email='alice@example.com', password='pass')
+        bob = User(name='bob', email='bob@example.com', password='pass')
+        db.session.add_all([alice, bob])
+        db.session.commit()
+        # Databases from before the catalog had no unique link index
+        db.session.execute(db.text('DROP INDEX uq_scraped_job_link'))
+        link = 'https://au.gradconnection.com/employers/acme/jobs/acme-intern/'
+        old = ScrapedJob(user_id=alice.id, title='Intern (old)', link=link + '?utm_source=mail', tag_category='mining')
+        new = ScrapedJob(user_id=bob.id, title='Intern', link=link, tag_category='engineering')
+        other = ScrapedJob(user_id=alice.id, title='Other', link='https://au.gradconnection.com/other/')
+        db.session.add_all([old, new, other])
+        db.session.commit()
+        application = JobApplication(title='Intern', company='Acme', user_id=alice.id, scraped_job_id=old.id)
+        db.session.add(application)
+        db.session.commit()
+
+        with db.engine.begin() as connection:
+            self.assertEqual(collapse_duplicate_jobs(connection), 1)
+        with db.engine.begin() as connection:
+            self.assertEqual(collapse_duplicate_jobs(connection), 0)  # safe to re-run
+        db.session.expire_all()
+
+        self.assertEqual([job.title for job in ScrapedJob.query.order_by(ScrapedJob.id)], ['Intern', 'Other'])
+        self.assertEqual(db.session.get(JobApplication, application.id).scraped_job_id, new.id)
+        sightings = {(s.user_id, s.job_id): s.tag_category for s in UserScrapedJob.query}
+        self.assertEqual(sightings, {(alice.id, new.id): 'mining', (bob.id, new.id): 'engineering',
+                                     (alice.id, other.id): None})
+
+    def test_canonical_link(self):
+        """
+        Test that tracking parameters, fragments and case differences in the
+        host do not create separate catalog entries.
+        """
+        self.assertEqual(canonical_link('HTTPS://AU.GradConnection.com/jobs/x?utm_source=a&page=2#apply'),
+                         'https://au.gradconnection.com/jobs/x/?page=2')
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,8 +6,25 @@ including authentication flows, navigation, and access control. It simulates
 HTTP requests and validates responses.
 """
 
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
 import unittest
-from app.models import db, User
+from unittest.mock import patch
+from app import routes
+from app.models import db, User, ScrapedJob, Notification, UserScrapedJob, ScrapeTask, ResumeAnalysis, JobApplication
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.exc import OperationalError
+from app.utils.fuzzy_search import build_search_document
+from app.utils.job_catalog import sighting_key
+from app.utils.scraper_GC_jobs_detailed import save_jobs_to_db
+from app.utils import application_stats, scrape_broker, search_index, resume_processor
+from app.utils.scrape_broker import get_scrape_broker, get_notification_broker
+from app.routes import create_notification
+from app.utils.scrape_queue import get_scrape_queue, resume_scrape_tasks, submit_scrape
 from tests.base import FlaskTestBase
 
 class TestRoutes(FlaskTestBase):
@@ -205,5 +222,931 @@ class TestRoutes(FlaskTestBase):
     # For example, test /api/scraped-jobs, /add-application, etc.
     # To test authenticated endpoints, set session['name'] as above.
 
+class TestScrapedJobsApi(FlaskTestBase):
+    """
+    Tests for the /api/scraped-jobs search endpoint.
+
+    Verifies that full-text search, tag filtering, counting and pagination
+    are served from the database-backed search index.
+    """
+    def setUp(self):
+        """
+        Set up a user and a handful of scraped jobs before each test method runs.
+        """
+        super().setUp()
+        user = User(name='searcher', email='search@example.com', password='searchpass')
+        db.session.add(user)
+        db.session.commit()
+        self.user = user
+        jobs = [
+            ('Graduate Software Engineer', 'Build backend services.', 'perth', 'graduate-jobs'),
+            ('Mining Engineering Intern', 'Work on site in the Pilbara.', 'perth', 'internships'),
+            ('Data Analyst Intern', 'Analyse software usage data.', 'sydney', 'internships'),
+        ]
+        for title, full_text, location, jobtype in jobs:
+            # Precompute the search document as the scraper does on insert
+            document = build_search_document({'title': title, 'full_text': full_text, 'about_company': ['Acme']})
+            job = ScrapedJob(
+                user_id=user.id,
+                title=title,
+                full_text=full_text,
+                about_company='["Acme"]',
+                company=document['company'],
+                search_text=document['search_text'],
+                link=f'https://example.com/{title.replace(" ", "-")}',
+                tag_location=location,
+                tag_jobtype=jobtype,
+            )
+            db.session.add(job)
+            db.session.flush()
+            self.add_sighting(job, user, location=location, jobtype=jobtype)
+        db.session.commit()
+
+    def add_sighting(self, job, user, location=None, jobtype=None, category=None):
+        """
+        Record that one of the user's scrapes listed the job under the given tags.
+        """
+        tags = {'tag_location': location, 'tag_jobtype': jobtype, 'tag_category': category}
+        db.session.add(UserScrapedJob(user_id=user.id, job_id=job.id, filter_key=sighting_key(tags), **tags))
+
+    def test_search_matches_title_and_full_text(self):
+        """
+        Test that the search term is matched against the indexed job fields.
+
+        'software' appears in one title and one description, and prefix
+        matching lets 'engineer' match 'Engineering'.
+        """
+        data = self.client.get('/api/scraped-jobs?search=software').get_json()
+        self.assertEqual(data['total'], 2)
+        titles = {job['title'] for job in data['jobs']}
+        self.assertEqual(titles, {'Graduate Software Engineer', 'Data Analyst Intern'})
+
+        data = self.client.get('/api/scraped-jobs?search=engineer').get_json()
+        self.assertEqual(data['total'], 2)
+
+    def test_tag_filters_and_pagination(self):
+        """
+        Test that tag filters and offset/limit paging are applied by the query.
+        """
+        data = self.client.get('/api/scraped-jobs?type=internships&limit=1').get_json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(len(data['jobs']), 1)
+        self.assertTrue(data['has_more'])
+        self.assertEqual(data['jobs'][0]['company'], 'Acme')
+
+        data = self.client.get('/api/scraped-jobs?type=internships&location=Perth').get_json()
+        self.assertEqual([job['title'] for job in data['jobs']], ['Mining Engineering Intern'])
+
+    def test_tag_filters_match_whole_tags_using_index(self):
+        """
+        Test that tag filters match whole tag slugs, and that the query
+        planner serves them from the composite tag index.
+        """
+        data = self.client.get('/api/scraped-jobs?type=intern').get_json()
+        self.assertEqual(data['total'], 0)
+        data = self.client.get('/api/scraped-jobs?type=Graduate-Jobs').get_json()
+        self.assertEqual([job['title'] for job in data['jobs']], ['Graduate Software Engineer'])
+
+        sql = str(search_index.filtered_jobs_query(job_type='internships', location='perth')
+                  .statement.compile(compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[-1] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)))
+        self.assertIn('ix_user_scraped_job_tag_jobs', plan)
+
+    def test_search_results_ranked_by_relevance(self):
+        """
+        Test that search results are ordered by BM25 relevance.
+
+        Title hits are boosted above a hit in the description only, even for
+        a job inserted after the description-only match.
+        """
+        user = User.query.filter_by(email='search@example.com').first()
+        for title in ['Software Developer', 'Registered Nurse', 'Sous Chef', 'Site Geologist']:
+            db.session.add(ScrapedJob(user_id=user.id, title=title, full_text='Full time role.'))
+        db.session.commit()
+
+        data = self.client.get('/api/scraped-jobs?search=software').get_json()
+        titles = [job['title'] for job in data['jobs']]
+        self.assertEqual(set(titles[:2]), {'Graduate Software Engineer', 'Software Developer'})
+        self.assertEqual(titles[2], 'Data Analyst Intern')
+        scores = [job['score'] for job in data['jobs']]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertGreater(scores[1], scores[2])
+
+        # Paging continues in ranked order
+        data = self.client.get('/api/scraped-jobs?search=software&offset=2&limit=1').get_json()
+        self.assertEqual([job['title'] for job in data['jobs']], ['Data Analyst Intern'])
+        self.assertFalse(data['has_more'])
+
+    def test_cursor_pagination_by_closing_date(self):
+        """
+        Test keyset pagination of the unfiltered job list.
+
+        Jobs are ordered by closing date (undated last), and following
+        next_cursor walks every job exactly once without recounting.
+        """
+        jobs = ScrapedJob.query.order_by(ScrapedJob.id).all()
+        jobs[0].closing_date = datetime(2030, 3, 1)
+        jobs[2].closing_date = datetime(2030, 1, 1)
+        db.session.commit()
+
+        data = self.client.get('/api/scraped-jobs?limit=2').get_json()
+        self.assertEqual(data['total'], 3)
+        seen = [job['title'] for job in data['jobs']]
+        self.assertEqual(seen, ['Data Analyst Intern', 'Graduate Software Engineer'])
+        self.assertTrue(data['has_more'])
+
+        data = self.client.get(f"/api/scraped-jobs?limit=2&cursor={data['next_cursor']}").get_json()
+        self.assertEqual([job['title'] for job in data['jobs']], ['Mining Engineering Intern'])
+        self.assertEqual(data['total'], 3)
+        self.assertFalse(data['has_more'])
+        self.assertIsNone(data['next_cursor'])
+
+        response = self.client.get('/api/scraped-jobs?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination_of_search_results(self):
+        """
+        Test that cursors continue ranked search results in order.
+        """
+        first = self.client.get('/api/scraped-jobs?search=intern&limit=1').get_json()
+        rest = self.client.get(f"/api/scraped-jobs?search=intern&limit=1&cursor={first['next_cursor']}").get_json()
+        titles = [job['title'] for job in first['jobs'] + rest['jobs']]
+        self.assertEqual(sorted(titles), ['Data Analyst Intern', 'Mining Engineering Intern'])
+        self.assertFalse(rest['has_more'])
+
+    def test_cache_keeps_totals_and_bounded_pages(self):
+        """
+        Test that a cached search keeps its total and at most
+        SEARCH_CACHE_PAGES pages of job ids, with later pages still fetched
+        by seeking past the cursor, and that the typo-tolerant fallback
+        applies the tag filters in chunks of ids.
+        """
+        self.app.config['SEARCH_CACHE_PAGES'] = 1
+        titles = []
+        data = self.client.get('/api/scraped-jobs?limit=1').get_json()
+        while True:
+            titles += [job['title'] for job in data['jobs']]
+            self.assertEqual(data['total'], 3)
+            if not data['has_more']:
+                break
+            data = self.client.get(f"/api/scraped-jobs?limit=1&cursor={data['next_cursor']}").get_json()
+        self.assertEqual(sorted(titles), ['Data Analyst Intern', 'Graduate Software Engineer',
+                                          'Mining Engineering Intern'])
+        entry = search_index.get_search_cache().get(('', '', '', '', 0.6))
+        self.assertEqual((entry['mode'], entry['total'], len(entry['pages'])), ('date', 3, 1))
+
+        with patch.object(search_index, 'IN_CHUNK_SIZE', 1):
+            data = self.client.get('/api/scraped-jobs?search=sofware&limit=1').get_json()
+            self.assertEqual(data['total'], 2)
+            rest = self.client.get(f"/api/scraped-jobs?search=sofware&cursor={data['next_cursor']}").get_json()
+        self.assertEqual(len(data['jobs'] + rest['jobs']), 2)
+        self.assertFalse(rest['has_more'])
+
+    def test_typo_tolerant_fallback(self):
+        """
+        Test that a misspelt search falls back to the trigram index.
+
+        'sofware' has no full-text match, so results come from fuzzy matching
+        with the tag filters still applied.
+        """
+        data = self.client.get('/api/scraped-jobs?search=sofware').get_json()
+        self.assertEqual(data['total'], 2)
+
+        data = self.client.get('/api/scraped-jobs?search=sofware&location=sydney').get_json()
+        self.assertEqual([job['title'] for job in data['jobs']], ['Data Analyst Intern'])
+
+        data = self.client.get('/api/scraped-jobs?search=xyzzy').get_json()
+        self.assertEqual(data['total'], 0)
+
+    def test_index_follows_deletes(self):
+        """
+        Test that deleting a scraped job removes it from search results.
+        """
+        ScrapedJob.query.filter_by(title='Data Analyst Intern').delete()
+        db.session.commit()
+        data = self.client.get('/api/scraped-jobs?search=software').get_json()
+        self.assertEqual(data['total'], 1)
+
+    def test_results_are_cached_until_jobs_change(self):
+        """
+        Test that repeated searches are served from the result cache and that
+        marking the scraped jobs as changed invalidates it.
+        """
+        stats = search_index.get_search_cache().stats()
+        self.client.get('/api/scraped-jobs?search=Intern&location=Perth')
+        data = self.client.get('/api/scraped-jobs?search=intern&location=perth%20').get_json()
+        self.assertEqual(data['total'], 1)
+        after = search_index.get_search_cache().stats()
+        self.assertEqual(after['misses'] - stats['misses'], 1)
+        self.assertEqual(after['hits'] - stats['hits'], 1)
+
+        job = ScrapedJob(user_id=self.user.id, title='Perth Intern', tag_location='perth',
+                         link='https://example.com/new')
+        db.session.add(job)
+        db.session.flush()
+        self.add_sighting(job, self.user, location='perth')
+        db.session.commit()
+        search_index.mark_jobs_changed()
+        data = self.client.get('/api/scraped-jobs?search=intern&location=perth').get_json()
+        self.assertEqual(data['total'], 2)
+
+        self.force_login(self.user)
+        stats = self.client.get('/api/search-cache-stats').get_json()
+        self.assertEqual(stats['invalidations'], 1)
+
+class TestBackgroundScraper(FlaskTestBase):
+    """
+    Tests for background_scraper's incremental upsert of scraped jobs.
+    """
+    def setUp(self):
+        """
+        Set up a user whose scrapes are written in small batches.
+        """
+        super().setUp()
+        self.app.config['SCRAPER_COMMIT_BATCH'] = 2
+        self.user = User(name='scraper', email='scraper@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+
+    def run_scrape(self, jobs, location='perth'):
+        """Run background_scraper synchronously with get_jobs_full reporting the given jobs."""
+        def get_jobs_full(**kwargs):
+            for job in jobs:
+                kwargs['on_job'](job)
+            return jobs
+        broker = get_scrape_broker()
+        scrape_id = broker.open(self.user.id)
+        self.subscription = broker.subscribe(scrape_id)
+        with patch('app.utils.scraper_GC_jobs_detailed.get_jobs_full', side_effect=get_jobs_full) as mock_get:
+            routes.background_scraper(self.app, self.user.id, 'internships', 'engineering', location,
+                                      scrape_id=scrape_id)
+        return mock_get.call_args.kwargs['known']
+
+    def streamed(self):
+        """Drain the last scrape's stream, returning the streamed job titles and whether it completed."""
+        titles = []
+        while True:
+            _, item = self.subscription.get(timeout=0)
+            if item.get('status') == 'complete':
+                return titles, True
+            titles.append(item['title'])
+
+    def test_repeat_scrape_upserts_and_skips_known_jobs(self):
+        """
+        Test that a repeat scrape passes stored fingerprints to the scraper,
+        keeps unchanged rows, updates changed ones in place, inserts new ones
+        and removes jobs that are no longer listed.
+        """
+        def job(link, title, fingerprint):
+            return {'link': link, 'title': title, 'fingerprint': fingerprint,
+                    'closing_in': 'Closing in 10 days', 'full_text': title}
+
+        self.run_scrape([job('https://gc.test/a', 'Job A', 'fa'),
+                         job('https://gc.test/b', 'Job B', 'fb'),
+                         job('https://gc.test/c', 'Job C', 'fc')])
+        first = {row.link: row.id for row in ScrapedJob.query}
+        self.assertEqual(len(first), 3)
+        self.assertEqual(self.streamed(), (['Job A', 'Job B', 'Job C'], True))
+
+        known = self.run_scrape([{'link': 'https://gc.test/a', 'fingerprint': 'fa', 'unchanged': True},
+                                 job('https://gc.test/b', 'Job B (updated)', 'fb2'),
+                                 job('https://gc.test/d', 'Job D', 'fd')])
+        self.assertEqual(known, {'https://gc.test/a': 'fa', 'https://gc.test/b': 'fb', 'https://gc.test/c': 'fc'})
+
+        rows = {row.link: row for row in ScrapedJob.query}
+        self.assertEqual(sorted(rows), ['https://gc.test/a', 'https://gc.test/b', 'https://gc.test/d'])
+        self.assertEqual(rows['https://gc.test/a'].id, first['https://gc.test/a'])
+        self.assertEqual(rows['https://gc.test/a'].title, 'Job A')
+        self.assertEqual(rows['https://gc.test/b'].id, first['https://gc.test/b'])
+        self.assertEqual(rows['https://gc.test/b'].title, 'Job B (updated)')
+        self.assertEqual(rows['https://gc.test/b'].fingerprint, 'fb2')
+        self.assertEqual(rows['https://gc.test/d'].tag_category, 'engineering')
+        self.assertTrue(all(row.last_seen for row in rows.values()))
+        # Unchanged jobs are streamed from their stored row
+        self.assertEqual(self.streamed(), (['Job A', 'Job B (updated)', 'Job D'], True))
+
+    def test_users_share_catalog_jobs(self):
+        """
+        Test that the same listing scraped by two users is stored once, with a
+        sighting per user, and survives one user no longer seeing it.
+        """
+        listing = [{'link': 'https://gc.test/a/', 'title': 'Job A', 'fingerprint': 'fa'}]
+        self.run_scrape(listing)
+        first_user = self.user
+        self.user = User(name='other', email='other@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.run_scrape(listing)
+        self.assertEqual(ScrapedJob.query.count(), 1)
+        job = ScrapedJob.query.one()
+        self.assertEqual(job.user_id, first_user.id)
+        self.assertEqual(sorted(s.user_id for s in job.sightings), sorted([first_user.id, self.user.id]))
+
+        self.run_scrape([])
+        self.assertEqual(ScrapedJob.query.count(), 1)
+        self.assertEqual([s.user_id for s in UserScrapedJob.query], [first_user.id])
+
+    def test_job_listed_under_several_filters_matches_each(self):
+        """
+        Test that a job listed under two locations is found by both location
+        filters without either scrape overwriting the job's stored tags, and
+        that a later scrape of one location only drops that location's sighting.
+        """
+        listing = [{'link': 'https://gc.test/a', 'title': 'Job A', 'fingerprint': 'fa'}]
+        self.run_scrape(listing)
+        self.run_scrape(listing, location='sydney')
+        job = ScrapedJob.query.one()
+        self.assertEqual(job.tag_location, 'perth')
+        self.assertEqual(sorted(s.tag_location for s in job.sightings), ['perth', 'sydney'])
+        for location in ('perth', 'sydney'):
+            data = self.client.get(f'/api/scraped-jobs?location={location}').get_json()
+            self.assertEqual([found['title'] for found in data['jobs']], ['Job A'])
+
+        self.run_scrape([], location='sydney')
+        self.assertEqual([s.tag_location for s in UserScrapedJob.query], ['perth'])
+        self.assertEqual(self.client.get('/api/scraped-jobs?location=sydney').get_json()['total'], 0)
+        self.assertEqual(self.client.get('/api/scraped-jobs?location=perth').get_json()['total'], 1)
+
+    def test_save_jobs_to_db_keeps_other_filters_sightings(self):
+        """
+        Test that save_jobs_to_db records sightings under the scrape's filters
+        and only forgets jobs the user last saw under those same filters.
+        """
+        perth = {'tag_jobtype': 'internships', 'tag_location': 'perth', 'tag_category': 'engineering'}
+        sydney = dict(perth, tag_location='sydney')
+        job = {'link': 'https://gc.test/a', 'title': 'Job A', 'fingerprint': 'fa'}
+        save_jobs_to_db([job], self.user.id, tags=perth)
+        save_jobs_to_db([job], self.user.id, tags=sydney)
+        self.assertEqual(sorted(s.filter_key for s in UserScrapedJob.query),
+                         ['internships|perth|engineering', 'internships|sydney|engineering'])
+
+        save_jobs_to_db([], self.user.id, tags=sydney)
+        self.assertEqual([s.tag_location for s in UserScrapedJob.query], ['perth'])
+
+class TestScrapingStream(FlaskTestBase):
+    """
+    Tests for streaming each scrape's jobs to the user who started it.
+    """
+    def setUp(self):
+        """
+        Set up two users scraping at the same time.
+        """
+        super().setUp()
+        self.alice = User(name='alice', email='alice@example.com', password='pass')
+        self.bob = User(name='bob', email='bob@example.com', password='pass')
+        db.session.add_all([self.alice, self.bob])
+        db.session.commit()
+        self.app.config['SCRAPE_QUEUE_WORKERS'] = 0  # queued scrapes are not run
+
+    def start_scrape(self):
+        """Start a scrape as alice without running the scraper, returning its scrape id."""
+        self.force_login(self.alice)
+        response = self.client.post('/api/start-scraping', json={'jobtype': 'Internships'})
+        self.assertEqual(response.status_code, 202)
+        return response.get_json()['scrape_id']
+
+    def test_concurrent_scrapes_stream_separately(self):
+        """
+        Test that each user's stream only carries their own scrape's jobs and
+        is not ended by another scrape completing.
+        """
+        alice_scrape = self.start_scrape()
+        with self.app.app_context():
+            broker = get_scrape_broker()
+            bob_scrape = broker.open(self.bob.id)
+            broker.publish(bob_scrape, {'title': 'Bob job'})
+            broker.close(bob_scrape)
+            broker.publish(alice_scrape, {'title': 'Alice job'})
+            broker.close(alice_scrape)
+
+        # Bob's scrape is not visible to alice
+        self.assertEqual(self.client.get(f'/api/scraping-stream?scrape_id={bob_scrape}').status_code, 404)
+        # Subscribed after it finished: the scrape's events are replayed
+        body = self.client.get(f'/api/scraping-stream?scrape_id={alice_scrape}').get_data(as_text=True)
+        self.assertIn('"title": "Alice job"', body)
+        self.assertNotIn('Bob job', body)
+        self.assertTrue(body.endswith('id: 2\ndata: {"status": "complete"}\n\n'))
+
+    def test_reconnect_replays_missed_events(self):
+        """
+        Test that a client reconnecting with Last-Event-ID only receives the
+        events after that id, and is told about events no longer in the history.
+        """
+        self.app.config['SCRAPE_STREAM_HISTORY'] = 3
+        scrape_id = self.start_scrape()
+        with self.app.app_context():
+            broker = get_scrape_broker()
+            for title in 'ABCD':
+                broker.publish(scrape_id, {'title': title})
+            broker.close(scrape_id)
+
+        body = self.client.get(f'/api/scraping-stream?scrape_id={scrape_id}',
+                               headers={'Last-Event-ID': '2'}).get_data(as_text=True)
+        self.assertEqual([line for line in body.splitlines() if line.startswith('id:')], ['id: 3', 'id: 4', 'id: 5'])
+        self.assertNotIn('"title": "B"', body)
+        # Events 1 and 2 have left the history (of 3 events)
+        body = self.client.get(f'/api/scraping-stream?scrape_id={scrape_id}').get_data(as_text=True)
+        self.assertTrue(body.startswith('data: {"type": "dropped", "count": 2}\n\nid: 3\n'))
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        """
+        Test that every subscriber gets each event, and that a subscriber whose
+        buffer is full loses the oldest events but still sees the scrape complete.
+        """
+        self.app.config['SCRAPE_STREAM_BUFFER'] = 2
+        with self.app.app_context():
+            broker = get_scrape_broker()
+            scrape_id = broker.open(self.alice.id)
+            first, second = broker.subscribe(scrape_id), broker.subscribe(scrape_id)
+            broker.publish(scrape_id, {'title': 'A'})
+            self.assertEqual(first.get(timeout=0), (1, {'title': 'A'}))
+            for title in 'BCD':
+                broker.publish(scrape_id, {'title': title})
+            broker.close(scrape_id)
+            self.assertEqual([first.get(timeout=0) for _ in range(4)],
+                             [(None, {'type': 'dropped', 'count': 1}), (3, {'title': 'C'}), (4, {'title': 'D'}),
+                              (5, {'status': 'complete'})])
+            self.assertEqual(second.get(timeout=0), (None, {'type': 'dropped', 'count': 2}))
+            self.assertEqual(broker.stats()['dropped'], 3)
+
+class TestScrapeQueue(FlaskTestBase):
+    """
+    Tests for queueing scrape requests as tasks run by the scrape workers.
+    """
+    def setUp(self):
+        """
+        Set up a signed-in user whose scrapes are run on demand by the test.
+        """
+        super().setUp()
+        self.app.config['SCRAPE_QUEUE_WORKERS'] = 0
+        routes.request_counts.clear()  # the scraping rate limit is kept in memory across tests
+        self.user = User(name='queued', email='queued@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.force_login(self.user)
+
+    def start_scrape(self, **filters):
+        """Request a scrape, returning its scrape id."""
+        response = self.client.post('/api/start-scraping', json=filters)
+        self.assertEqual(response.status_code, 202)
+        return response.get_json()['scrape_id']
+
+    def test_tasks_are_coalesced_and_run_by_workers(self):
+        """
+        Test that identical waiting requests share a task, and that running
+        the queue records each task's progress, outcome and duration.
+        """
+        first = self.start_scrape(jobtype='internships', location='Perth')
+        self.assertEqual(self.start_scrape(jobtype='Internships', location='perth'), first)
+        other = self.start_scrape(jobtype='graduate-jobs')
+        self.assertEqual(ScrapeTask.query.count(), 2)
+        self.assertEqual(self.client.get(f'/api/scrape-tasks/{other}').get_json()['queued_ahead'], 1)
+
+        def get_jobs_full(**kwargs):
+            if kwargs['jobtype'] == 'graduate-jobs':
+                raise RuntimeError('listing page changed')
+            jobs = [{'link': 'https://gc.test/a/', 'title': 'Job A', 'fingerprint': 'fa'}]
+            for job in jobs:
+                kwargs['on_job'](job)
+            return jobs
+        with patch('app.utils.scraper_GC_jobs_detailed.get_jobs_full', side_effect=get_jobs_full):
+            self.assertEqual(get_scrape_queue().run_pending(), 2)
+
+        status = self.client.get(f'/api/scrape-tasks/{first}').get_json()
+        self.assertEqual((status['status'], status['progress']), ('done', 1))
+        self.assertIsNotNone(status['duration'])
+        status = self.client.get(f'/api/scrape-tasks/{other}').get_json()
+        self.assertEqual((status['status'], status['error']), ('failed', 'listing page changed'))
+        # Results stay fresh for a while; after that the same request queues a new scrape
+        self.assertEqual(self.start_scrape(jobtype='internships', location='perth'), first)
+        self.app.config['SCRAPE_FRESHNESS'] = 0
+        self.assertNotEqual(self.start_scrape(jobtype='internships', location='perth'), first)
+
+    def test_users_share_identical_scrapes(self):
+        """
+        Test that another user asking for the same filters joins the
+        unfinished scrape, may watch its stream and gets its results.
+        """
+        scrape_id = self.start_scrape(jobtype='internships', keyword='Data  Science')
+        other = User(name='joiner', email='joiner@example.com', password='pass')
+        db.session.add(other)
+        db.session.commit()
+        with self.app.app_context():
+            task, outcome = submit_scrape(other.id, 'internships', keyword='data science', owner_id=other.id)
+            self.assertEqual((task.scrape_id, outcome), (scrape_id, 'joined'))
+            self.assertTrue(get_scrape_broker().get_channel(scrape_id).allows(other.id))
+
+        jobs = [{'link': 'https://gc.test/a/', 'title': 'Job A', 'fingerprint': 'fa'}]
+        def get_jobs_full(**kwargs):
+            for job in jobs:
+                kwargs['on_job'](job)
+            return jobs
+        with patch('app.utils.scraper_GC_jobs_detailed.get_jobs_full', side_effect=get_jobs_full) as mock_get:
+            get_scrape_queue().run_pending()
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(sorted(s.user_id for s in UserScrapedJob.query), sorted([self.user.id, other.id]))
+
+    def test_unfinished_tasks_resume_at_startup(self):
+        """
+        Test that tasks abandoned by a stopped server are queued again, with
+        their stream open for clients to reconnect to, while a task whose
+        heartbeat is within the lease is left running.
+        """
+        now = datetime.now(timezone.utc)
+        db.session.add_all([
+            ScrapeTask(scrape_id='interrupted', user_id=self.user.id, jobtype='internships', status='running',
+                       started_at=now - timedelta(hours=1), heartbeat_at=now - timedelta(minutes=10)),
+            ScrapeTask(scrape_id='beating', user_id=self.user.id, jobtype='graduate-jobs', status='running',
+                       started_at=now - timedelta(hours=1), heartbeat_at=now - timedelta(seconds=30)),
+            ScrapeTask(scrape_id='finished', user_id=self.user.id, jobtype='internships', status='done'),
+        ])
+        db.session.commit()
+        self.assertEqual(resume_scrape_tasks(), 1)
+        statuses = dict(db.session.execute(db.select(ScrapeTask.scrape_id, ScrapeTask.status)).all())
+        self.assertEqual(statuses, {'interrupted': 'pending', 'beating': 'running', 'finished': 'done'})
+        self.assertIsNotNone(get_scrape_broker().get_channel('interrupted'))
+
+    def test_worker_failures_do_not_strand_tasks(self):
+        """
+        Test that a task whose setup fails is recorded as failed rather than
+        left running, that a database error does not stop the worker, and
+        that workers never run more tasks at once than configured.
+        """
+        self.start_scrape(jobtype='internships')
+        scrape_queue = get_scrape_queue()
+        with patch.object(type(get_scrape_broker()), 'open', side_effect=RuntimeError('broker down')):
+            self.assertTrue(scrape_queue.run_next())
+        task = db.session.execute(db.select(ScrapeTask)).scalar_one()
+        db.session.refresh(task)
+        self.assertEqual((task.status, task.error), ('failed', 'broker down'))
+
+        with patch.object(scrape_queue, '_claim', side_effect=OperationalError('UPDATE', {}, 'database is locked')):
+            self.assertFalse(scrape_queue._work_once())
+
+        self.start_scrape(jobtype='graduate-jobs')
+        db.session.add(ScrapeTask(scrape_id='busy', user_id=self.user.id, jobtype='x', status='running',
+                                  heartbeat_at=datetime.now(timezone.utc)))
+        db.session.commit()
+        scrape_queue.workers = 1
+        self.assertFalse(scrape_queue.run_next())
+
+class TestAsgiStreams(FlaskTestBase):
+    """
+    Tests for the asyncio event streams of the ASGI app.
+    """
+    def setUp(self):
+        """
+        Set up a signed-in user.
+        """
+        super().setUp()
+        self.user = User(name='watcher', email='watcher@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+        self.force_login(self.user)
+
+    async def request(self, path, query='', until=None):
+        """
+        Call the ASGI app with the test client's session cookie.
+
+        Returns the response start message and the body received until the
+        response ends, the until() coroutine returns, or 2 seconds pass.
+        """
+        cookie = f"session={self.client.get_cookie('session').value}"
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+                 'headers': [(b'cookie', cookie.encode())]}
+        messages, disconnect = [], asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+
+        task = asyncio.ensure_future(self.app.asgi_app(scope, receive, send))
+        if until is not None:
+            await until(messages)
+            disconnect.set()
+        await asyncio.wait_for(task, 2)
+        return messages[0], b''.join(m.get('body', b'') for m in messages[1:]).decode()
+
+    def test_scrape_stream_served_by_event_loop(self):
+        """
+        Test that a scrape's events published from another thread reach an
+        asyncio stream, which ends when the scrape completes.
+        """
+        broker = get_scrape_broker()
+        scrape_id = broker.open(self.user.id)
+        broker.publish(scrape_id, {'title': 'Before'})
+        other = broker.open(self.user.id + 1)
+
+        def scrape():
+            broker.publish(scrape_id, {'title': 'After'})
+            broker.close(scrape_id)
+
+        async def watch():
+            asyncio.get_running_loop().call_later(0.05, lambda: threading.Thread(target=scrape).start())
+            return await self.request('/api/scraping-stream', f'scrape_id={scrape_id}')
+
+        start, body = asyncio.run(watch())
+        self.assertEqual(start['status'], 200)
+        self.assertEqual([line for line in body.splitlines() if line.startswith('id:')], ['id: 1', 'id: 2', 'id: 3'])
+        self.assertIn('"title": "After"', body)
+        self.assertEqual(broker.stats()['subscribers'], 0)
+        # Another user's scrape is not visible
+        start, _ = asyncio.run(self.request('/api/scraping-stream', f'scrape_id={other}'))
+        self.assertEqual(start['status'], 404)
+
+    def test_notification_stream(self):
+        """
+        Test that new notifications are streamed with the unread count, and
+        that the stream is released when the client disconnects.
+        """
+        async def notified(messages):
+            while len(messages) < 1:
+                await asyncio.sleep(0.01)
+            await asyncio.get_running_loop().run_in_executor(None, self.notify)
+            while len(messages) < 2:
+                await asyncio.sleep(0.01)
+
+        start, body = asyncio.run(self.request('/api/notifications-stream', until=notified))
+        self.assertEqual(start['status'], 200)
+        self.assertIn('"unread_count": 1', body)
+        self.assertIn('"content": "Hello"', body)
+        self.assertEqual(get_notification_broker().stats()['subscribers'], 0)
+
+    def test_startup_fails_without_asgiref(self):
+        """
+        Test that the server refuses to start when the Flask app cannot be
+        served over ASGI, instead of answering every page with an error.
+        """
+        async def lifespan():
+            incoming = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+            sent = []
+
+            async def receive():
+                return incoming.pop(0)
+
+            async def send(message):
+                sent.append(message)
+
+            await self.app.asgi_app({'type': 'lifespan'}, receive, send)
+            return [message['type'] for message in sent]
+
+        with patch.object(self.app.asgi_app, 'wsgi', None):
+            self.assertEqual(asyncio.run(lifespan()), ['lifespan.startup.failed'])
+        with patch.object(self.app.asgi_app, 'wsgi', object()):
+            self.assertEqual(asyncio.run(lifespan()), ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+    @unittest.skipIf(scrape_broker.fcntl is None, 'file locks need fcntl')
+    def test_second_server_process_refuses_to_start(self):
+        """
+        Test that the app refuses to start while another process holds the
+        server lock, since its streams could not be subscribed to there.
+        """
+        with tempfile.TemporaryDirectory() as instance_path:
+            self.app.instance_path = instance_path
+            with open(os.path.join(instance_path, 'server.lock'), 'w') as other:
+                scrape_broker.fcntl.flock(other, scrape_broker.fcntl.LOCK_EX | scrape_broker.fcntl.LOCK_NB)
+                with self.assertRaises(RuntimeError):
+                    scrape_broker.hold_server_lock()
+            # The other process has exited
+            scrape_broker.hold_server_lock()
+            scrape_broker.hold_server_lock()
+            self.app.extensions.pop('server_lock').close()
+
+    def notify(self):
+        """Create a notification for the user from a worker thread, as a route would."""
+        with self.app.app_context():
+            create_notification(self.user.id, 'Hello')
+
+class TestResumeUpload(FlaskTestBase):
+    """
+    Tests for analysing uploaded resumes, reusing analyses of identical files.
+    """
+    def setUp(self):
+        """
+        Set up a signed-in user and a job matching the suggested titles.
+        Analyses run in the request unless a test stands in for the worker pool.
+        """
+        super().setUp()
+        self.app.config['RESUME_ANALYSIS_WORKERS'] = 0
+        self.user = User(name='applicant', email='applicant@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+        db.session.add(ScrapedJob(user_id=self.user.id, title='Data Analyst Intern', link='https://gc.test/d/'))
+        db.session.commit()
+        self.force_login(self.user)
+
+    def upload(self, data):
+        """Upload a PDF resume with the given bytes."""
+        return self.client.post('/upload', data={'resume': (io.BytesIO(data), 'resume.pdf', 'application/pdf')},
+                                content_type='multipart/form-data')
+
+    @patch('app.utils.resume_processor.extract_keywords_openai', return_value=['Data Analyst', 'Data.'])
+    @patch('app.utils.resume_processor.extract_text', return_value='Python SQL statistics')
+    def test_repeat_upload_reuses_analysis(self, mock_text, mock_keywords):
+        """
+        Test that re-uploading the same file skips parsing and the model call,
+        from memory and, once the memory cache is cleared, from the stored analysis.
+        """
+        self.upload(b'%PDF resume one')
+        self.upload(b'%PDF resume one')
+        resume_processor.get_resume_cache().invalidate()
+        self.upload(b'%PDF resume one')
+        self.assertEqual((mock_text.call_count, mock_keywords.call_count), (1, 1))
+
+        self.upload(b'%PDF resume two')
+        self.assertEqual(mock_keywords.call_count, 2)
+        analyses = ResumeAnalysis.query.order_by(ResumeAnalysis.id).all()
+        self.assertEqual(len(analyses), 4)
+        self.assertEqual(len({a.content_hash for a in analyses}), 2)
+        self.assertEqual(analyses[2].keywords, '["Data Analyst", "Data"]')
+        self.assertEqual(analyses[2].raw_text, 'Python SQL statistics')
+        self.assertEqual(analyses[2].suggested_jobs, '[1]')
+
+    @patch('app.utils.resume_processor.extract_keywords_openai', return_value=['Data Analyst'])
+    @patch('app.utils.resume_processor.extract_text', return_value='Python SQL statistics')
+    @patch('app.utils.resume_processor.get_resume_executor')
+    def test_upload_returns_before_analysis(self, mock_executor, mock_text, mock_keywords):
+        """
+        Test that the upload only queues the analysis, and that polling reports
+        it pending until the worker has stored its keywords and suggestions.
+        """
+        response = self.upload(b'%PDF slow resume')
+        self.assertEqual(response.status_code, 302)
+        mock_keywords.assert_not_called()
+        (task, *args), _ = mock_executor.return_value.submit.call_args
+        analysis_id = args[1]
+
+        pending = self.client.get(f'/api/resume-analysis/{analysis_id}').get_json()
+        self.assertEqual((pending['status'], pending['keywords']), ('pending', []))
+        self.assertIn('Analysing resume.pdf', self.client.get('/job-search').get_data(as_text=True))
+
+        self.assertEqual(task(*args), 'done')
+        self.assertFalse(os.path.exists(args[2]))  # the spooled upload is removed once analysed
+        done = self.client.get(f'/api/resume-analysis/{analysis_id}').get_json()
+        self.assertEqual((done['status'], done['keywords'], done['suggestion_count']), ('done', ['Data Analyst'], 1))
+        suggestions = self.client.get(f'/api/resume-analysis/{analysis_id}/suggestions').get_json()
+        self.assertEqual([job['title'] for job in suggestions['suggested_jobs']], ['Data Analyst Intern'])
+        self.assertEqual(self.client.get(f'/api/resume-analysis/{analysis_id + 1}').status_code, 404)
+
+    def test_results_live_in_database_not_session(self):
+        """
+        Test that the session only holds the analysis id, that suggestions are
+        paged from the API, and that the latest analysis is shown without it.
+        """
+        analysis = ResumeAnalysis(user_id=self.user.id, filename='old.pdf', status='done',
+                                  keywords='["Data Analyst"]', suggested_jobs='[1]')
+        db.session.add(analysis)
+        for i in range(2, 15):
+            db.session.add(ScrapedJob(user_id=self.user.id, title=f'Analyst {i}', link=f'https://gc.test/{i}/'))
+        db.session.commit()
+        analysis.suggested_jobs = json.dumps(list(range(1, 15)))
+        db.session.commit()
+
+        self.assertIn('Data Analyst', self.client.get('/job-search').get_data(as_text=True))
+        first = self.client.get(f'/api/resume-analysis/{analysis.id}/suggestions?limit=10').get_json()
+        self.assertEqual((len(first['suggested_jobs']), first['total'], first['next_offset']), (10, 14, 10))
+        rest = self.client.get(f'/api/resume-analysis/{analysis.id}/suggestions?offset=10').get_json()
+        self.assertEqual([job['title'] for job in rest['suggested_jobs']], [f'Analyst {i}' for i in range(11, 15)])
+        self.assertIsNone(rest['next_offset'])
+
+        with patch.object(resume_processor, 'submit_resume_analysis'):
+            self.upload(b'%PDF new resume')
+        with self.client.session_transaction() as sess:
+            self.assertNotEqual(sess['resume_analysis_id'], analysis.id)
+            self.assertFalse({'resume_keywords', 'suggested_jobs', 'email'} & set(sess))
+
+    def test_oversized_upload_is_refused(self):
+        """
+        Test that uploads over RESUME_MAX_BYTES are refused without creating an analysis.
+        """
+        self.app.config['RESUME_MAX_BYTES'] = 1024
+        response = self.upload(b'%PDF' + b'x' * 2048)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ResumeAnalysis.query.count(), 0)
+        self.assertIn('too large', self.client.get('/job-search').get_data(as_text=True))
+
+    @patch('app.utils.resume_processor.extract_keywords_openai', side_effect=RuntimeError('model unavailable'))
+    @patch('app.utils.resume_processor.extract_text', return_value='Python SQL statistics')
+    def test_failed_analysis_is_reported(self, mock_text, mock_keywords):
+        """
+        Test that an analysis whose model call fails is marked failed with the error.
+        """
+        self.upload(b'%PDF resume')
+        db.session.expire_all()  # the analysis was stored through its own session
+        analysis = ResumeAnalysis.query.one()
+        result = self.client.get(f'/api/resume-analysis/{analysis.id}').get_json()
+        self.assertEqual((result['status'], result['error']), ('failed', 'model unavailable'))
+
+class TestApplicationStats(FlaskTestBase):
+    """
+    Tests for the per-user application stats kept up to date by the application routes.
+    """
+    def setUp(self):
+        """
+        Set up a signed-in user with two applications from before the stats existed.
+        """
+        super().setUp()
+        self.user = User(name='tracker', email='tracker@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+        for status in ('Applied', 'Offer'):
+            db.session.add(JobApplication(title='Analyst', company='Acme', job_type='Graduate', status=status,
+                                          user_id=self.user.id, date_applied=datetime(2025, 3, 1, 20, 0),
+                                          closing_date=datetime(2025, 3, 11)))
+        db.session.commit()
+        self.force_login(self.user)
+
+    def assert_matches_rebuild(self):
+        """Check the incrementally maintained stats against a recount from the applications."""
+        def read():
+            return (application_stats.summary(self.user.id),
+                    application_stats.activity_series(self.user.id, date(2025, 1, 1), date(2031, 1, 1), 'month'))
+        kept = read()
+        application_stats.rebuild_stats(self.user.id)
+        db.session.commit()
+        self.assertEqual(kept, read())
+        return kept[0]
+
+    def test_stats_follow_application_changes(self):
+        """
+        Test that adding, editing, moving and deleting applications keeps the stats
+        equal to a full recount, and that the dashboard and analytics read them.
+        """
+        stats = application_stats.summary(self.user.id)
+        self.assertEqual((stats['total'], stats['status_counts']), (2, {'Applied': 1, 'Offer': 1}))
+        self.assertEqual(stats['avg_response'], 9.0)
+        # 20:00 UTC is the next day in Perth
+        days = application_stats.activity_series(self.user.id, date(2025, 3, 1), date(2025, 3, 2))
+        self.assertEqual([(day['applications'], day['offers']) for day in days], [(0, 0), (2, 1)])
+
+        self.client.post('/add-application', json={'title': 'Developer', 'company': 'Initech'})
+        new_id = JobApplication.query.filter_by(title='Developer').one().id
+        self.client.post('/update-job-status', json={'job_id': new_id, 'new_status': 'Interviewing'})
+        self.client.post(f'/update-application/{new_id}', data={
+            'title': 'Developer', 'company': 'Initech', 'job_type': 'Internship', 'status': 'Offer',
+            'closing_date': '2030-01-01'})
+        offer = JobApplication.query.filter_by(status='Offer', title='Analyst').one()
+        self.client.delete(f'/delete-application/{offer.id}')
+        db.session.expire_all()
+
+        stats = self.assert_matches_rebuild()
+        self.assertEqual(stats['status_counts'], {'Applied': 1, 'Offer': 1})
+        self.assertEqual(stats['type_counts'], {'Graduate': 1, 'Internship': 1})
+        self.assertEqual(self.client.get('/dashboard').status_code, 200)
+        self.assertEqual(self.client.get('/analytics').status_code, 200)
+
+
+    def test_activity_series_buckets(self):
+        """
+        Test that series are bucketed by week and month with zero-filled gaps and a
+        running total that includes applications from before the range.
+        """
+        db.session.add(JobApplication(title='Tester', company='Acme', status='Interviewing', user_id=self.user.id,
+                                      date_applied=datetime(2025, 3, 17, 1, 0)))
+        db.session.commit()
+        weeks = application_stats.activity_series(self.user.id, date(2025, 3, 5), date(2025, 3, 20), 'week')
+        self.assertEqual([(w['start'], w['applications'], w['interviews'], w['cumulative']) for w in weeks], [
+            (date(2025, 3, 3), 0, 0, 2), (date(2025, 3, 10), 0, 0, 2), (date(2025, 3, 17), 1, 1, 3)])
+        months = application_stats.activity_series(self.user.id, date(2025, 2, 1), date(2025, 4, 30), 'month')
+        self.assertEqual([(m['start'].month, m['applications']) for m in months], [(2, 0), (3, 3), (4, 0)])
+
+        response = self.client.get('/analytics?range=90')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Last 90 Days', response.data)
+        self.assertIn(b'Last 7 Days', self.client.get('/analytics?range=12').data)
+
+
+class TestNotificationsApi(FlaskTestBase):
+    """
+    Tests for the /api/notifications endpoint's cursor pagination.
+    """
+    def test_notifications_cursor_pagination(self):
+        """
+        Test that notifications are paged newest first with a keyset cursor.
+
+        Notifications sharing a timestamp are ordered by id so no row is
+        skipped or repeated across pages.
+        """
+        user = User(name='notified', email='notified@example.com', password='pass')
+        db.session.add(user)
+        db.session.commit()
+        same_time = datetime(2025, 5, 1, 12, 0)
+        for i in range(5):
+            db.session.add(Notification(user_id=user.id, content=f'note {i}', type='general',
+                                        created_at=same_time if i < 3 else datetime(2025, 5, 2, i)))
+        db.session.commit()
+        self.force_login(user)
+
+        data = self.client.get('/api/notifications?per_page=2').get_json()
+        self.assertEqual(data['total'], 5)
+        contents = [n['content'] for n in data['notifications']]
+        while data['has_next']:
+            data = self.client.get(f"/api/notifications?per_page=2&cursor={data['next_cursor']}").get_json()
+            contents += [n['content'] for n in data['notifications']]
+        self.assertEqual(contents, ['note 4', 'note 3', 'note 2', 'note 1', 'note 0'])
+
 if __name__ == '__main__':
     unittest.main()
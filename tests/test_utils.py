@@ -7,9 +7,25 @@ It verifies both unit-level functionality (with mocks) and integration-level
 functionality with external components.
 """
 
+import os
+import threading
+from datetime import datetime
 import unittest
 from unittest.mock import patch, MagicMock
 from app.utils import fuzzy_search, resume_processor, scraper_GC_jobs_detailed
+from app.utils.driver_pool import DriverPool
+from app.utils.keyword_service import KeywordService, KeywordServiceBusy, FakeBackend
+from app.utils.job_matcher import MatchIndex
+from app.utils import pdf_text
+from app.models import db, User, ScrapedJob
+from tests.base import FlaskTestBase
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def read_fixture(name):
+    """Read a saved HTML page from tests/fixtures."""
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
 
 class TestFuzzySearch(unittest.TestCase):
     """
@@ -81,6 +97,64 @@ class TestFuzzySearch(unittest.TestCase):
         # Should fail on irrelevant search term (negative test)
         self.assertFalse(fuzzy_search.job_matches(job, search='nurse'))
 
+    def test_job_matches_uses_precomputed_search_document(self):
+        """
+        Test matching against a search document built at insert time.
+
+        Verifies that build_search_document extracts the company, normalizes
+        the section lists, and that job_matches works from the precomputed
+        text without the JSON columns being present.
+        """
+        document = fuzzy_search.build_search_document({
+            'title': 'Graduate  Data Engineer',
+            'ai_summary': 'Build pipelines.',
+            'overview': ['Join our\nplatform team'],
+            'about_company': ['Tech Corp', 'We build things'],
+            'full_text': 'Python and SQL required.',
+        })
+        self.assertEqual(document['company'], 'Tech Corp')
+
+        class StoredJob:
+            title = 'Graduate  Data Engineer'
+            search_text = document['search_text']
+
+        job = StoredJob()
+        fields = fuzzy_search.search_fields(job)
+        self.assertEqual(len(fields), len(fuzzy_search.SEARCH_FIELDS))
+        self.assertEqual(fields[0], 'graduate data engineer')
+        self.assertEqual(fields[1], 'tech corp')
+
+        self.assertTrue(fuzzy_search.job_matches(job, search='platform team'))
+        self.assertTrue(fuzzy_search.job_matches(job, search='tech corp'))
+        self.assertFalse(fuzzy_search.job_matches(job, search='nurse'))
+
+
+    def test_trigram_index_typo_tolerance(self):
+        """
+        Test the trigram index used for typo-tolerant search.
+
+        Verifies that misspelt query words find the right documents, that
+        every query word must match, and that removed documents are no
+        longer returned.
+        """
+        index = fuzzy_search.TrigramIndex()
+        index.add(1, 'graduate software engineer')
+        index.add(2, 'mechanical engineering internship')
+        index.add(3, 'registered nurse')
+
+        ids = [doc_id for doc_id, _ in index.search('sofware enginer', confidence=0.6)]
+        self.assertEqual(ids, [1])
+
+        # Prefix of a longer word matches, and results are ranked by similarity
+        ids = [doc_id for doc_id, _ in index.search('engineer')]
+        self.assertEqual(ids, [1, 2])
+
+        self.assertEqual(index.search('astronaut'), [])
+
+        index.remove(1)
+        self.assertEqual(len(index), 2)
+        self.assertEqual([doc_id for doc_id, _ in index.search('sofware')], [])
+
 
 class TestResumeProcessor(unittest.TestCase):
     """
@@ -91,7 +165,7 @@ class TestResumeProcessor(unittest.TestCase):
     and keyword extraction using AI services.
     """
     
-    @patch('pypdf.PdfReader')
+    @patch('app.utils.pdf_text.pypdf.PdfReader')
     def test_extract_text_from_pdf(self, mock_pdf_reader):
         """
         Test PDF text extraction functionality.
@@ -119,7 +193,7 @@ class TestResumeProcessor(unittest.TestCase):
         result = resume_processor.extract_text_from_docx(b"dummy bytes")
         self.assertIn("Sample DOCX text", result)
 
-    @patch('app.utils.resume_processor.openai.OpenAI')
+    @patch('app.utils.keyword_service.openai.OpenAI')
     def test_extract_keywords_openai(self, mock_openai):
         """
         Test keyword extraction using OpenAI API.
@@ -143,6 +217,146 @@ class TestResumeProcessor(unittest.TestCase):
         self.assertIn("Software", result)
 
 
+class TestPdfText(unittest.TestCase):
+    """
+    Tests for budgeted, page-parallel PDF text extraction.
+    """
+    PDF = os.path.join(FIXTURES, 'resume_12_pages.pdf')
+
+    def tearDown(self):
+        """Stop the worker processes started by a test."""
+        pdf_text.shutdown_pool()
+
+    def test_page_and_byte_budgets(self):
+        """
+        Test that only the first max_pages pages are extracted, with a timing
+        each, and that files over the byte budget are not read.
+        """
+        result = pdf_text.extract_pdf_text(self.PDF, max_pages=3)
+        self.assertEqual((result['pages'], result['total_pages'], result['truncated']), (3, 12, True))
+        self.assertEqual(len(result['timings']), 3)
+        self.assertIn('Page 3 python', result['text'])
+        self.assertNotIn('Page 4', result['text'])
+
+        too_big = pdf_text.extract_pdf_text(self.PDF, max_bytes=100)
+        self.assertEqual((too_big['text'], too_big['truncated']), ('', True))
+
+    def test_parallel_extraction_matches_serial(self):
+        """
+        Test that pages extracted by worker processes are joined in page order,
+        exactly as when extracted in-process.
+        """
+        serial = pdf_text.extract_pdf_text(self.PDF)
+        parallel = pdf_text.extract_pdf_text(self.PDF, max_pages=10, processes=2, parallel_min_pages=2)
+        self.assertEqual(parallel['pages'], 10)
+        self.assertEqual(parallel['text'], serial['text'].split('Page 11')[0])
+        with open(self.PDF, 'rb') as f:
+            self.assertEqual(resume_processor.extract_text_from_pdf(f.read()), serial['text'])
+
+
+class TestKeywordService(FlaskTestBase):
+    """
+    Tests for the cached, concurrency-limited keyword extraction service.
+    """
+    def test_answers_are_cached_across_restarts(self):
+        """
+        Test that a text is sent to the backend once per model, and that a new
+        service (as after a restart) answers from the stored responses.
+        """
+        backend = FakeBackend()
+        service = KeywordService(backend)
+        first = service.extract('python data statistics python data')
+        self.assertEqual(service.extract('python data statistics python data'), first)
+        service.extract('python data statistics python data', model='other-model')
+        db.session.commit()
+        self.assertEqual(backend.calls, 2)
+
+        restarted = KeywordService(backend)
+        self.assertEqual(restarted.extract('python data statistics python data'), first)
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(restarted.stats()['stored_hits'], 1)
+
+    def test_busy_backend_times_out(self):
+        """
+        Test that requests beyond the concurrency limit give up after the timeout.
+        """
+        release = threading.Event()
+        started = threading.Event()
+        backend = MagicMock()
+        backend.extract.side_effect = lambda text, model: (started.set(), release.wait(5), ['Analyst'])[2]
+        service = KeywordService(backend, concurrency=1, timeout=0.05, persist=False)
+        worker = threading.Thread(target=service.extract, args=('first resume',))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(KeywordServiceBusy):
+            service.extract('second resume')
+        release.set()
+        worker.join(5)
+        self.assertEqual(service.extract('first resume'), ['Analyst'])
+        self.assertEqual(backend.extract.call_count, 1)
+
+
+class TestJobMatcher(FlaskTestBase):
+    """
+    Tests for the TF-IDF resume-to-job matching index.
+    """
+    def add_job(self, title, text, link, last_seen=datetime(2025, 5, 1)):
+        """Add a scraped job with the given title and search document."""
+        job = ScrapedJob(user_id=self.user.id, title=title, search_text=text, link=link, last_seen=last_seen)
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def setUp(self):
+        """
+        Set up a user to own the scraped jobs.
+        """
+        super().setUp()
+        self.user = User(name='scraper', email='scraper@example.com', password='pass')
+        db.session.add(self.user)
+        db.session.commit()
+
+    def test_top_k_ranks_whole_catalog(self):
+        """
+        Test that the best matches are returned in score order, whatever their
+        position in the table, and that unrelated jobs are left out.
+        """
+        nurse = self.add_job('Graduate Nurse', 'nursing hospital patient care', 'https://gc.test/n/')
+        for i in range(30):
+            self.add_job(f'Accountant {i}', 'audit tax ledger reporting', f'https://gc.test/a{i}/')
+        analyst = self.add_job('Data Analyst', 'python sql statistics dashboards', 'https://gc.test/d/')
+        engineer = self.add_job('Software Engineer', 'python services testing', 'https://gc.test/s/')
+
+        index = MatchIndex()
+        index.refresh()
+        matches = index.top_k(['Data Analyst'], 'Python and SQL coursework', k=5)
+        self.assertEqual([job_id for job_id, _ in matches], [analyst.id, engineer.id])
+        self.assertGreater(matches[0][1], matches[1][1])
+        self.assertNotIn(nurse.id, dict(index.top_k(['Data Analyst'], 'python', k=50)))
+
+    def test_refresh_is_incremental(self):
+        """
+        Test that refreshing indexes new and re-scraped jobs and drops deleted ones.
+        """
+        analyst = self.add_job('Data Analyst', 'python sql', 'https://gc.test/d/')
+        index = MatchIndex()
+        self.assertEqual(index.refresh(), 1)
+        self.assertEqual(index.refresh(), 1)  # only jobs seen at the latest time are checked again
+
+        scientist = self.add_job('Data Scientist', 'python machine learning', 'https://gc.test/m/',
+                                 last_seen=datetime(2025, 5, 2))
+        analyst.title, analyst.search_text, analyst.last_seen = 'Tax Analyst', 'audit tax', datetime(2025, 5, 3)
+        db.session.commit()
+        index.refresh()
+        self.assertEqual([job_id for job_id, _ in index.top_k(['Data'], k=5)], [scientist.id])
+
+        db.session.delete(scientist)
+        db.session.commit()
+        index.refresh()
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.top_k(['Data Scientist'], k=5), [])
+
+
 class TestScraperGCJobsDetailed(unittest.TestCase):
     """
     Tests for GradConnection job scraping utilities.
@@ -202,6 +416,134 @@ class TestScraperGCJobsDetailed(unittest.TestCase):
         self.assertIsInstance(jobs, list)
         self.assertEqual(len(jobs), 0)  # Should return empty list
 
+    def listing_cards(self, listings):
+        """Mock job cards of a listing page, from (link, card text) pairs."""
+        cards = []
+        for link, text in listings:
+            card = MagicMock()
+            card.find_element.return_value.get_attribute.return_value = link
+            card.text = text
+            cards.append(card)
+        return cards
+
+    def listing_pool(self, cards, size=1):
+        """A pool of mock browsers showing the cards on the first listing page and none on the second."""
+        def make_driver():
+            driver = MagicMock()
+            driver.find_element.side_effect = RuntimeError('no login popup')
+            driver.find_elements.side_effect = [cards, []]
+            return driver
+        return DriverPool(make_driver, size=size)
+
+    @patch('app.utils.scraper_GC_jobs_detailed.time.sleep')
+    @patch('app.utils.scraper_GC_jobs_detailed.scrape_job_detail')
+    def test_get_jobs_full_scrapes_details_in_parallel(self, mock_detail, mock_sleep):
+        """
+        Test that detail pages are shared out across the browser pool.
+
+        Three detail pages must be in flight at once (the barrier only opens
+        when three workers wait on it), duplicate links are scraped once,
+        each job is reported to on_job as it completes, and the returned
+        results keep the listing order.
+        """
+        links = ['https://gc.test/a/', 'https://gc.test/b/', 'https://gc.test/a/', 'https://gc.test/c/']
+        cards = self.listing_cards((link, link) for link in links)
+        barrier = threading.Barrier(3, timeout=5)
+
+        def detail(driver):
+            barrier.wait()
+            return {'title': driver.get.call_args[0][0]}
+        mock_detail.side_effect = detail
+
+        pool = self.listing_pool(cards, size=4)
+        streamed = []
+        jobs = scraper_GC_jobs_detailed.get_jobs_full('internships', max_pages=2, pool=pool, on_job=streamed.append)
+        self.assertEqual(sorted(job['link'] for job in streamed), [job['link'] for job in jobs])
+        self.assertEqual([job['link'] for job in jobs], ['https://gc.test/a/', 'https://gc.test/b/', 'https://gc.test/c/'])
+        self.assertEqual([job['title'] for job in jobs], [job['link'] for job in jobs])
+
+    @patch('app.utils.scraper_GC_jobs_detailed.time.sleep')
+    @patch('app.utils.scraper_GC_jobs_detailed.scrape_job_link')
+    def test_get_jobs_full_skips_unchanged_listings(self, mock_link, mock_sleep):
+        """
+        Test that known jobs whose listing card is unchanged (apart from the
+        closing countdown) are not visited again.
+        """
+        cards = self.listing_cards((('https://gc.test/a/', 'Job A\nAcme\nClosing in 3 days'),
+                                    ('https://gc.test/b/', 'Job B\nAcme\nClosing in 5 days')))
+        mock_link.side_effect = lambda pool, link, debug, backend: {'link': link, 'title': 'fresh'}
+        known = {'https://gc.test/a/': scraper_GC_jobs_detailed.listing_fingerprint('Job A\nAcme\nClosing in 4 days'),
+                 'https://gc.test/b/': scraper_GC_jobs_detailed.listing_fingerprint('Job B (old)\nAcme')}
+        jobs = scraper_GC_jobs_detailed.get_jobs_full('internships', max_pages=2,
+                                                      pool=self.listing_pool(cards), known=known)
+
+        self.assertEqual(jobs[0], {'link': 'https://gc.test/a/', 'fingerprint': known['https://gc.test/a/'],
+                                   'unchanged': True})
+        self.assertEqual(jobs[1]['title'], 'fresh')
+        self.assertEqual(jobs[1]['fingerprint'], scraper_GC_jobs_detailed.listing_fingerprint(cards[1].text))
+        self.assertEqual([call.args[1] for call in mock_link.call_args_list], ['https://gc.test/b/'])
+
+    def test_driver_pool_reuses_and_replaces_browsers(self):
+        """
+        Test that the pool lends out warm browsers again, and quits a browser
+        that failed while in use instead of returning it.
+        """
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        pool = DriverPool(factory, size=2)
+        with pool.driver() as first:
+            pass
+        with pool.driver() as again:
+            self.assertIs(again, first)
+        with self.assertRaises(RuntimeError):
+            with pool.driver() as broken:
+                raise RuntimeError('browser crashed')
+        broken.quit.assert_called_once()
+        with pool.driver() as fresh:
+            self.assertIsNot(fresh, broken)
+        self.assertEqual(factory.call_count, 2)
+
+    def test_parse_job_detail_html_fixture(self):
+        """
+        Test the HTTP backend's parser against a saved GradConnection page.
+
+        Visible text is extracted as a browser would show it (hidden spans are
+        empty, entities decoded), and unclosed list items are still split.
+        """
+        job = scraper_GC_jobs_detailed.parse_job_detail_html(read_fixture('gradconnection_job_detail.html'))
+        self.assertEqual(job['title'], 'Engineering Summer Internship')
+        self.assertEqual(job['closing_in'], 'Closing in 12 days')
+        self.assertEqual(job['posted_date'], '')
+        self.assertTrue(job['ai_summary'].startswith('Read More\nAbout\nAcme Mining offers'))
+        self.assertIn('Join Acme Mining\u2019s summer program and work on real projects.', job['overview'])
+        self.assertIn('Australian citizen or PR', job['overview'])
+        self.assertIn('Strong communication skills', job['overview'])
+        self.assertIn('\nResponsibilities\nSupport site engineers\n', job['full_text'])
+
+        # A page whose content is rendered by JavaScript cannot be parsed
+        self.assertIsNone(scraper_GC_jobs_detailed.parse_job_detail_html(read_fixture('gradconnection_js_shell.html')))
+
+    @patch('app.utils.scraper_GC_jobs_detailed.scrape_job_detail')
+    @patch('app.utils.scraper_GC_jobs_detailed.fetch_html')
+    def test_http_backend_falls_back_to_selenium(self, mock_fetch, mock_detail):
+        """
+        Test that the HTTP backend only borrows a browser for pages that
+        need JavaScript.
+        """
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        pool = DriverPool(factory, size=1)
+        mock_detail.return_value = {'title': 'Rendered by browser'}
+
+        mock_fetch.return_value = read_fixture('gradconnection_job_detail.html')
+        job = scraper_GC_jobs_detailed.scrape_job_link(pool, 'https://gc.test/job', backend='http')
+        self.assertEqual(job['title'], 'Engineering Summer Internship')
+        self.assertEqual(job['link'], 'https://gc.test/job')
+        factory.assert_not_called()
+
+        mock_fetch.return_value = read_fixture('gradconnection_js_shell.html')
+        job = scraper_GC_jobs_detailed.scrape_job_link(pool, 'https://gc.test/js', backend='http')
+        self.assertEqual(job['title'], 'Rendered by browser')
+        factory.assert_called_once()
+
     def test_get_jobs_full_integration(self):
         """
         Test job scraping with actual browser integration.